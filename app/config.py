@@ -14,8 +14,87 @@ class Settings(BaseSettings):
     gemini_api_key: str | None = Field(default=None, alias="GEMINI_API_KEY")
     embeddings_provider: str | None = Field(default=None, alias="EMBEDDINGS_PROVIDER")
 
+    # Worker threads for blocking Mongo/provider calls issued from async request handlers
+    io_max_workers: int = Field(default=32, alias="IO_MAX_WORKERS")
+
+    # Shared provider HTTP clients: keep-alive pool size and timeouts (seconds)
+    http_max_connections: int = Field(default=20, alias="HTTP_MAX_CONNECTIONS")
+    http_max_keepalive: int = Field(default=10, alias="HTTP_MAX_KEEPALIVE")
+    http_keepalive_expiry: float = Field(default=60.0, alias="HTTP_KEEPALIVE_EXPIRY")
+    http_timeout: float = Field(default=30.0, alias="HTTP_TIMEOUT")
+    http_connect_timeout: float = Field(default=5.0, alias="HTTP_CONNECT_TIMEOUT")
+
+    # Embedding cache: in-process LRU entries, whether to also persist vectors in Mongo, and how long
+    # persisted vectors live (seconds, enforced by a TTL index; 0 keeps them forever)
+    embedding_cache_size: int = Field(default=10000, alias="EMBEDDING_CACHE_SIZE")
+    embedding_cache_persist: bool = Field(default=True, alias="EMBEDDING_CACHE_PERSIST")
+    embedding_cache_ttl: float = Field(default=30 * 24 * 3600.0, alias="EMBEDDING_CACHE_TTL")
+
+    # Embedding requests: concurrent provider batches and per-batch retries with exponential backoff
+    embedding_max_workers: int = Field(default=4, alias="EMBEDDING_MAX_WORKERS")
+    embedding_max_retries: int = Field(default=3, alias="EMBEDDING_MAX_RETRIES")
+    embedding_retry_backoff: float = Field(default=0.5, alias="EMBEDDING_RETRY_BACKOFF")
+
+    # QA answer cache: exact normalized-question hits plus near-duplicates above a cosine threshold
+    answer_cache_enabled: bool = Field(default=True, alias="ANSWER_CACHE_ENABLED")
+    answer_cache_size: int = Field(default=1000, alias="ANSWER_CACHE_SIZE")
+    answer_cache_ttl: float = Field(default=3600.0, alias="ANSWER_CACHE_TTL")
+    answer_cache_similarity: float = Field(default=0.95, alias="ANSWER_CACHE_SIMILARITY")
+
+    # POST /qa/batch: most questions per request and concurrent LLM snippet calls per batch
+    qa_batch_max_questions: int = Field(default=256, alias="QA_BATCH_MAX_QUESTIONS")
+    qa_batch_concurrency: int = Field(default=8, alias="QA_BATCH_CONCURRENCY")
+
+    # Render snippets from the matched OpenAPI operation (no LLM call) when confidence is at least this
+    snippet_fast_path_threshold: float = Field(default=0.6, alias="SNIPPET_FAST_PATH_THRESHOLD")
+
+    # Token budget for the spec context packed into the snippet-generation prompt
+    prompt_context_tokens: int = Field(default=1200, alias="PROMPT_CONTEXT_TOKENS")
+
+    # Codec for raw document bodies stored out of line in doc_blobs: zlib, lzma or none
+    content_codec: str = Field(default="zlib", alias="CONTENT_CODEC")
+
+    # Log requests slower than this many milliseconds with their stage breakdown (0 disables)
+    slow_request_ms: float = Field(default=0.0, alias="SLOW_REQUEST_MS")
+
+    # Number of per-document OpenAPI operation catalogs kept in memory (LRU)
+    catalog_cache_size: int = Field(default=64, alias="CATALOG_CACHE_SIZE")
+
+    # OpenAPI chunking: how many levels of $ref to inline into each operation chunk
+    openapi_ref_depth: int = Field(default=3, alias="OPENAPI_REF_DEPTH")
+
+    # Ingest pipeline: parse worker processes (0 = parse in threads), uploads smaller than the
+    # threshold skip the process pool, concurrent files in the embed/upsert stage, chunks per embed batch
+    ingest_parse_workers: int = Field(default=2, alias="INGEST_PARSE_WORKERS")
+    ingest_process_pool_min_bytes: int = Field(default=256 * 1024, alias="INGEST_PROCESS_POOL_MIN_BYTES")
+    ingest_max_concurrent_files: int = Field(default=4, alias="INGEST_MAX_CONCURRENT_FILES")
+    ingest_index_batch: int = Field(default=256, alias="INGEST_INDEX_BATCH")
+    # Upload size caps per file and per request (HTTP 413 above either) and the size from which specs
+    # are parsed incrementally
+    ingest_max_upload_bytes: int = Field(default=64 * 1024 * 1024, alias="INGEST_MAX_UPLOAD_BYTES")
+    ingest_max_request_bytes: int = Field(default=256 * 1024 * 1024, alias="INGEST_MAX_REQUEST_BYTES")
+    ingest_stream_min_bytes: int = Field(default=8 * 1024 * 1024, alias="INGEST_STREAM_MIN_BYTES")
+
     use_fake_embeddings: bool = Field(default=False, alias="USE_FAKE_EMBEDDINGS")
     use_memory_vectorstore: bool = Field(default=False, alias="USE_MEMORY_VECTORSTORE")
+    # Hybrid retrieval: BM25 over chunk text fused with vector results by reciprocal rank
+    hybrid_search_enabled: bool = Field(default=True, alias="HYBRID_SEARCH_ENABLED")
+    retrieval_candidates: int = Field(default=20, alias="RETRIEVAL_CANDIDATES")
+    rrf_k: int = Field(default=60, alias="RRF_K")
+
+    # Page size for id-based vector deletes
+    vector_delete_batch: int = Field(default=1000, alias="VECTOR_DELETE_BATCH")
+    # Directory for the in-memory vector store snapshot (vectors.npy + ids.json); unset disables persistence
+    vectorstore_snapshot_dir: str | None = Field(default=None, alias="VECTORSTORE_SNAPSHOT_DIR")
+    # In-memory index: "flat" (exact scan) or "ivf" (approximate); IVF lists (0 = about 4*sqrt(rows)) and lists probed per query
+    vectorstore_index: str = Field(default="flat", alias="VECTORSTORE_INDEX")
+    ivf_nlist: int = Field(default=0, alias="IVF_NLIST")
+    ivf_nprobe: int = Field(default=8, alias="IVF_NPROBE")
+    # In-memory scoring precision: "none" (float32), "float16" or "int8"; quantized stores re-rank rerank * top_k
+    # candidates against float32 vectors kept in a memory-mapped temp file. Prefer int8: float16 only saves memory
+    # and scans several times slower than both int8 and float32
+    vectorstore_quantization: str = Field(default="none", alias="VECTORSTORE_QUANTIZATION")
+    vectorstore_rerank: int = Field(default=4, alias="VECTORSTORE_RERANK")
 
     # CORS
     cors_allow_origins: str = Field(default="*", alias="CORS_ALLOW_ORIGINS")
@@ -1,8 +1,9 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, TEXT
 from .config import settings
 import os
 
-USE_MOCK_DB = False
+# in-process mongomock for offline tests and benchmarks (USE_MOCK_DB=1)
+USE_MOCK_DB = settings.use_mock_db
 
 if USE_MOCK_DB:
 	try:
@@ -22,5 +23,39 @@ _db = _client[settings.mongodb_db]
 docs_col = _db["docs"]
 chunks_col = _db["doc_chunks"]
 qa_col = _db["qa_history"]
+embeddings_cache_col = _db["embedding_cache"]
+# compressed raw document bodies, split into parts (see services/blobs.py)
+blobs_col = _db["doc_blobs"]
 
-__all__ = ["docs_col", "chunks_col", "qa_col"]
+
+
+def ensure_indexes():
+	"""Create the indexes the listing, lookup and delete paths rely on (idempotent)."""
+	chunks_col.create_index([("doc_id", ASCENDING)], name="doc_id")
+	docs_col.create_index([("name", ASCENDING), ("type", ASCENDING)], name="name_type")
+	docs_col.create_index([("content_hash", ASCENDING)], name="content_hash")
+	# parts are per (doc, kind): raw content and the operation catalog; a replacement is written
+	# under a new version next to the current one before the doc is switched over
+	existing = blobs_col.index_information()
+	for legacy in ("doc_id_seq", "doc_id_kind_seq"):
+		if legacy in existing:
+			blobs_col.drop_index(legacy)
+	blobs_col.create_index(
+		[("doc_id", ASCENDING), ("kind", ASCENDING), ("version", ASCENDING), ("seq", ASCENDING)],
+		name="doc_id_kind_version_seq",
+		unique=True,
+	)
+	# persisted embeddings expire so the cache collection stays bounded
+	ttl = int(settings.embedding_cache_ttl)
+	current = embeddings_cache_col.index_information().get("created_at_ttl")
+	if current is not None and current.get("expireAfterSeconds") != ttl:
+		embeddings_cache_col.drop_index("created_at_ttl")
+	if ttl > 0:
+		embeddings_cache_col.create_index([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=ttl)
+	# history is paged by _id; the created_at index an earlier release created served no query
+	if "created_at" in qa_col.index_information():
+		qa_col.drop_index("created_at")
+	qa_col.create_index([("question", TEXT), ("answer", TEXT)], name="qa_text", weights={"question": 5, "answer": 1})
+
+
+__all__ = ["docs_col", "chunks_col", "qa_col", "embeddings_cache_col", "blobs_col", "ensure_indexes"]
@@ -1,10 +1,37 @@
 from __future__ import annotations
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
+from .db import ensure_indexes
 from .routers import ingest, qa, docs, history
+from .services.qa import rehydrate_index, rebuild_lexical_index, vectorstore_stats
+from .services.blobs import migrate_inline_content
+from .services.embedding_cache import embedding_cache
+from .services.answer_cache import answer_cache
+from .services.snippets import snippet_stats
+from .services.catalog import catalog_cache
+from .services.clients import close_clients
+from .services.ingest import shutdown_process_pool
+from .utils.metrics import ServerTimingMiddleware, registry
 
-app = FastAPI(title="API Doc Answerer + Snippet Generator")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    ensure_indexes()
+    # move bodies of docs stored before out-of-line content; no-op once done
+    migrate_inline_content()
+    # warm the in-memory index from stored embeddings when no snapshot was found
+    rehydrate_index()
+    rebuild_lexical_index()
+    yield
+    close_clients()
+    shutdown_process_pool()
+
+
+# Swagger UI moves off /docs, which is the document listing endpoint
+app = FastAPI(title="API Doc Answerer + Snippet Generator", lifespan=lifespan, docs_url="/swagger")
 
 origins = [o.strip() for o in (settings.cors_allow_origins or "*").split(",")]
 app.add_middleware(
@@ -18,6 +45,14 @@ app.add_middleware(
     max_age=600,
 )
 
+app.add_middleware(ServerTimingMiddleware, slow_ms=settings.slow_request_ms)
+
+registry.register_stats("app_embedding_cache", embedding_cache.stats)
+registry.register_stats("app_answer_cache", answer_cache.stats)
+registry.register_stats("app_snippets", snippet_stats.stats)
+registry.register_stats("app_catalog_cache", catalog_cache.stats)
+registry.register_stats("app_vectorstore", vectorstore_stats)
+
 app.include_router(ingest.router)
 app.include_router(qa.router)
 app.include_router(docs.router)
@@ -26,4 +61,15 @@ app.include_router(history.router)
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "embedding_cache": embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "snippets": snippet_stats.stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition: per-stage and per-route latency histograms plus cache gauges."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -5,10 +5,16 @@ from pydantic import BaseModel, Field
 class IngestResponse(BaseModel):
     doc_ids: List[str]
     chunks_indexed: int
+    chunks_added: int = 0
+    chunks_unchanged: int = 0
+    chunks_removed: int = 0
 
 class QARequest(BaseModel):
     question: str
 
+class QABatchRequest(BaseModel):
+    questions: List[str]
+
 class Citation(BaseModel):
     doc_id: str
     fragment: Optional[str] = None
@@ -35,3 +41,7 @@ class DocInfo(BaseModel):
     name: str
     type: Literal["openapi", "markdown"]
     created_at: str
+
+
+class BulkDeleteRequest(BaseModel):
+    ids: List[str]
@@ -1,31 +1,66 @@
 from __future__ import annotations
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Response
 from bson import ObjectId
-from ..db import docs_col, chunks_col
-from ..services.qa import delete_doc_from_index
+from ..db import docs_col
+from ..models.schemas import BulkDeleteRequest
+from ..services.qa import delete_docs
 from ..utils.serialize import to_serializable
+from ..utils.concurrency import run_blocking
+from ..utils.pagination import MAX_PAGE_SIZE, keyset_page, parse_cursor
 
 router = APIRouter()
 
 
 @router.get("/docs")
-async def list_docs():
-    docs = []
-    for d in docs_col.find():
-        docs.append({"id": str(d["_id"]), "name": d.get("name"), "type": d.get("type"), "created_at": str(d.get("_id").generation_time)})
+async def list_docs(
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """Docs oldest first; pass the ``X-Next-Cursor`` header back as ``after`` for the next page."""
+    try:
+        cursor = parse_cursor(after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    docs, next_cursor = await run_blocking(_list_docs, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return to_serializable(docs)
 
 
+def _list_docs(limit: int, after: Optional[ObjectId] = None):
+    # name/type only: never pull spec bodies or catalogs just to list them
+    page, next_cursor = keyset_page(docs_col, {"name": 1, "type": 1}, limit, after)
+    docs = [
+        {"id": str(d["_id"]), "name": d.get("name"), "type": d.get("type"), "created_at": str(d["_id"].generation_time)}
+        for d in page
+    ]
+    return docs, next_cursor
+
+
+@router.delete("/docs")
+async def delete_docs_bulk(req: BulkDeleteRequest):
+    try:
+        ids = [ObjectId(i) for i in req.ids]
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid id")
+    deleted = {str(i) for i in await run_blocking(delete_docs, ids)}
+    return to_serializable(
+        {
+            "status": "deleted",
+            "deleted": [i for i in req.ids if i in deleted],
+            "not_found": [i for i in req.ids if i not in deleted],
+        }
+    )
+
+
 @router.delete("/docs/{doc_id}")
 async def delete_doc(doc_id: str):
     try:
         _id = ObjectId(doc_id)
     except Exception:
         raise HTTPException(status_code=400, detail="invalid id")
-    d = docs_col.find_one({"_id": _id})
-    if not d:
+    if not await run_blocking(delete_docs, [_id]):
         raise HTTPException(status_code=404, detail="not found")
-    chunks_col.delete_many({"doc_id": _id})
-    docs_col.delete_one({"_id": _id})
-    delete_doc_from_index(doc_id)
     return to_serializable({"status": "deleted", "id": doc_id})
@@ -1,27 +1,62 @@
 from __future__ import annotations
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Response
 from bson import ObjectId
 from ..db import qa_col
 from ..utils.serialize import to_serializable
+from ..utils.concurrency import run_blocking
+from ..utils.pagination import MAX_PAGE_SIZE, keyset_page, parse_cursor
 
 router = APIRouter()
 
+_LIST_FIELDS = {"question": 1, "created_at": 1}
+
+
+def _item(q):
+    return {"id": str(q["_id"]), "question": q.get("question"), "created_at": q.get("created_at")}
+
 
 @router.get("/history")
-async def list_history():
-    items = []
-    for q in qa_col.find().sort("_id", -1).limit(50):
-        items.append({"id": str(q["_id"]), "question": q.get("question"), "created_at": q.get("created_at")})
+async def list_history(
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """Newest first; pass the ``X-Next-Cursor`` header back as ``after`` for the next page."""
+    try:
+        cursor = parse_cursor(after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    items, next_cursor = await run_blocking(_list_history, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return to_serializable(items)
 
 
+def _list_history(limit: int, after: Optional[ObjectId] = None):
+    page, next_cursor = keyset_page(qa_col, _LIST_FIELDS, limit, after, newest_first=True)
+    return [_item(q) for q in page], next_cursor
+
+
+@router.get("/history/search")
+async def search_history(q: str = Query(..., min_length=1), limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE)):
+    """Past questions matching ``q`` (text index over question and answer), best first."""
+    return to_serializable(await run_blocking(_search_history, q, limit))
+
+
+def _search_history(text: str, limit: int):
+    score = {"score": {"$meta": "textScore"}}
+    cursor = qa_col.find({"$text": {"$search": text}}, {**_LIST_FIELDS, **score}).sort([("score", {"$meta": "textScore"})]).limit(limit)
+    return [{**_item(q), "score": q.get("score")} for q in cursor]
+
+
 @router.get("/history/{qa_id}")
 async def get_history(qa_id: str):
     try:
         _id = ObjectId(qa_id)
     except Exception:
         raise HTTPException(status_code=400, detail="invalid id")
-    q = qa_col.find_one({"_id": _id})
+    q = await run_blocking(qa_col.find_one, {"_id": _id})
     if not q:
         raise HTTPException(status_code=404, detail="not found")
     q["id"] = str(q["_id"])
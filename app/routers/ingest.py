@@ -1,57 +1,82 @@
 from __future__ import annotations
 from fastapi import APIRouter, UploadFile, File
 from fastapi import HTTPException
+from fastapi.responses import JSONResponse
 from typing import List
-from bson import ObjectId
-from ..db import docs_col, chunks_col
-from ..utils.text import chunk_text, clean_markdown
-from ..services.qa import index_doc
+from ..config import settings
+from ..services.embeddings import EmbeddingError
+from ..services.ingest import ingest_jobs, parse_async, store_and_index
 from ..utils.serialize import to_serializable
-import yaml
-import json
+from ..utils.concurrency import run_blocking
 
 router = APIRouter()
 
+_READ_CHUNK = 1024 * 1024
 
-def _detect_type_json_only(name: str, content: str) -> str:
-    lower = name.lower()
-    if not lower.endswith(".json"):
-        raise HTTPException(status_code=400, detail=f"Only JSON is supported. Invalid file: {name}")
-    try:
-        j = json.loads(content)
-    except Exception:
-        raise HTTPException(status_code=400, detail=f"Invalid JSON content: {name}")
-    if isinstance(j, dict) and ("openapi" in j or "swagger" in j):
-        return "openapi"
-    # If not an OpenAPI JSON, reject
-    raise HTTPException(status_code=400, detail=f"Unsupported JSON type (expect OpenAPI): {name}")
+
+async def _read_capped(f: UploadFile, budget: int) -> bytes:
+    """Read an upload in 1 MiB pieces, rejecting it once it passes the per-file cap or ``budget``."""
+    limit = min(settings.ingest_max_upload_bytes, budget)
+    buf = bytearray()
+    while True:
+        piece = await f.read(_READ_CHUNK)
+        if not piece:
+            return bytes(buf)
+        buf += piece
+        if len(buf) > limit:
+            if len(buf) > settings.ingest_max_upload_bytes:
+                detail = f"{f.filename} exceeds the {settings.ingest_max_upload_bytes} byte upload limit"
+            else:
+                detail = f"request exceeds the {settings.ingest_max_request_bytes} byte upload limit"
+            raise HTTPException(status_code=413, detail=detail)
 
 
 @router.post("/ingest")
-async def ingest(files: List[UploadFile] = File(...)):
-    doc_ids: List[str] = []
-    total_chunks = 0
+async def ingest(files: List[UploadFile] = File(...), background: bool = False):
+    budget = settings.ingest_max_request_bytes
+
+    if background:
+        # the job outlives the request's upload files, so it gets the bytes; poll /ingest/jobs/{id}
+        uploads = []
+        for f in files:
+            raw = await _read_capped(f, budget)
+            budget -= len(raw)
+            uploads.append((f.filename, raw))
+        job = ingest_jobs.submit(uploads)
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job.id, "status": job.status, "status_url": f"/ingest/jobs/{job.id}"},
+        )
+
+    # one file at a time, stored before the next is read, so only one upload is held in memory;
+    # a bad file stops the request but files before it stay ingested
+    results = []
     for f in files:
-        raw = (await f.read()).decode("utf-8", errors="ignore")
-        doc_type = _detect_type_json_only(f.filename, raw)
-        content = raw
-        doc = {"name": f.filename, "type": doc_type, "content": content}
-        inserted = docs_col.insert_one(doc)
-        _id = inserted.inserted_id
-        doc_ids.append(str(_id))
-
-        # chunk content
-        # OpenAPI JSON: put whole content as one chunk and minimal path-level chunks
-        chunks = [{"_id": ObjectId(), "doc_id": _id, "text": content, "fragment": "spec"}]
+        raw = await _read_capped(f, budget)
+        budget -= len(raw)
         try:
-            j = json.loads(content) or {}
-            for p in (j.get("paths", {}) or {}).keys():
-                chunks.append({"_id": ObjectId(), "doc_id": _id, "text": f"Path: {p}", "fragment": p})
-        except Exception:
-            pass
-        if chunks:
-            chunks_col.insert_many(chunks)
-            total_chunks += len(chunks)
-            # index
-            index_doc({"_id": _id}, chunks)
-    return to_serializable({"doc_ids": doc_ids, "chunks_indexed": total_chunks})
+            parsed = await parse_async(f.filename, raw)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        try:
+            results.append(await run_blocking(store_and_index, parsed, raw))
+        except EmbeddingError as e:
+            raise HTTPException(status_code=502, detail=f"Embedding failed: {e}")
+        del raw, parsed
+    return to_serializable(
+        {
+            "doc_ids": [r["doc_id"] for r in results],
+            "chunks_indexed": sum(r["added"] for r in results),
+            "chunks_added": sum(r["added"] for r in results),
+            "chunks_unchanged": sum(r["unchanged"] for r in results),
+            "chunks_removed": sum(r["removed"] for r in results),
+        }
+    )
+
+
+@router.get("/ingest/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="not found")
+    return to_serializable(job.to_dict())
@@ -1,12 +1,50 @@
 from __future__ import annotations
-from fastapi import APIRouter
-from ..models.schemas import QARequest
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+import json
+from ..config import settings
+from ..models.schemas import QARequest, QABatchRequest
 from ..utils.serialize import to_serializable
-from ..services.qa import ask_question
+from ..services.qa import ask_question_async, ask_questions_async, stream_question
+from ..services.embeddings import EmbeddingError
 
 router = APIRouter()
 
 
 @router.post("/qa")
 async def qa(req: QARequest):
-    return to_serializable(ask_question(req.question))
+    try:
+        return to_serializable(await ask_question_async(req.question))
+    except EmbeddingError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@router.post("/qa/batch")
+async def qa_batch(req: QABatchRequest):
+    """Answer many questions in one request; ``results[i]`` is what /qa returns for ``questions[i]``."""
+    if not req.questions:
+        raise HTTPException(status_code=400, detail="no questions")
+    if len(req.questions) > settings.qa_batch_max_questions:
+        raise HTTPException(status_code=400, detail=f"at most {settings.qa_batch_max_questions} questions per batch")
+    try:
+        return to_serializable({"results": await ask_questions_async(req.questions)})
+    except EmbeddingError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@router.post("/qa/stream")
+async def qa_stream(req: QARequest):
+    """Server-Sent Events variant of /qa: answer, token*, snippets, done."""
+
+    async def events():
+        try:
+            async for event, data in stream_question(req.question):
+                yield f"event: {event}\ndata: {json.dumps(to_serializable(data))}\n\n"
+        except EmbeddingError as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
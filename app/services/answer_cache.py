@@ -0,0 +1,124 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+import copy
+import re
+import threading
+import time
+import numpy as np
+
+from ..config import settings
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    return _WS.sub(" ", question.strip().lower()).rstrip("?!. ")
+
+
+class _Entry:
+    __slots__ = ("key", "vector", "result", "doc_ids", "expires_at")
+
+    def __init__(self, key: str, vector: Optional[np.ndarray], result: Dict[str, Any], doc_ids: Iterable[str], expires_at: float):
+        self.key = key
+        self.vector = vector
+        self.result = result
+        self.doc_ids = set(doc_ids)
+        self.expires_at = expires_at
+
+
+class AnswerCache:
+    """QA result cache with an exact tier and a near-duplicate (cosine) tier.
+
+    Entries expire after ``ttl`` seconds and are evicted LRU beyond
+    ``max_entries``. Each entry remembers the docs it cites so deleting a doc
+    drops every answer built from it.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, threshold: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _alive(self, entry: _Entry, now: float) -> bool:
+        if entry.expires_at >= now:
+            return True
+        self._entries.pop(entry.key, None)
+        return False
+
+    def get_exact(self, question: str) -> Optional[Dict[str, Any]]:
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._alive(entry, time.monotonic()):
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return copy.deepcopy(entry.result)
+
+    def get_similar(self, vector: List[float]) -> Optional[Dict[str, Any]]:
+        q = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(q)) or 1.0
+        q = q / norm
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in list(self._entries.values()) if e.vector is not None and self._alive(e, now)]
+            if not candidates:
+                self.misses += 1
+                return None
+            sims = np.stack([e.vector for e in candidates]) @ q
+            best = int(np.argmax(sims))
+            if float(sims[best]) < self.threshold:
+                self.misses += 1
+                return None
+            entry = candidates[best]
+            self._entries.move_to_end(entry.key)
+            self.similar_hits += 1
+            return copy.deepcopy(entry.result)
+
+    def put(self, question: str, vector: Optional[List[float]], result: Dict[str, Any], doc_ids: Iterable[str]):
+        if self.max_entries <= 0:
+            return
+        key = normalize_question(question)
+        vec = None
+        if vector is not None:
+            vec = np.asarray(vector, dtype=np.float32)
+            vec = vec / (float(np.linalg.norm(vec)) or 1.0)
+        entry = _Entry(key, vec, copy.deepcopy(result), doc_ids, time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_doc(self, doc_id: str):
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if doc_id in e.doc_ids]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+            }
+
+
+answer_cache = AnswerCache(
+    max_entries=settings.answer_cache_size if settings.answer_cache_enabled else 0,
+    ttl=settings.answer_cache_ttl,
+    threshold=settings.answer_cache_similarity,
+)
+
+__all__ = ["AnswerCache", "answer_cache", "normalize_question"]
@@ -0,0 +1,141 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import lzma
+import zlib
+from bson import Binary, ObjectId
+
+from ..config import settings
+from ..db import blobs_col, chunks_col, docs_col
+
+# well under Mongo's 16 MB document limit once BSON overhead is added
+PART_BYTES = 8 * 1024 * 1024
+# reads that lose the race with a replacement re-read the doc's pointer this many times
+_READ_ATTEMPTS = 3
+
+_CODECS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+    "none": (bytes, bytes),
+}
+
+
+def _codec(name: str):
+    try:
+        return _CODECS[name]
+    except KeyError:
+        raise ValueError(f"unknown content codec: {name}")
+
+
+def _put_parts(doc_id: Any, kind: str, data: bytes, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Store ``data`` as ``PART_BYTES`` parts of ``kind`` for ``doc_id``, replacing earlier ones.
+
+    The parts are written under a fresh version, then the doc's ``<kind>_version``
+    pointer and ``fields`` are switched in one update and the replaced version is
+    dropped, so readers see either the old body or the new one, never a mix.
+    Returns the fields to ``$set`` on the doc (for a doc inserted afterwards).
+    """
+    version = ObjectId()
+    parts = [
+        {"doc_id": doc_id, "kind": kind, "version": version, "seq": i, "data": Binary(data[start : start + PART_BYTES])}
+        for i, start in enumerate(range(0, max(1, len(data)), PART_BYTES))
+    ]
+    blobs_col.insert_many(parts)
+    fields = {**fields, f"{kind}_version": version}
+    old = docs_col.find_one_and_update({"_id": doc_id}, {"$set": fields}, {f"{kind}_version": 1})
+    if old is not None:
+        # parts written before blobs were versioned have no version field; None matches them
+        blobs_col.delete_many({"doc_id": doc_id, "kind": kind, "version": old.get(f"{kind}_version")})
+    return fields
+
+
+def _get_parts(doc_id: Any, kind: str, size_field: str, *fields: str) -> Tuple[Optional[Dict[str, Any]], Optional[bytes]]:
+    """The doc (``fields`` projected) and the parts of ``kind`` it currently points at.
+
+    A read that races a replacement (the old version is dropped mid-read) comes
+    up short of the recorded size and follows the new pointer instead.
+    """
+    for _ in range(_READ_ATTEMPTS):
+        doc = docs_col.find_one({"_id": doc_id}, {f"{kind}_version": 1, size_field: 1, **{f: 1 for f in fields}})
+        if doc is None or doc.get(size_field) is None:
+            return doc, None
+        query = {"doc_id": doc_id, "kind": kind, "version": doc.get(f"{kind}_version")}
+        data = b"".join(bytes(p["data"]) for p in blobs_col.find(query, {"data": 1}).sort("seq", 1))
+        if len(data) == doc[size_field]:
+            return doc, data
+    raise RuntimeError(f"{kind} of {doc_id} kept changing while being read")
+
+
+def put_content(doc_id: Any, body: Union[str, bytes], codec: Optional[str] = None) -> Dict[str, Any]:
+    """Compress ``body`` (text or UTF-8 bytes) into ``blobs_col`` parts for ``doc_id``, replacing any previous body.
+
+    Returns the metadata fields to ``$set`` on the doc (codec, raw/stored sizes and version).
+    """
+    codec = codec or settings.content_codec
+    compress, _ = _codec(codec)
+    raw = body.encode("utf-8") if isinstance(body, str) else body
+    data = compress(raw)
+    return _put_parts(doc_id, "content", data, {"content_codec": codec, "content_size": len(raw), "content_stored": len(data)})
+
+
+def put_catalog(doc_id: Any, blob: bytes) -> Dict[str, Any]:
+    """Store an encoded operation catalog out of line; returns the fields to ``$set`` on the doc."""
+    return _put_parts(doc_id, "catalog", bytes(blob), {"catalog_stored": len(blob)})
+
+
+def get_catalog_blob(doc_id: Any) -> Optional[bytes]:
+    return _get_parts(doc_id, "catalog", "catalog_stored")[1] or None
+
+
+def get_content(doc_id: Any) -> Optional[str]:
+    """Fetch and decompress a document's raw content (``None`` if it has none).
+
+    Falls back to an inline ``content`` field on documents not migrated yet.
+    """
+    doc, data = _get_parts(doc_id, "content", "content_stored", "content_codec")
+    if doc is None:
+        return None
+    if data is None or not doc.get("content_codec"):
+        legacy = docs_col.find_one({"_id": doc_id}, {"content": 1}) or {}
+        return legacy.get("content")
+    _, decompress = _codec(doc["content_codec"])
+    return decompress(data).decode("utf-8", errors="ignore")
+
+
+def delete_content(doc_ids: Iterable[Any]):
+    """Remove every blob (content and catalog) of ``doc_ids``."""
+    blobs_col.delete_many({"doc_id": {"$in": list(doc_ids)}})
+
+
+def migrate_inline_content(batch_size: int = 100) -> Dict[str, int]:
+    """Move inline ``content`` strings and ``catalog`` blobs into ``blobs_col`` (idempotent).
+
+    Parts stored before blobs had a ``kind`` are labelled as content. Also
+    drops the legacy whole-spec chunk (``fragment == "spec"``) that duplicated
+    the content in ``chunks_col``; its vector was stored under a random id, so
+    it is left to the per-document filter delete.
+    """
+    blobs_col.update_many({"kind": {"$exists": False}}, {"$set": {"kind": "content"}})
+    moved = 0
+    while True:
+        batch: List[Dict[str, Any]] = list(docs_col.find({"content": {"$exists": True}}, {"content": 1}).limit(batch_size))
+        if not batch:
+            break
+        for doc in batch:
+            meta = put_content(doc["_id"], doc.get("content") or "")
+            docs_col.update_one({"_id": doc["_id"]}, {"$set": meta, "$unset": {"content": ""}})
+            moved += 1
+    catalogs = 0
+    while True:
+        batch = list(docs_col.find({"catalog": {"$ne": None, "$exists": True}}, {"catalog": 1}).limit(batch_size))
+        if not batch:
+            break
+        for doc in batch:
+            meta = put_catalog(doc["_id"], doc["catalog"])
+            docs_col.update_one({"_id": doc["_id"]}, {"$set": meta, "$unset": {"catalog": ""}})
+            catalogs += 1
+    dropped = chunks_col.delete_many({"fragment": "spec", "hash": {"$exists": False}}).deleted_count
+    return {"docs_moved": moved, "catalogs_moved": catalogs, "spec_chunks_dropped": dropped}
+
+
+if __name__ == "__main__":
+    print(migrate_inline_content())
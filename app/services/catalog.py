@@ -0,0 +1,191 @@
+from __future__ import annotations
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Set
+import json
+import math
+import threading
+import zlib
+from bson import Binary, ObjectId
+
+from ..config import settings
+from ..db import docs_col
+from .blobs import get_catalog_blob, get_content, put_catalog
+from .lexical import tokenize
+from .openapi_utils import chunk_openapi, load_openapi
+
+# question filler that says nothing about which operation is meant; ignored by :meth:`OperationCatalog.match`
+_FILLER = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "could", "do", "does", "for", "from", "how", "i",
+    "in", "into", "is", "it", "me", "my", "of", "on", "or", "please", "should", "show", "the", "this", "to",
+    "want", "we", "what", "when", "where", "which", "with", "would", "you", "your",
+    "api", "call", "code", "curl", "endpoint", "example", "javascript", "python", "request", "snippet",
+    "typescript", "use", "using",
+})
+
+def encode_catalog(data: Dict[str, Any]) -> Binary:
+    return Binary(zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 6))
+
+
+def decode_catalog(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(bytes(blob)).decode("utf-8"))
+
+
+class OperationCatalog:
+    """Parsed operations of one OpenAPI document with a token -> operation index.
+
+    Built once per document from the catalog recorded at ingest, so per-query
+    lookups touch only the operations that share tokens with the question.
+    """
+
+    def __init__(self, doc_id: str, data: Dict[str, Any]):
+        self.doc_id = doc_id
+        self.servers: List[str] = list(data.get("servers") or [])
+        self.operations: List[Dict[str, Any]] = list(data.get("operations") or [])
+        self.schemas: Dict[str, Any] = dict(data.get("schemas") or {})
+        self._by_key: Dict[tuple, int] = {}
+        self._by_operation_id: Dict[str, int] = {}
+        self._index: Dict[str, Set[int]] = defaultdict(set)
+        for i, op in enumerate(self.operations):
+            self._by_key[(op["method"], op["path"])] = i
+            if op.get("operation_id"):
+                self._by_operation_id[op["operation_id"]] = i
+            words = [op.get("operation_id") or "", op["method"], op["path"], op.get("summary") or "", op.get("description") or ""]
+            words += op.get("tags") or []
+            words += [p.get("name") or "" for p in op.get("parameters") or []]
+            for token in tokenize(" ".join(words)):
+                self._index[token].add(i)
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def get(self, method: str, path: str) -> Optional[Dict[str, Any]]:
+        i = self._by_key.get((method.upper(), path))
+        return self.operations[i] if i is not None else None
+
+    def by_operation_id(self, operation_id: str) -> Optional[Dict[str, Any]]:
+        i = self._by_operation_id.get(operation_id)
+        return self.operations[i] if i is not None else None
+
+    def match(self, question: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        """Operations ranked by idf-weighted token overlap with ``question``.
+
+        Each result carries ``score``, the matched ``terms`` and ``coverage``:
+        the share of the question's token weight that the operation matches.
+        Question words the catalog has never seen count as rare (the highest
+        idf) so one generic hit cannot make an off-topic question look covered;
+        filler words and bare numbers are ignored.
+        """
+        n = len(self.operations)
+        unseen = math.log(1 + n)
+        scores: Dict[int, float] = {}
+        terms: Dict[int, List[str]] = defaultdict(list)
+        total = 0.0
+        for token in set(tokenize(question)) - _FILLER:
+            if token.isdigit():
+                continue
+            hits = self._index.get(token)
+            if not hits:
+                total += unseen
+                continue
+            weight = math.log(1 + n / len(hits))
+            total += weight
+            for i in hits:
+                scores[i] = scores.get(i, 0.0) + weight
+                terms[i].append(token)
+        best = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]
+        return [
+            {**self.operations[i], "score": score, "terms": sorted(terms[i]), "coverage": score / total}
+            for i, score in best
+        ]
+
+    def schema(self, ref: str) -> Any:
+        return self.schemas.get(ref)
+
+
+class CatalogCache:
+    """LRU of :class:`OperationCatalog` objects keyed by document id."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, OperationCatalog]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, doc_id: str) -> Optional[OperationCatalog]:
+        with self._lock:
+            cat = self._entries.get(doc_id)
+            if cat is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(doc_id)
+                self.hits += 1
+            return cat
+
+    def put(self, catalog: OperationCatalog):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[catalog.doc_id] = catalog
+            self._entries.move_to_end(catalog.doc_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, doc_id: str):
+        with self._lock:
+            self._entries.pop(doc_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+catalog_cache = CatalogCache(settings.catalog_cache_size)
+
+
+def _load_catalog_data(doc_id: str) -> Optional[Dict[str, Any]]:
+    _id = ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
+    doc = docs_col.find_one({"_id": _id}, {"type": 1, "catalog_stored": 1, "catalog": 1})
+    if not doc or doc.get("type") != "openapi":
+        return None
+    if doc.get("catalog_stored"):
+        blob = get_catalog_blob(_id)
+        if blob is not None:
+            return decode_catalog(blob)
+    if doc.get("catalog") is not None:
+        # stored inline before catalogs moved to doc_blobs; migrate_inline_content moves these
+        return decode_catalog(doc["catalog"])
+    # documents ingested before catalogs were recorded: build once from the raw spec and backfill
+    content = get_content(_id) or ""
+    try:
+        spec = json.loads(content)
+    except Exception:
+        try:
+            spec = load_openapi(content)
+        except Exception:
+            return None
+    if not isinstance(spec, dict):
+        return None
+    data: Dict[str, Any] = {}
+    chunk_openapi(spec, max_depth=settings.openapi_ref_depth, catalog=data)
+    docs_col.update_one({"_id": _id}, {"$set": put_catalog(_id, encode_catalog(data))})
+    return data
+
+
+def get_catalog(doc_id: Any) -> Optional[OperationCatalog]:
+    """Return the operation catalog for a document, loading it on first use."""
+    if doc_id is None:
+        return None
+    key = str(doc_id)
+    cat = catalog_cache.get(key)
+    if cat is not None:
+        return cat
+    data = _load_catalog_data(key)
+    if data is None:
+        return None
+    cat = OperationCatalog(key, data)
+    catalog_cache.put(cat)
+    return cat
+
+
+__all__ = ["OperationCatalog", "CatalogCache", "catalog_cache", "get_catalog", "encode_catalog", "decode_catalog"]
@@ -0,0 +1,91 @@
+from __future__ import annotations
+from typing import Any, Dict
+import threading
+import httpx
+from ..config import settings
+
+try:
+    from openai import OpenAI  # type: ignore
+except Exception:  # pragma: no cover
+    OpenAI = None  # type: ignore
+
+try:
+    import google.generativeai as genai  # type: ignore
+except Exception:  # pragma: no cover
+    genai = None  # type: ignore
+
+# Long-lived provider clients shared by embeddings and LLM calls. They are
+# created lazily on first use and reused so requests keep warm keep-alive
+# connections instead of paying a TLS handshake each time.
+_lock = threading.Lock()
+_openai_client: Any = None
+_gemini_configured = False
+_gemini_models: Dict[str, Any] = {}
+
+
+def http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout)
+
+
+def get_openai_client():
+    global _openai_client
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                http_client = httpx.Client(
+                    timeout=http_timeout(),
+                    limits=httpx.Limits(
+                        max_connections=settings.http_max_connections,
+                        max_keepalive_connections=settings.http_max_keepalive,
+                        keepalive_expiry=settings.http_keepalive_expiry,
+                    ),
+                )
+                _openai_client = OpenAI(
+                    api_key=settings.openai_api_key,
+                    http_client=http_client,
+                    timeout=http_timeout(),
+                )
+    return _openai_client
+
+
+def _configure_gemini():
+    global _gemini_configured
+    if not _gemini_configured:
+        with _lock:
+            if not _gemini_configured:
+                genai.configure(api_key=settings.gemini_api_key)
+                _gemini_configured = True
+
+
+def get_gemini():
+    """Return the configured ``google.generativeai`` module."""
+    _configure_gemini()
+    return genai
+
+
+def get_gemini_model(name: str):
+    _configure_gemini()
+    model = _gemini_models.get(name)
+    if model is None:
+        with _lock:
+            model = _gemini_models.get(name)
+            if model is None:
+                model = genai.GenerativeModel(name)  # type: ignore
+                _gemini_models[name] = model
+    return model
+
+
+def gemini_request_options() -> Dict[str, Any]:
+    return {"timeout": settings.http_timeout}
+
+
+def close_clients():
+    """Release pooled connections; called on application shutdown."""
+    global _openai_client
+    with _lock:
+        if _openai_client is not None:
+            try:
+                _openai_client.close()
+            except Exception:
+                pass
+            _openai_client = None
@@ -0,0 +1,136 @@
+from __future__ import annotations
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List
+import hashlib
+import threading
+import numpy as np
+from bson import Binary
+from pymongo import UpdateOne
+
+from ..config import settings
+from ..db import embeddings_cache_col
+
+
+def cache_key(provider: str, model: str, text: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{provider}:{model}:{digest}"
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache: a bounded in-process LRU in front of a Mongo collection.
+
+    Keys are ``provider:model:sha256(text)`` so the same text embedded by a
+    different model never collides. All lookups and writes are batched.
+    Vectors are held as float32 arrays (a quarter of the memory of float
+    lists); :func:`cached_embed` converts to lists for its callers.
+    """
+
+    def __init__(self, max_entries: int, collection=None):
+        self.max_entries = max_entries
+        self.collection = collection
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, vec: np.ndarray):
+        if self.max_entries <= 0:
+            return
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        pending: List[str] = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vec = self._lru.get(key)
+                if vec is None:
+                    pending.append(key)
+                else:
+                    self._lru.move_to_end(key)
+                    found[key] = vec
+            self.memory_hits += len(found)
+        if pending and self.collection is not None:
+            try:
+                for d in self.collection.find({"_id": {"$in": pending}}, {"vector": 1}):
+                    found[d["_id"]] = np.frombuffer(bytes(d["vector"]), dtype=np.float32)
+            except Exception:
+                # the persistent tier is best-effort; treat failures as misses
+                pass
+        with self._lock:
+            persistent = [k for k in pending if k in found]
+            for key in persistent:
+                self._remember(key, found[key])
+            self.persistent_hits += len(persistent)
+            self.misses += len(pending) - len(persistent)
+        return found
+
+    def put_many(self, entries: Dict[str, List[float]]):
+        if not entries:
+            return
+        arrays = {key: np.asarray(vec, dtype=np.float32) for key, vec in entries.items()}
+        with self._lock:
+            for key, arr in arrays.items():
+                self._remember(key, arr)
+        if self.collection is None:
+            return
+        now = datetime.now(timezone.utc)
+        ops = [
+            UpdateOne(
+                {"_id": key},
+                {"$setOnInsert": {"vector": Binary(arr.tobytes()), "created_at": now}},
+                upsert=True,
+            )
+            for key, arr in arrays.items()
+        ]
+        try:
+            self.collection.bulk_write(ops, ordered=False)
+        except Exception:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.memory_hits + self.persistent_hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": ((self.memory_hits + self.persistent_hits) / lookups) if lookups else 0.0,
+            }
+
+
+embedding_cache = EmbeddingCache(
+    max_entries=settings.embedding_cache_size,
+    collection=embeddings_cache_col if settings.embedding_cache_persist else None,
+)
+
+
+def cached_embed(provider: str, model: str, texts: List[str], embed_fn) -> List[List[float]]:
+    """Embed ``texts`` through the cache; only misses are sent to ``embed_fn``."""
+    if not texts:
+        return []
+    keys = [cache_key(provider, model, t) for t in texts]
+    found: Dict[str, List[float]] = {k: v.tolist() for k, v in embedding_cache.get_many(keys).items()}
+    missing: Dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in found:
+            missing.setdefault(key, text)
+    if missing:
+        vectors = embed_fn(list(missing.values()))
+        fresh = dict(zip(missing.keys(), vectors))
+        embedding_cache.put_many(fresh)
+        found.update(fresh)
+    return [found[k] for k in keys]
+
+
+__all__ = ["EmbeddingCache", "embedding_cache", "cache_key", "cached_embed"]
@@ -1,17 +1,14 @@
 from __future__ import annotations
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Tuple
+import random
+import threading
+import time
 import numpy as np
 from ..config import settings
-
-try:
-    from openai import OpenAI  # type: ignore
-except Exception:  # pragma: no cover
-    OpenAI = None  # type: ignore
-
-try:
-    import google.generativeai as genai  # type: ignore
-except Exception:  # pragma: no cover
-    genai = None  # type: ignore
+from .embedding_cache import cached_embed
+from .local_embeddings import local_embed
+from .clients import OpenAI, genai, get_openai_client, get_gemini, gemini_request_options
 
 _rng = np.random.default_rng(12345)
 
@@ -20,50 +17,121 @@ def _fake(texts: List[str]) -> List[List[float]]:
     return [(_rng.random(384) - 0.5).tolist() for _ in texts]
 
 
+class EmbeddingError(RuntimeError):
+    """Raised when a provider batch keeps failing after all retries."""
+
+
+# Per-provider request limits: items per request and an estimated token budget per request.
+_BATCH_LIMITS = {
+    "openai": {"max_items": 256, "max_tokens": 100_000},
+    "gemini": {"max_items": 100, "max_tokens": 20_000},
+}
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.embedding_max_workers), thread_name_prefix="embed"
+                )
+    return _executor
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for request sizing
+    return len(text) // 4 + 1
+
+
+def _split_batches(texts: List[str], max_items: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """Split ``texts`` into contiguous [start, end) ranges within the item and token limits."""
+    ranges: List[Tuple[int, int]] = []
+    start, tokens = 0, 0
+    for i, t in enumerate(texts):
+        cost = _estimate_tokens(t)
+        if i > start and (i - start >= max_items or tokens + cost > max_tokens):
+            ranges.append((start, i))
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(texts):
+        ranges.append((start, len(texts)))
+    return ranges
+
+
+def _with_retries(fn: Callable[[List[str]], List[List[float]]], batch: List[str]) -> List[List[float]]:
+    attempts = max(1, settings.embedding_max_retries + 1)
+    for attempt in range(attempts):
+        try:
+            out = fn(batch)
+            if len(out) != len(batch):
+                raise EmbeddingError(f"provider returned {len(out)} vectors for {len(batch)} inputs")
+            return out
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise EmbeddingError(f"embedding batch of {len(batch)} failed: {e}") from e
+            time.sleep(settings.embedding_retry_backoff * (2 ** attempt) * (1 + random.random()))
+    raise EmbeddingError("unreachable")  # pragma: no cover
+
+
+def _run_batched(provider: str, texts: List[str], fn: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+    """Embed ``texts`` in provider-sized batches on a bounded pool, preserving input order."""
+    limits = _BATCH_LIMITS[provider]
+    ranges = _split_batches(texts, limits["max_items"], limits["max_tokens"])
+    if len(ranges) <= 1:
+        return _with_retries(fn, texts) if texts else []
+    out: List[List[float]] = [[] for _ in texts]
+    futures = {_get_executor().submit(_with_retries, fn, texts[a:b]): a for a, b in ranges}
+    for fut in as_completed(futures):
+        a = futures[fut]
+        for offset, vec in enumerate(fut.result()):
+            out[a + offset] = vec
+    return out
+
+
+def _fit_dim(vec: List[float], dim: int = 384) -> List[float]:
+    # if dim != 384, project/truncate to 384 to match index
+    if len(vec) == dim:
+        return vec
+    if len(vec) > dim:
+        return vec[:dim]
+    # pad with zeros
+    return vec + [0.0] * (dim - len(vec))
+
+
 def _openai(texts: List[str]) -> List[List[float]]:
-    if not settings.openai_api_key or OpenAI is None:
-        return _fake(texts)
-    client = OpenAI(api_key=settings.openai_api_key)
-    resp = client.embeddings.create(model="text-embedding-3-small", input=texts)
-    return [d.embedding for d in resp.data]
+    """One embeddings request for a single batch."""
+    resp = get_openai_client().embeddings.create(model="text-embedding-3-small", input=texts)
+    return [d.embedding for d in sorted(resp.data, key=lambda d: d.index)]
 
 
 def _gemini(texts: List[str]) -> List[List[float]]:
-    if not settings.gemini_api_key or genai is None:
-        return _fake(texts)
-    genai.configure(api_key=settings.gemini_api_key)
+    """One embeddings request for a single batch."""
     # Gemini embedding models: 'text-embedding-004' returns 768-d vectors
-    model = genai.GenerativeModel("text-embedding-004")  # type: ignore
-    out: List[List[float]] = []
-    # batch one by one for simplicity
-    for t in texts:
-        try:
-            r = genai.embed_content(model="text-embedding-004", content=t)  # type: ignore
-            vec = r.get("embedding") if isinstance(r, dict) else getattr(r, "embedding", None)
-            if vec is None:
-                out.append(_rng.random(768).tolist())
-            else:
-                out.append(vec)
-        except Exception:
-            out.append(_rng.random(768).tolist())
-    # if dim != 384, project/truncate to 384 to match index
-    projected: List[List[float]] = []
-    for v in out:
-        if len(v) == 384:
-            projected.append(v)
-        elif len(v) > 384:
-            projected.append(v[:384])
-        else:
-            # pad with zeros
-            projected.append(v + [0.0] * (384 - len(v)))
-    return projected
+    r = get_gemini().embed_content(  # type: ignore
+        model="models/text-embedding-004", content=texts, request_options=gemini_request_options()
+    )
+    vecs = r.get("embedding") if isinstance(r, dict) else getattr(r, "embedding", None)
+    if not vecs:
+        raise EmbeddingError("gemini returned no embeddings")
+    return [_fit_dim(list(v)) for v in vecs]
 
 
 def embed_texts(texts: List[str]) -> List[List[float]]:
     if settings.use_fake_embeddings:
         return _fake(texts)
     provider = (settings.embeddings_provider or "").lower()
+    if provider == "local":
+        # cheaper than a cache lookup, so no cache and no batching
+        return local_embed(texts)
     if provider == "gemini":
-        return _gemini(texts)
-    # default to openai
-    return _openai(texts)
+        if not settings.gemini_api_key or genai is None:
+            return local_embed(texts)
+        return cached_embed("gemini", "text-embedding-004", texts, lambda miss: _run_batched("gemini", miss, _gemini))
+    # default to openai; without a key fall back to the local provider
+    if not settings.openai_api_key or OpenAI is None:
+        return local_embed(texts)
+    return cached_embed("openai", "text-embedding-3-small", texts, lambda miss: _run_batched("openai", miss, _openai))
@@ -0,0 +1,270 @@
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+import asyncio
+import multiprocessing
+import threading
+import time
+from bson import ObjectId
+
+from ..config import settings
+from ..db import docs_col, chunks_col
+from ..utils.concurrency import run_blocking
+from ..utils.metrics import detach_request, observe_stage, span
+from .blobs import put_catalog, put_content
+from .catalog import OperationCatalog, catalog_cache, encode_catalog
+from .openapi_utils import parse_upload
+from .qa import index_doc, persist_index, remove_chunks_from_index
+
+_process_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        with _pool_lock:
+            if _process_pool is None:
+                # spawn keeps Mongo client threads out of the workers; they only import openapi_utils
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=max(1, settings.ingest_parse_workers),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _process_pool
+
+
+def shutdown_process_pool():
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+async def parse_async(name: str, raw: bytes) -> Dict[str, Any]:
+    """Parse and chunk an upload; large files go to the process pool, small ones stay in-thread."""
+    if settings.ingest_parse_workers > 0 and len(raw) >= settings.ingest_process_pool_min_bytes:
+        loop = asyncio.get_running_loop()
+        parsed = await loop.run_in_executor(
+            _get_process_pool(), parse_upload, name, raw, settings.openapi_ref_depth, settings.ingest_stream_min_bytes
+        )
+    else:
+        parsed = await run_blocking(parse_upload, name, raw, settings.openapi_ref_depth, settings.ingest_stream_min_bytes)
+    for stage, seconds in parsed.get("timings", {}).items():
+        observe_stage(f"ingest_{stage}", seconds)
+    return parsed
+
+
+def store_and_index(parsed: Dict[str, Any], raw: bytes, progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+    """Insert a new doc, or diff an existing doc of the same name chunk by chunk.
+
+    ``parsed`` is :func:`parse_upload`'s result for the upload bytes ``raw``,
+    which are stored as the document's content.
+
+    Only chunks whose hash is new get embedded; chunks that disappeared are
+    removed from ``chunks_col`` and the vector store. ``progress`` is called
+    with the number of chunks indexed after each embedding batch.
+
+    ``content_hash`` and the catalog are recorded only once every batch is
+    indexed, so an upload that fails midway is diffed again on retry instead
+    of being reported as unchanged.
+    """
+    name, doc_type, digest = parsed["name"], parsed["type"], parsed["content_hash"]
+    new_chunks = {ch["hash"]: ch for ch in parsed["chunks"]}
+    existing = docs_col.find_one({"name": name, "type": doc_type}, {"content_hash": 1})
+    if existing and existing.get("content_hash") == digest:
+        unchanged = chunks_col.count_documents({"doc_id": existing["_id"]})
+        return {"doc_id": str(existing["_id"]), "added": 0, "unchanged": unchanged, "removed": 0}
+
+    catalog = parsed.get("catalog")
+    with span("ingest_store"):
+        if existing:
+            _id = existing["_id"]
+            meta = put_content(_id, raw)
+            docs_col.update_one(
+                {"_id": _id},
+                {"$set": {**meta, "content_hash": None}, "$unset": {"content": ""}},
+            )
+            old = {
+                c.get("hash") or f"legacy:{c['_id']}": c
+                for c in chunks_col.find({"doc_id": _id}, {"hash": 1, "vector_id": 1})
+            }
+        else:
+            # body first, so a visible doc always has its content
+            _id = ObjectId()
+            meta = put_content(_id, raw)
+            doc = {"_id": _id, "name": name, "type": doc_type, "content_hash": None, **meta}
+            docs_col.insert_one(doc)
+            old = {}
+
+    removed = [c for h, c in old.items() if h not in new_chunks]
+    added = []
+    for h, ch in new_chunks.items():
+        if h not in old:
+            chunk_id = ObjectId()
+            # record the vector id up front so the chunk is always deletable by id
+            added.append({"_id": chunk_id, "doc_id": _id, "vector_id": str(chunk_id), **ch})
+    batch = max(1, settings.ingest_index_batch)
+    try:
+        if removed:
+            chunks_col.delete_many({"_id": {"$in": [c["_id"] for c in removed]}})
+            remove_chunks_from_index(str(_id), [c["vector_id"] for c in removed if c.get("vector_id")])
+        for start in range(0, len(added), batch):
+            part = added[start : start + batch]
+            index_doc({"_id": _id}, part, insert=True)
+            if progress:
+                progress(len(part))
+    finally:
+        # one snapshot per file, including the batches indexed before a failure
+        persist_index()
+    done: Dict[str, Any] = {"content_hash": digest}
+    if catalog is not None:
+        # out of line like the content: a large spec's catalog can outgrow a Mongo document
+        done.update(put_catalog(_id, encode_catalog(catalog)))
+    docs_col.update_one({"_id": _id}, {"$set": done, "$unset": {"catalog": ""}})
+    if catalog is not None:
+        catalog_cache.put(OperationCatalog(str(_id), catalog))
+    return {
+        "doc_id": str(_id),
+        "added": len(added),
+        "unchanged": len(new_chunks) - len(added),
+        "removed": len(removed),
+    }
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class IngestJob:
+    """Progress of one background ingest: per-file status, counts, timings and errors."""
+
+    def __init__(self, uploads: List[Tuple[str, int]]):
+        self.id = uuid4().hex
+        self.status = "queued"
+        self.created_at = _now()
+        self.finished_at: Optional[str] = None
+        self._started = time.perf_counter()
+        self._elapsed: Optional[float] = None
+        self.files: List[Dict[str, Any]] = [
+            {
+                "name": n,
+                "bytes": size,
+                "status": "queued",
+                "doc_id": None,
+                "chunks_total": 0,
+                "chunks_indexed": 0,
+                "added": 0,
+                "unchanged": 0,
+                "removed": 0,
+                "parse_ms": None,
+                "index_ms": None,
+                "error": None,
+            }
+            for n, size in uploads
+        ]
+        self._lock = threading.Lock()
+
+    def update(self, index: int, **fields: Any):
+        with self._lock:
+            self.files[index].update(fields)
+
+    def add_indexed(self, index: int, n: int):
+        with self._lock:
+            self.files[index]["chunks_indexed"] += n
+
+    def finish(self):
+        with self._lock:
+            self._elapsed = time.perf_counter() - self._started
+            self.finished_at = _now()
+            failed = sum(1 for f in self.files if f["status"] == "error")
+            self.status = "failed" if failed == len(self.files) else ("partial" if failed else "done")
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._started
+            indexed = sum(f["chunks_indexed"] for f in self.files)
+            return {
+                "id": self.id,
+                "status": self.status,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "elapsed_s": round(elapsed, 3),
+                "files_total": len(self.files),
+                "files_done": sum(1 for f in self.files if f["status"] in ("done", "error")),
+                "chunks_indexed": indexed,
+                "chunks_per_s": round(indexed / elapsed, 2) if elapsed > 0 else 0.0,
+                "files": [dict(f) for f in self.files],
+            }
+
+
+class IngestJobManager:
+    """Runs ingest jobs in the background and keeps the most recent ones for polling.
+
+    Parsing is CPU-bound and goes to a process pool; storing and embedding
+    go to the I/O executor, limited to ``INGEST_MAX_CONCURRENT_FILES`` files
+    at a time. A file moves to the I/O stage as soon as it is parsed, so the
+    two stages overlap across files.
+
+    Past ``max_jobs`` the oldest finished jobs are forgotten; running jobs are
+    never evicted, so the map can briefly hold more.
+    """
+
+    def __init__(self, max_jobs: int = 200):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def submit(self, uploads: List[Tuple[str, bytes]]) -> IngestJob:
+        job = IngestJob([(name, len(raw)) for name, raw in uploads])
+        self._jobs[job.id] = job
+        # forget the oldest finished jobs; running ones stay pollable even past max_jobs
+        excess = len(self._jobs) - self.max_jobs
+        if excess > 0:
+            for old_id in [jid for jid, j in self._jobs.items() if j.finished_at is not None][:excess]:
+                del self._jobs[old_id]
+        task = asyncio.get_running_loop().create_task(self._run(job, uploads))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _t, jid=job.id: self._tasks.pop(jid, None))
+        return job
+
+    async def _run(self, job: IngestJob, uploads: List[Tuple[str, bytes]]):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, settings.ingest_max_concurrent_files))
+        # the job outlives the request that submitted it
+        detach_request()
+        job.status = "running"
+        await asyncio.gather(*(self._run_file(job, i, name, raw) for i, (name, raw) in enumerate(uploads)))
+        job.finish()
+
+    async def _run_file(self, job: IngestJob, index: int, name: str, raw: bytes):
+        try:
+            job.update(index, status="parsing")
+            t0 = time.perf_counter()
+            parsed = await parse_async(name, raw)
+            job.update(index, status="waiting", chunks_total=len(parsed["chunks"]), parse_ms=round((time.perf_counter() - t0) * 1000, 1))
+            async with self._semaphore:
+                job.update(index, status="indexing")
+                t1 = time.perf_counter()
+                result = await run_blocking(store_and_index, parsed, raw, lambda n: job.add_indexed(index, n))
+            job.update(
+                index,
+                status="done",
+                doc_id=result["doc_id"],
+                added=result["added"],
+                unchanged=result["unchanged"],
+                removed=result["removed"],
+                index_ms=round((time.perf_counter() - t1) * 1000, 1),
+            )
+        except Exception as e:
+            job.update(index, status="error", error=str(e))
+
+
+ingest_jobs = IngestJobManager()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Set, Tuple
+import heapq
+import math
+import re
+import threading
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+[0-9]*|[A-Z]+[0-9]*|[0-9]+")
+
+
+@lru_cache(maxsize=1 << 16)
+def _word_tokens(word: str) -> Tuple[str, ...]:
+    low = word.lower()
+    parts = _CAMEL.findall(word)
+    return (low, *(p.lower() for p in parts)) if len(parts) > 1 else (low,)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; camelCase and snake_case identifiers also yield their parts.
+
+    ``createInvoice`` gives ``createinvoice``, ``create`` and ``invoice`` so exact
+    operationIds and natural-language questions both match.
+    """
+    out: List[str] = []
+    for word in _WORD.findall(text):
+        out.extend(_word_tokens(word))
+    return out
+
+
+class BM25Index:
+    """Incremental in-process inverted index with Okapi BM25 scoring.
+
+    Entries are keyed by vector id so they line up with the vector store and
+    can be pruned with the same ids; ``doc_id`` in the metadata allows
+    removing a whole document.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_df_ratio: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        # terms in more than this share of entries carry almost no BM25 weight; skipping
+        # them keeps lookups proportional to the selective terms' posting lists
+        self.max_df_ratio = max_df_ratio
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._terms: Dict[str, List[str]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._doc_keys: Dict[str, Set[str]] = defaultdict(set)
+        self._total_len = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, key: str, text: str, meta: Dict[str, Any]):
+        tokens = tokenize(text)
+        tf: Dict[str, int] = {}
+        for t in tokens:
+            tf[t] = tf.get(t, 0) + 1
+        with self._lock:
+            if key in self._lengths:
+                self._remove(key)
+            for term, n in tf.items():
+                self._postings[term][key] = n
+            self._terms[key] = list(tf)
+            self._lengths[key] = len(tokens)
+            self._meta[key] = meta
+            self._doc_keys[meta.get("doc_id")].add(key)
+            self._total_len += len(tokens)
+
+    def _remove(self, key: str):
+        for term in self._terms.pop(key, ()):
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(key, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_len -= self._lengths.pop(key, 0)
+        meta = self._meta.pop(key, None) or {}
+        keys = self._doc_keys.get(meta.get("doc_id"))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._doc_keys[meta.get("doc_id")]
+
+    def remove_ids(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                if key in self._lengths:
+                    self._remove(key)
+
+    def remove_doc(self, doc_id: str):
+        with self._lock:
+            for key in list(self._doc_keys.get(doc_id, ())):
+                self._remove(key)
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._lengths)
+            if not n or not terms:
+                return []
+            avg_len = self._total_len / n or 1.0
+            postings = [self._postings[t] for t in terms if t in self._postings]
+            selective = [p for p in postings if len(p) <= self.max_df_ratio * n]
+            if selective:
+                postings = selective
+            scores: Dict[str, float] = {}
+            for posting in postings:
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for key, tf in posting.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[key] / avg_len)
+                    scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / norm
+            best = heapq.nlargest(top_k, scores.items(), key=lambda kv: kv[1])
+            return [{"id": key, "score": score, "metadata": self._meta[key]} for key, score in best]
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict[str, Any]]], k: int = 60, top_k: int = 5) -> List[Dict[str, Any]]:
+    """Merge ranked ``{"id", "score", "metadata"}`` lists by summing ``1 / (k + rank)``."""
+    fused: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, m in enumerate(results, start=1):
+            entry = fused.get(m["id"])
+            if entry is None:
+                entry = fused[m["id"]] = {"id": m["id"], "score": 0.0, "metadata": m["metadata"]}
+            entry["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda m: m["score"], reverse=True)[:top_k]
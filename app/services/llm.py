@@ -1,16 +1,8 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Iterator, Optional
+import re
 from ..config import settings
-
-try:
-    from openai import OpenAI  # type: ignore
-except Exception:  # pragma: no cover
-    OpenAI = None  # type: ignore
-
-try:
-    import google.generativeai as genai  # type: ignore
-except Exception:  # pragma: no cover
-    genai = None  # type: ignore
+from .clients import OpenAI, genai, get_openai_client, get_gemini_model, gemini_request_options
 
 
 def generate_text(prompt: str, system: Optional[str] = None, max_tokens: int = 800) -> str:
@@ -22,18 +14,17 @@ def generate_text(prompt: str, system: Optional[str] = None, max_tokens: int = 8
     provider = (settings.embeddings_provider or "").lower()
 
     if provider == "gemini" and settings.gemini_api_key and genai is not None:
-        genai.configure(api_key=settings.gemini_api_key)
-        model = genai.GenerativeModel("gemini-1.5-flash")  # type: ignore
+        model = get_gemini_model("gemini-1.5-flash")
         parts = []
         if system:
             parts.append({"text": system})
         parts.append({"text": prompt})
-        resp = model.generate_content(parts)  # type: ignore
+        resp = model.generate_content(parts, request_options=gemini_request_options())  # type: ignore
         return resp.text or ""
 
     # default to OpenAI
     if settings.openai_api_key and OpenAI is not None:
-        client = OpenAI(api_key=settings.openai_api_key)
+        client = get_openai_client()
         messages = []
         if system:
             messages.append({"role": "system", "content": system})
@@ -48,3 +39,41 @@ def generate_text(prompt: str, system: Optional[str] = None, max_tokens: int = 8
 
     # ultimate fallback
     return "{\n\"snippets\": [\n{\"language\": \"curl\", \"code\": \"curl -X GET https://api.example.com/ping\"},\n{\"language\": \"python\", \"code\": \"import requests\\nprint(requests.get('https://api.example.com/ping').status_code)\"}\n]\n}"
+
+
+def generate_text_stream(prompt: str, system: Optional[str] = None, max_tokens: int = 800) -> Iterator[str]:
+    """Like :func:`generate_text` but yields text pieces as the provider produces them."""
+    provider = (settings.embeddings_provider or "").lower()
+    offline = getattr(settings, "use_fake_embeddings", False) and not settings.openai_api_key and not settings.gemini_api_key
+
+    if not offline and provider == "gemini" and settings.gemini_api_key and genai is not None:
+        model = get_gemini_model("gemini-1.5-flash")
+        parts = []
+        if system:
+            parts.append({"text": system})
+        parts.append({"text": prompt})
+        for chunk in model.generate_content(parts, stream=True, request_options=gemini_request_options()):  # type: ignore
+            if getattr(chunk, "text", None):
+                yield chunk.text
+        return
+
+    if not offline and settings.openai_api_key and OpenAI is not None:
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        stream = get_openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0.2,
+            stream=True,
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        return
+
+    # offline fallbacks have no stream; split the canned text so clients see the same event shape
+    for piece in re.findall(r"\S+\s*|\s+", generate_text(prompt, system=system, max_tokens=max_tokens)):
+        yield piece
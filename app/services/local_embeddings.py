@@ -0,0 +1,115 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import hashlib
+import math
+import numpy as np
+
+from .lexical import tokenize
+
+# must match the vector index dimension
+DIM = 384
+# relative weight of a word's character trigrams and of word bigrams, next to the word itself (1.0)
+CHAR_WEIGHT = 0.5
+BIGRAM_WEIGHT = 0.5
+
+# Fixed inverse-document-frequency prior. A corpus-fitted IDF would change every
+# stored vector as the corpus grows (chunk embeddings are persisted and reused on
+# restart), so very common English and API-boilerplate words are down-weighted
+# with a static table instead; every other term keeps weight 1.
+_COMMON = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i", "if",
+    "in", "into", "is", "it", "its", "me", "my", "of", "on", "or", "show", "that", "the", "this", "to", "use",
+    "using", "via", "what", "when", "which", "with", "you", "your", "example", "endpoint", "api",
+}
+_BOILERPLATE = {
+    "type", "string", "object", "integer", "number", "boolean", "array", "description", "properties",
+    "schema", "schemas", "required", "format", "items", "content", "application", "json", "responses",
+    "response", "request", "parameters", "components", "ref", "summary", "ok", "default",
+}
+_COMMON_IDF = 0.1
+_BOILERPLATE_IDF = 0.3
+_NUMBER_IDF = 0.3
+
+
+def _idf(token: str) -> float:
+    if token in _COMMON:
+        return _COMMON_IDF
+    if token in _BOILERPLATE:
+        return _BOILERPLATE_IDF
+    if token.isdigit():
+        return _NUMBER_IDF
+    return 1.0
+
+
+def _bucket(feature: str) -> Tuple[int, float]:
+    """Stable (process-independent) hash of a feature to a dimension and a ±1 sign."""
+    h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return h % DIM, 1.0 if (h >> 63) & 1 else -1.0
+
+
+@lru_cache(maxsize=1 << 18)
+def _features(term: str) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+    """Signed dims and IDF-scaled weights of a term.
+
+    A word maps to itself plus its character trigrams; ``"first second"`` is a
+    word bigram.
+    """
+    if " " in term:
+        first, second = term.split(" ")
+        dim, sign = _bucket("b:" + term)
+        return (dim,), (sign * BIGRAM_WEIGHT * min(_idf(first), _idf(second)),)
+    idf = _idf(term)
+    dim, sign = _bucket("w:" + term)
+    dims, weights = [dim], [sign * idf]
+    if len(term) >= 4 and not term.isdigit():
+        padded = f"<{term}>"
+        grams = [padded[i : i + 3] for i in range(len(padded) - 2)]
+        scale = CHAR_WEIGHT * idf / math.sqrt(len(grams))
+        for gram in grams:
+            dim, sign = _bucket("c:" + gram)
+            dims.append(dim)
+            weights.append(sign * scale)
+    return tuple(dims), tuple(weights)
+
+
+def local_embed(texts: List[str]) -> List[List[float]]:
+    """Hashed TF-IDF embeddings: deterministic, CPU-only, no network.
+
+    Words (including camelCase/snake_case parts), word bigrams and character
+    trigrams are hashed with a sign bit into ``DIM`` buckets, weighted by
+    sublinear term frequency times IDF, and L2-normalized. Only tokenizing is
+    per text; counting and feature expansion run over the whole batch in NumPy.
+    """
+    if not texts:
+        return []
+    vocab: Dict[str, int] = {}
+    term_ids: List[int] = []
+    row_lengths: List[int] = []
+    for text in texts:
+        tokens = tokenize(text)
+        terms = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        term_ids.extend([vocab.setdefault(t, len(vocab)) for t in terms])
+        row_lengths.append(len(terms))
+    n_terms = len(vocab)
+    rows = np.repeat(np.arange(len(texts), dtype=np.int64), row_lengths)
+    # term frequency per (row, term)
+    keys, counts = np.unique(rows * n_terms + np.asarray(term_ids, dtype=np.int64), return_counts=True)
+    entry_rows, entry_terms = np.divmod(keys, n_terms) if n_terms else (keys, keys)
+    entry_tf = 1.0 + np.log(counts)
+    # CSR table of each vocabulary term's hashed features
+    features = [_features(t) for t in vocab]
+    feature_counts = np.fromiter((len(d) for d, _ in features), dtype=np.int64, count=n_terms)
+    feature_dims = np.fromiter((d for dims, _ in features for d in dims), dtype=np.int64)
+    feature_weights = np.fromiter((w for _, weights in features for w in weights), dtype=np.float64)
+    starts = np.concatenate(([0], np.cumsum(feature_counts)[:-1]))
+    # expand every (row, term) entry into its features
+    per_entry = feature_counts[entry_terms]
+    offsets = np.arange(per_entry.sum()) - np.repeat(np.cumsum(per_entry) - per_entry, per_entry)
+    index = np.repeat(starts[entry_terms], per_entry) + offsets
+    flat = np.repeat(entry_rows, per_entry) * DIM + feature_dims[index]
+    values = feature_weights[index] * np.repeat(entry_tf, per_entry)
+    matrix = np.bincount(flat, weights=values, minlength=len(texts) * DIM).reshape(len(texts), DIM).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).tolist()
@@ -1,6 +1,10 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import time
 import yaml
+from ..utils.jsonstream import split_object
 
 
 def load_openapi(content: str) -> Dict[str, Any]:
@@ -11,37 +15,328 @@ def find_paths_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
     return spec.get("paths", {})
 
 
-def generate_snippets_from_openapi(
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+
+def resolve_ref(spec: Dict[str, Any], ref: str) -> Any:
+    """Look up a local ``#/a/b`` JSON pointer; returns ``None`` for external refs."""
+    if not ref.startswith("#/"):
+        return None
+    node: Any = spec
+    for part in ref[2:].split("/"):
+        part = part.replace("~1", "/").replace("~0", "~")
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+def inline_refs(node: Any, spec: Dict[str, Any], max_depth: int = 3, _depth: int = 0, _seen: Tuple[str, ...] = ()) -> Any:
+    """Return ``node`` with local ``$ref``s replaced by their targets.
+
+    Refs nested deeper than ``max_depth`` or forming a cycle are left as
+    ``{"$ref": ...}`` so huge or recursive schemas stay bounded.
+    """
+    if isinstance(node, list):
+        return [inline_refs(v, spec, max_depth, _depth, _seen) for v in node]
+    if not isinstance(node, dict):
+        return node
+    ref = node.get("$ref")
+    if isinstance(ref, str):
+        target = resolve_ref(spec, ref)
+        if target is None or _depth >= max_depth or ref in _seen:
+            return {"$ref": ref}
+        return inline_refs(target, spec, max_depth, _depth + 1, _seen + (ref,))
+    return {k: inline_refs(v, spec, max_depth, _depth, _seen) for k, v in node.items()}
+
+
+def iter_operations(
+    spec: Dict[str, Any], paths: Optional[Iterable[Tuple[str, Any]]] = None
+) -> Iterator[Tuple[str, str, Dict[str, Any], Dict[str, Any]]]:
+    """Yield ``(path, method, operation, path_item)`` for every HTTP operation.
+
+    ``paths`` overrides ``spec["paths"]`` with a (possibly lazy) iterable of
+    ``(path, path_item)`` pairs, as produced by the streaming parser.
+    """
+    if paths is None:
+        paths = (find_paths_spec(spec) or {}).items()
+    for path, item in paths:
+        if not isinstance(item, dict):
+            continue
+        for method in HTTP_METHODS:
+            op = item.get(method)
+            if isinstance(op, dict):
+                yield path, method, op, item
+
+
+def schema_summary(schema: Any, depth: int = 0, max_depth: int = 4) -> str:
+    """Render an (inlined) JSON schema as a compact one-line type sketch."""
+    if not isinstance(schema, dict):
+        return "any"
+    if "$ref" in schema:
+        return str(schema["$ref"]).rsplit("/", 1)[-1]
+    for combo in ("oneOf", "anyOf", "allOf"):
+        if isinstance(schema.get(combo), list):
+            sep = " & " if combo == "allOf" else " | "
+            return sep.join(schema_summary(s, depth + 1, max_depth) for s in schema[combo])
+    if "enum" in schema and isinstance(schema["enum"], list):
+        return "enum(" + ", ".join(str(v) for v in schema["enum"][:8]) + ")"
+    typ = schema.get("type")
+    if typ == "array" or "items" in schema:
+        return "[" + schema_summary(schema.get("items"), depth + 1, max_depth) + "]"
+    props = schema.get("properties")
+    if typ == "object" or isinstance(props, dict):
+        if not isinstance(props, dict) or not props:
+            return "object"
+        if depth >= max_depth:
+            return "{...}"
+        required = set(schema.get("required") or [])
+        fields = [
+            f"{name}{'*' if name in required else ''}: {schema_summary(sub, depth + 1, max_depth)}"
+            for name, sub in props.items()
+        ]
+        return "{" + ", ".join(fields) + "}"
+    if typ:
+        fmt = schema.get("format")
+        return f"{typ}({fmt})" if fmt else str(typ)
+    return "any"
+
+
+def _json_schema(content: Any) -> Tuple[str, Any]:
+    """Pick the JSON-ish media type (or the first one) from a ``content`` map."""
+    if not isinstance(content, dict) or not content:
+        return "", None
+    for media, body in content.items():
+        if "json" in media:
+            return media, (body or {}).get("schema")
+    media, body = next(iter(content.items()))
+    return media, (body or {}).get("schema")
+
+
+def operation_parameters(op: Dict[str, Any], path_item: Dict[str, Any], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Path-level parameters merged with operation parameters (operation wins), refs resolved."""
+    merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for raw in list(path_item.get("parameters") or []) + list(op.get("parameters") or []):
+        param = inline_refs(raw, spec, max_depth=1)
+        if isinstance(param, dict) and "name" in param:
+            merged[(param.get("name"), param.get("in"))] = param
+    return list(merged.values())
+
+
+def _collect_refs(node: Any, out: set):
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if isinstance(ref, str):
+            out.add(ref)
+        for v in node.values():
+            _collect_refs(v, out)
+    elif isinstance(node, list):
+        for v in node:
+            _collect_refs(v, out)
+
+
+def referenced_refs(node: Any, spec: Dict[str, Any], memo: Optional[Dict[str, frozenset]] = None) -> List[str]:
+    """All local ``$ref`` targets reachable from ``node``, following refs transitively."""
+    memo = {} if memo is None else memo
+    direct: set = set()
+    _collect_refs(node, direct)
+    seen: set = set()
+    stack = list(direct)
+    while stack:
+        ref = stack.pop()
+        if ref in seen:
+            continue
+        seen.add(ref)
+        children = memo.get(ref)
+        if children is None:
+            found: set = set()
+            _collect_refs(resolve_ref(spec, ref), found)
+            children = memo[ref] = frozenset(found)
+        stack.extend(children - seen)
+    return sorted(r for r in seen if resolve_ref(spec, r) is not None)
+
+
+def operation_record(
+    path: str, method: str, op: Dict[str, Any], path_item: Dict[str, Any], spec: Dict[str, Any], max_depth: int = 3
+) -> Dict[str, Any]:
+    """Structured view of one operation with parameters and schemas resolved to ``max_depth``."""
+    params = [
+        {
+            "name": p.get("name"),
+            "in": p.get("in"),
+            "required": bool(p.get("required")),
+            "description": str(p.get("description") or "").strip()[:160],
+            "schema": inline_refs(p.get("schema"), spec, max_depth),
+        }
+        for p in operation_parameters(op, path_item, spec)
+    ]
+    request_body = None
+    body = inline_refs(op.get("requestBody"), spec, max_depth=1)
+    if isinstance(body, dict):
+        media, schema = _json_schema(body.get("content"))
+        if media:
+            request_body = {"media": media, "required": bool(body.get("required")), "schema": inline_refs(schema, spec, max_depth)}
+    responses = []
+    for code, resp in (op.get("responses") or {}).items() if isinstance(op.get("responses"), dict) else ():
+        resp = inline_refs(resp, spec, max_depth=1)
+        if not isinstance(resp, dict):
+            continue
+        media, schema = _json_schema(resp.get("content"))
+        responses.append(
+            {
+                "code": str(code),
+                "description": str(resp.get("description") or "").strip()[:160],
+                "media": media,
+                "schema": inline_refs(schema, spec, max_depth) if schema is not None else None,
+            }
+        )
+    return {
+        "operation_id": op.get("operationId"),
+        "method": method.upper(),
+        "path": path,
+        "summary": str(op.get("summary") or path_item.get("summary") or "").strip()[:500],
+        "description": str(op.get("description") or "").strip()[:500],
+        "tags": [str(t) for t in op.get("tags") or []],
+        "parameters": params,
+        "request_body": request_body,
+        "responses": responses,
+    }
+
+
+def render_operation(record: Dict[str, Any]) -> str:
+    """Compact text describing one operation, used as its chunk for embedding and prompts."""
+    lines = [f"{record['method']} {record['path']}"]
+    if record.get("operation_id"):
+        lines.append(f"operationId: {record['operation_id']}")
+    for key in ("summary", "description"):
+        if record.get(key):
+            lines.append(f"{key}: {record[key]}")
+    if record.get("tags"):
+        lines.append("tags: " + ", ".join(record["tags"]))
+    if record.get("parameters"):
+        lines.append("parameters:")
+        for p in record["parameters"]:
+            req = ", required" if p.get("required") else ""
+            desc = f" - {p['description']}" if p.get("description") else ""
+            lines.append(f"  {p.get('name')} ({p.get('in')}{req}): {schema_summary(p.get('schema'))}{desc}")
+    body = record.get("request_body")
+    if body:
+        req = " required" if body.get("required") else ""
+        lines.append(f"request body ({body['media']}{req}): {schema_summary(body.get('schema'))}")
+    if record.get("responses"):
+        lines.append("responses:")
+        for r in record["responses"]:
+            shape = f" -> {schema_summary(r['schema'])}" if r.get("schema") is not None else ""
+            lines.append(f"  {r['code']}: {r['description']}{shape}")
+    return "\n".join(lines)
+
+
+def spec_servers(spec: Dict[str, Any]) -> List[str]:
+    servers = [s.get("url") for s in (spec.get("servers") or []) if isinstance(s, dict) and s.get("url")]
+    if not servers and spec.get("host"):
+        # Swagger 2.0
+        scheme = (spec.get("schemes") or ["https"])[0]
+        servers = [f"{scheme}://{spec['host']}{spec.get('basePath') or ''}"]
+    return servers
+
+
+def chunk_openapi(
     spec: Dict[str, Any],
-    question: str,
-    top_k: int = 2,
-) -> List[Tuple[str, str]]:
-    # naive heuristic: search operationId/summary/description for keywords
-    q = question.lower()
-    matches: List[Tuple[float, str, str]] = []
-    for path, methods in find_paths_spec(spec).items():
-        for method, op in methods.items():
-            text = " ".join([
-                str(op.get("operationId", "")),
-                str(op.get("summary", "")),
-                str(op.get("description", "")),
-            ]).lower()
-            score = sum(1 for token in q.split() if token in text)
-            # prefer create-like actions
-            if any(k in text for k in ["create", "add", "new"]):
-                score += 2
-            if score > 0:
-                matches.append((float(score), method.upper(), path))
-    matches.sort(reverse=True)
-    snippets: List[Tuple[str, str]] = []
-    for _score, method, path in matches[:top_k]:
-        # Minimal examples without auth headers; frontend can augment
-        curl = f"curl -X {method} 'https://api.example.com{path}' -H 'Content-Type: application/json' -d '{{}}'"
-        py = (
-            "import requests\n"
-            f"resp = requests.request('{method}', 'https://api.example.com{path}', json={{}})\n"
-            "print(resp.status_code, resp.text)\n"
+    max_depth: int = 3,
+    paths: Optional[Iterable[Tuple[str, Any]]] = None,
+    catalog: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """One compact chunk per operation plus a short API overview chunk.
+
+    Each chunk is ``{"text", "fragment", "operation_id", "method", "path"}``;
+    ``fragment`` is the operationId when present, else ``"METHOD /path"``.
+    When ``catalog`` is given it is filled with the structured operation
+    records, server URLs and every schema they reference (see
+    :mod:`app.services.catalog`).
+    """
+    chunks: List[Dict[str, Any]] = []
+    info = spec.get("info") or {}
+    overview = [str(info.get("title") or "API")]
+    if info.get("description"):
+        overview.append(str(info["description"]).strip()[:1000])
+    servers = spec_servers(spec)
+    if servers:
+        overview.append("servers: " + ", ".join(servers))
+    if len(overview) > 1:
+        chunks.append({"text": "\n".join(overview), "fragment": "info", "operation_id": None, "method": None, "path": None})
+    memo: Dict[str, frozenset] = {}
+    operations: List[Dict[str, Any]] = []
+    schemas: Dict[str, Any] = {}
+    for path, method, op, item in iter_operations(spec, paths):
+        record = operation_record(path, method, op, item, spec, max_depth)
+        text = render_operation(record)
+        chunks.append(
+            {
+                "text": text,
+                "fragment": op.get("operationId") or f"{method.upper()} {path}",
+                "operation_id": op.get("operationId"),
+                "method": method.upper(),
+                "path": path,
+            }
         )
-        snippets.append(("curl", curl))
-        snippets.append(("python", py))
-    return snippets
+        if catalog is not None:
+            refs = referenced_refs([op, item.get("parameters")], spec, memo)
+            for ref in refs:
+                schemas.setdefault(ref, resolve_ref(spec, ref))
+            operations.append({**record, "text": text, "refs": refs})
+    if catalog is not None:
+        catalog.update({"servers": servers, "operations": operations, "schemas": schemas})
+    return chunks
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def parse_upload(name: str, raw: bytes, max_depth: int = 3, stream_min_bytes: int = 8 * 1024 * 1024) -> Dict[str, Any]:
+    """Validate, parse and chunk one uploaded spec, parsing the JSON exactly once.
+
+    Specs of at least ``stream_min_bytes`` are read incrementally: everything
+    but ``paths`` is decoded up front (so ``$ref`` targets are available), then
+    path items are decoded and chunked one at a time and dropped, so the full
+    tree is never held in memory.
+
+    Pure CPU work with no I/O, so ingest can run it in a process pool.
+    Raises ``ValueError`` with a user-facing message for unsupported uploads.
+    Chunks are keyed by ``sha256(fragment + text)`` for incremental re-ingest.
+    Stage durations are returned under ``timings`` since the caller may be in
+    another process. The decoded text is not returned (it would be copied back
+    through the process pool); callers store the ``raw`` bytes they already hold.
+    """
+    if not name.lower().endswith(".json"):
+        raise ValueError(f"Only JSON is supported. Invalid file: {name}")
+    digest = hashlib.sha256(raw).hexdigest()
+    started = time.perf_counter()
+    content = raw.decode("utf-8", errors="ignore")
+    try:
+        if len(raw) >= stream_min_bytes:
+            spec, paths = split_object(content, "paths")
+        else:
+            spec, paths = json.loads(content), None
+    except Exception:
+        raise ValueError(f"Invalid JSON content: {name}")
+    if not (isinstance(spec, dict) and ("openapi" in spec or "swagger" in spec)):
+        # If not an OpenAPI JSON, reject
+        raise ValueError(f"Unsupported JSON type (expect OpenAPI): {name}")
+    parsed_at = time.perf_counter()
+    chunks: Dict[str, Dict[str, Any]] = {}
+    catalog: Dict[str, Any] = {}
+    try:
+        for ch in chunk_openapi(spec, max_depth=max_depth, paths=paths, catalog=catalog):
+            chunks.setdefault(content_hash(f"{ch['fragment']}\n{ch['text']}"), ch)
+    except ValueError:
+        raise ValueError(f"Invalid JSON content: {name}")
+    return {
+        "name": name,
+        "type": "openapi",
+        "content_hash": digest,
+        "chunks": [{"hash": h, **ch} for h, ch in chunks.items()],
+        "catalog": catalog,
+        # seconds; with streaming, path items are decoded lazily and count as chunking
+        "timings": {"parse": parsed_at - started, "chunk": time.perf_counter() - parsed_at},
+    }
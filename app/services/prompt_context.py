@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import json
+
+from ..utils.text import estimate_tokens
+from .catalog import OperationCatalog
+
+
+def _schema_section(ref: str, schema: Any) -> str:
+    name = ref.rsplit("/", 1)[-1]
+    return f"schema {name} ({ref}): " + json.dumps(schema, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def _truncate(text: str, budget: int) -> str:
+    lines: List[str] = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line)
+        if used + cost > budget:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+def _candidate_sections(
+    question: str, chunks: List[Dict[str, Any]], catalog: Optional[OperationCatalog], extra_ops: int
+) -> List[Tuple[str, str]]:
+    """``(kind, text)`` sections in priority order: retrieved chunks first, each
+    operation followed by the schemas it references, then catalog matches the
+    retriever missed."""
+    sections: List[Tuple[str, str]] = []
+    seen_ops: set = set()
+
+    def add_op(op: Dict[str, Any]):
+        key = (op["method"], op["path"])
+        if key in seen_ops:
+            return
+        seen_ops.add(key)
+        sections.append(("operation", op["text"]))
+        for ref in op.get("refs") or []:
+            schema = catalog.schema(ref)
+            if schema is not None:
+                sections.append(("schema", _schema_section(ref, schema)))
+
+    for c in chunks:
+        op = None
+        if catalog is not None and c.get("method") and str(c.get("doc_id")) == catalog.doc_id:
+            op = catalog.get(c["method"], c["path"])
+        if op is not None:
+            add_op(op)
+        elif c.get("text"):
+            sections.append(("chunk", c["text"]))
+    if catalog is not None and extra_ops > 0:
+        for op in catalog.match(question, top_k=extra_ops):
+            add_op(op)
+    return sections
+
+
+def assemble_context(
+    question: str,
+    chunks: List[Dict[str, Any]],
+    catalog: Optional[OperationCatalog],
+    budget: int,
+    extra_ops: int = 2,
+) -> Dict[str, Any]:
+    """Pack the most relevant spec context into at most ``budget`` tokens.
+
+    Sections are taken greedily in priority order; one that does not fit is
+    skipped so smaller, later sections can still use the remaining budget.
+    Identical text (an operation chunk and its catalog entry, a schema shared
+    by several operations) is emitted once. Returns the packed ``text`` with
+    its estimated ``tokens`` and per-kind counts of what was kept and dropped.
+    """
+    header = ""
+    if catalog is not None and catalog.servers:
+        header = "servers: " + ", ".join(catalog.servers)
+    used = estimate_tokens(header)
+    parts: List[str] = [header] if header else []
+    seen: set = set()
+    kept: Dict[str, int] = {}
+    dropped: Dict[str, int] = {}
+    for kind, text in _candidate_sections(question, chunks, catalog, extra_ops):
+        text = text.strip()
+        if not text or text in seen:
+            continue
+        seen.add(text)
+        cost = estimate_tokens(text)
+        if used + cost > budget and not kept and kind == "operation":
+            # never send the best operation empty-handed: keep its leading lines
+            text = _truncate(text, budget - used)
+            cost = estimate_tokens(text)
+        if not text or used + cost > budget:
+            dropped[kind] = dropped.get(kind, 0) + 1
+            continue
+        parts.append(text)
+        used += cost
+        kept[kind] = kept.get(kind, 0) + 1
+    return {"text": "\n\n".join(parts), "tokens": used, "kept": kept, "dropped": dropped}
+
+
+__all__ = ["assemble_context"]
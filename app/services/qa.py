@@ -1,14 +1,35 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from datetime import datetime, timezone
-from bson import ObjectId
+import asyncio
+import json
+import logging
+import re
+import time
+from bson import ObjectId, Binary
+from pymongo import UpdateOne
+import numpy as np
 
+from ..config import settings
 from ..db import docs_col, chunks_col, qa_col
 from .embeddings import embed_texts
-from .vectorstore import get_vectorstore
-from .llm import generate_text
+from .vectorstore import get_vectorstore, MemoryVectorStore
+from .llm import generate_text, generate_text_stream
+from .answer_cache import answer_cache
+from .lexical import BM25Index, reciprocal_rank_fusion
+from .blobs import delete_content
+from .catalog import catalog_cache, get_catalog, OperationCatalog
+from .snippets import fast_path_operation, render_snippets, snippet_stats
+from .prompt_context import assemble_context
+from ..utils.concurrency import run_blocking, iterate_blocking
+from ..utils.text import estimate_tokens
+from ..utils.metrics import observe_stage, span
+
+logger = logging.getLogger(__name__)
 
 _vectorstore = get_vectorstore()
+# BM25 over chunk text, kept in step with the vector store (same ids)
+_lexical = BM25Index()
 
 
 def _format_answer(question: str, contexts: List[Dict[str, Any]]) -> str:
@@ -24,56 +45,152 @@ def _format_answer(question: str, contexts: List[Dict[str, Any]]) -> str:
     return base + "\n" + "\n".join(bullets) + trailer
 
 
-def ask_question(question: str) -> Dict[str, Any]:
-    # search vector store
-    q_emb = embed_texts([question])[0]
-    matches = _vectorstore.query(q_emb, top_k=6)
+_SNIPPET_SYSTEM = (
+    "You generate practical API request code snippets strictly consistent with the provided OpenAPI/spec context. "
+    "Return a compact JSON object with a 'snippets' array; each item has 'language' and 'code'. "
+    "Prefer cURL and Python. Do not invent paths or parameters not present in the spec/context."
+)
 
-    # map to chunks
-    chunk_ids = [m["metadata"].get("chunk_id") for m in matches if m.get("metadata")]
-    chunks = list(chunks_col.find({"_id": {"$in": chunk_ids}})) if chunk_ids else []
 
-    if not chunks:
-        return {
-            "answer": "I couldn't find an answer in the current docs. Try adding or enabling more docs.",
-            "citations": [],
-            "snippets": [],
-            "question": question,
-            "id": None,
-        }
-
-    # build citations
-    citations = []
-    for c in chunks[:3]:
-        citations.append(
-            {
-                "doc_id": str(c.get("doc_id")),
-                "fragment": c.get("fragment"),
-                "score": next((m["score"] for m in matches if m["metadata"].get("chunk_id") == c["_id"]), None),
-            }
-        )
+def _no_answer(question: str) -> Dict[str, Any]:
+    return {
+        "answer": "I couldn't find an answer in the current docs. Try adding or enabling more docs.",
+        "citations": [],
+        "snippets": [],
+        "question": question,
+        "id": None,
+    }
 
-    # AI-driven snippet generation
-    # Compose a minimal, grounded prompt with top contexts and any OpenAPI spec available.
-    top_doc_id = chunks[0].get("doc_id")
-    doc = docs_col.find_one({"_id": top_doc_id}) if top_doc_id else None
-    context_text = "\n\n".join((c.get("text") or "")[:800] for c in chunks[:3])
-    spec_text = doc.get("content", "") if doc and doc.get("type") == "openapi" else ""
-    system = (
-        "You generate practical API request code snippets strictly consistent with the provided OpenAPI/spec context. "
-        "Return a compact JSON object with a 'snippets' array; each item has 'language' and 'code'. "
-        "Prefer cURL and Python. Do not invent paths or parameters not present in the spec/context."
-    )
-    prompt = (
+
+def _embed_question(question: str) -> List[float]:
+    with span("embed"):
+        return embed_texts([question])[0]
+
+
+def _embed_questions(questions: List[str]) -> List[List[float]]:
+    with span("embed"):
+        return embed_texts(questions)
+
+
+def _retrieve(question: str, q_emb: List[float], top_k: int = 6) -> List[Dict[str, Any]]:
+    """Vector search, fused with BM25 by reciprocal rank when hybrid search is on."""
+    if not settings.hybrid_search_enabled:
+        with span("vector_query"):
+            return _vectorstore.query(q_emb, top_k=top_k)
+    pool = max(top_k, settings.retrieval_candidates)
+    with span("vector_query"):
+        dense = _vectorstore.query(q_emb, top_k=pool)
+    with span("lexical_query"):
+        sparse = _lexical.search(question, top_k=pool)
+    return reciprocal_rank_fusion([dense, sparse], k=settings.rrf_k, top_k=top_k)
+
+
+def _retrieve_many(questions: List[str], q_embs: List[List[float]], top_k: int = 6) -> List[List[Dict[str, Any]]]:
+    """:func:`_retrieve` for a batch, scoring all questions against the vector index at once."""
+    pool = max(top_k, settings.retrieval_candidates) if settings.hybrid_search_enabled else top_k
+    with span("vector_query"):
+        dense = _vectorstore.query_many(q_embs, top_k=pool)
+    if not settings.hybrid_search_enabled:
+        return dense
+    with span("lexical_query"):
+        sparse = [_lexical.search(q, top_k=pool) for q in questions]
+    return [reciprocal_rank_fusion([d, sp], k=settings.rrf_k, top_k=top_k) for d, sp in zip(dense, sparse)]
+
+
+def _match_chunk_ids(matches: List[Dict[str, Any]]) -> List[Any]:
+    return [m["metadata"].get("chunk_id") for m in matches if m.get("metadata") and m["metadata"].get("chunk_id")]
+
+
+def _load_chunks(chunk_ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+    if not chunk_ids:
+        return {}
+    with span("fetch_chunks"):
+        return {c["_id"]: c for c in chunks_col.find({"_id": {"$in": chunk_ids}}, {"embedding": 0})}
+
+
+def _fetch_chunks(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Load the matched chunks, ordered by match score."""
+    chunk_ids = _match_chunk_ids(matches)
+    by_id = _load_chunks(chunk_ids)
+    return [by_id[cid] for cid in dict.fromkeys(chunk_ids) if cid in by_id]
+
+
+def _fetch_chunks_many(matches_list: List[List[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+    """:func:`_fetch_chunks` for a batch: the union of all matched chunks in one ``$in`` query."""
+    ids_list = [_match_chunk_ids(matches) for matches in matches_list]
+    by_id = _load_chunks(list(dict.fromkeys(cid for ids in ids_list for cid in ids)))
+    return [[by_id[cid] for cid in dict.fromkeys(ids) if cid in by_id] for ids in ids_list]
+
+
+def _top_doc_id(matches: List[Dict[str, Any]]) -> Any:
+    for m in matches:
+        doc_id = (m.get("metadata") or {}).get("doc_id")
+        if doc_id:
+            return ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
+    return None
+
+
+def _load_catalog(matches: List[Dict[str, Any]]) -> Optional[OperationCatalog]:
+    with span("catalog"):
+        return get_catalog(_top_doc_id(matches))
+
+
+def _load_catalogs(matches_list: List[List[Dict[str, Any]]]) -> Dict[str, Optional[OperationCatalog]]:
+    """Catalogs of every batch question's top document, keyed by ``str(doc_id)``."""
+    doc_ids = {str(d): d for d in (_top_doc_id(m) for m in matches_list) if d is not None}
+    with span("catalog"):
+        return {key: get_catalog(doc_id) for key, doc_id in doc_ids.items()}
+
+
+def _template_snippets(
+    question: str, chunks: List[Dict[str, Any]], catalog: Optional[OperationCatalog]
+) -> Optional[List[Dict[str, str]]]:
+    """Snippets rendered from the matched operation, or ``None`` when the LLM should write them.
+
+    Only the top retrieved chunks of the catalog's document vote for which
+    operations are in play; see :func:`fast_path_operation` for the gate.
+    """
+    if catalog is None:
+        return None
+    retrieved = [c for c in chunks[:3] if str(c.get("doc_id")) == catalog.doc_id]
+    with span("template"):
+        op = fast_path_operation(question, catalog, retrieved)
+        if op is None:
+            return None
+        server = catalog.servers[0] if catalog.servers else None
+        return render_snippets(op, server, catalog.schemas)
+
+
+def _build_citations(chunks: List[Dict[str, Any]], matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    scores = {m["metadata"].get("chunk_id"): m["score"] for m in matches if m.get("metadata")}
+    return [
+        {"doc_id": str(c.get("doc_id")), "fragment": c.get("fragment"), "score": scores.get(c["_id"])}
+        for c in chunks[:3]
+    ]
+
+
+def _build_prompt(question: str, chunks: List[Dict[str, Any]], catalog: Optional[OperationCatalog]) -> str:
+    # Only the retrieved operations, their referenced schemas and the best catalog matches, under a token budget.
+    context = assemble_context(question, chunks, catalog, budget=settings.prompt_context_tokens)
+    return (
         f"Question: {question}\n\n"
-        f"Relevant context:\n{context_text}\n\n"
-        f"OpenAPI (if any):\n{spec_text[:4000]}\n\n"
+        f"Relevant API context:\n{context['text']}\n\n"
         "Produce 2-3 minimal yet working snippets."
     )
-    ai_out = generate_text(prompt, system=system, max_tokens=500)
+
+
+def _generate_snippets(prompt: str) -> List[Dict[str, str]]:
+    started = time.perf_counter()
+    ai_out = generate_text(prompt, system=_SNIPPET_SYSTEM, max_tokens=500)
+    elapsed = time.perf_counter() - started
+    observe_stage("llm", elapsed)
+    snippet_stats.record_llm(estimate_tokens(prompt), elapsed)
+    return _parse_snippets(ai_out)
+
+
+def _parse_snippets(ai_out: str) -> List[Dict[str, str]]:
     snippets: List[Dict[str, str]] = []
     # parse leniently as JSON or simple heuristics
-    import json, re
     try:
         obj = json.loads(ai_out)
         for it in obj.get("snippets", [])[:3]:
@@ -99,33 +216,342 @@ def ask_question(question: str) -> Dict[str, Any]:
     for s in snippets:
         if s.get("language") and s.get("code"):
             dedup.setdefault(s["language"], s)
-    snippets = list(dedup.values())[:3]
+    return list(dedup.values())[:3]
 
-    answer = _format_answer(question, [{"text": c.get("text")} for c in chunks[:3]])
 
-    qa_doc = {
+def _qa_record(question: str, chunks: List[Dict[str, Any]], citations: List[Dict[str, Any]], snippets: List[Dict[str, str]]) -> Dict[str, Any]:
+    answer = _format_answer(question, [{"text": c.get("text")} for c in chunks[:3]])
+    return {
         "question": question,
         "answer": answer,
         "citations": citations,
         "snippets": snippets,
         "created_at": datetime.now(timezone.utc).isoformat(),
     }
-    inserted = qa_col.insert_one(qa_doc)
-    qa_id = str(inserted.inserted_id)
 
-    qa_doc["id"] = qa_id
+
+def _save_record(qa_doc: Dict[str, Any]) -> Dict[str, Any]:
+    with span("save"):
+        inserted = qa_col.insert_one(qa_doc)
+    qa_doc["id"] = str(inserted.inserted_id)
     return qa_doc
 
 
-def index_doc(doc: Dict[str, Any], chunks: List[Dict[str, Any]]):
-    from uuid import uuid4
-    # compute embeddings and upsert
-    embeddings = embed_texts([c["text"] for c in chunks])
+def _save_records(qa_docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if not qa_docs:
+        return qa_docs
+    with span("save"):
+        inserted = qa_col.insert_many(qa_docs)
+    for qa_doc, _id in zip(qa_docs, inserted.inserted_ids):
+        qa_doc["id"] = str(_id)
+    return qa_docs
+
+
+def _from_cache(question: str, cached: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "question": question,
+        "answer": cached["answer"],
+        "citations": cached["citations"],
+        "snippets": cached["snippets"],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _remember(question: str, q_emb: List[float], qa_doc: Dict[str, Any], chunks: List[Dict[str, Any]], matches: List[Dict[str, Any]]):
+    doc_ids = {str(c.get("doc_id")) for c in chunks[:3]}
+    top = _top_doc_id(matches)
+    if top is not None:
+        doc_ids.add(str(top))
+    answer_cache.put(question, q_emb, {k: qa_doc[k] for k in ("answer", "citations", "snippets")}, doc_ids)
+
+
+async def ask_question_async(question: str) -> Dict[str, Any]:
+    """Answer one question: answer cache, retrieval, templated or LLM snippets, then a saved QA record.
+
+    Blocking Mongo, embedding and LLM calls run on the bounded I/O executor,
+    and the chunk fetch overlaps with loading the top document's catalog.
+    """
+    cached = answer_cache.get_exact(question)
+    if cached is not None:
+        return await run_blocking(_save_record, _from_cache(question, cached))
+
+    q_emb = await run_blocking(_embed_question, question)
+    cached = answer_cache.get_similar(q_emb)
+    if cached is not None:
+        return await run_blocking(_save_record, _from_cache(question, cached))
+    matches = await run_blocking(_retrieve, question, q_emb)
+
+    chunks, catalog = await asyncio.gather(
+        run_blocking(_fetch_chunks, matches),
+        run_blocking(_load_catalog, matches),
+    )
+    if not chunks:
+        return _no_answer(question)
+
+    citations = _build_citations(chunks, matches)
+    snippets = _template_snippets(question, chunks, catalog)
+    snippet_stats.record(snippets is not None)
+    if snippets is None:
+        snippets = await run_blocking(_generate_snippets, _build_prompt(question, chunks, catalog))
+
+    qa_doc = _qa_record(question, chunks, citations, snippets)
+    _remember(question, q_emb, qa_doc, chunks, matches)
+    return await run_blocking(_save_record, qa_doc)
+
+
+async def ask_questions_async(questions: List[str]) -> List[Dict[str, Any]]:
+    """Answer a batch of questions; each result matches what :func:`ask_question_async` returns.
+
+    One ``embed_texts`` call, one matrix query against the vector index and one
+    ``$in`` chunk fetch serve the whole batch. LLM snippet generation runs
+    concurrently, at most ``QA_BATCH_CONCURRENCY`` calls at a time, and history
+    is written with one ``insert_many``. Repeated questions are answered once.
+    """
+    unique = list(dict.fromkeys(questions))
+    answers: Dict[str, Optional[Dict[str, Any]]] = {}
+    pending = []
+    for q in unique:
+        cached = answer_cache.get_exact(q)
+        if cached is not None:
+            answers[q] = _from_cache(q, cached)
+        else:
+            pending.append(q)
+
+    todo: List[Tuple[str, List[float]]] = []
+    if pending:
+        for q, q_emb in zip(pending, await run_blocking(_embed_questions, pending)):
+            cached = answer_cache.get_similar(q_emb)
+            if cached is not None:
+                answers[q] = _from_cache(q, cached)
+            else:
+                todo.append((q, q_emb))
+
+    if todo:
+        matches_list = await run_blocking(_retrieve_many, [q for q, _ in todo], [e for _, e in todo])
+        chunks_list, catalogs = await asyncio.gather(
+            run_blocking(_fetch_chunks_many, matches_list),
+            run_blocking(_load_catalogs, matches_list),
+        )
+        limit = asyncio.Semaphore(max(1, settings.qa_batch_concurrency))
+
+        async def answer(question: str, q_emb: List[float], matches: List[Dict[str, Any]], chunks: List[Dict[str, Any]]):
+            if not chunks:
+                return None
+            catalog = catalogs.get(str(_top_doc_id(matches)))
+            citations = _build_citations(chunks, matches)
+            snippets = _template_snippets(question, chunks, catalog)
+            snippet_stats.record(snippets is not None)
+            if snippets is None:
+                async with limit:
+                    snippets = await run_blocking(_generate_snippets, _build_prompt(question, chunks, catalog))
+            qa_doc = _qa_record(question, chunks, citations, snippets)
+            _remember(question, q_emb, qa_doc, chunks, matches)
+            return qa_doc
+
+        docs = await asyncio.gather(
+            *(answer(q, e, m, c) for (q, e), m, c in zip(todo, matches_list, chunks_list))
+        )
+        answers.update((q, doc) for (q, _), doc in zip(todo, docs))
+
+    # one history record per input question, as if each had been sent to /qa
+    records = [dict(answers[q]) if answers[q] is not None else None for q in questions]
+    await run_blocking(_save_records, [r for r in records if r is not None])
+    return [r if r is not None else _no_answer(q) for q, r in zip(questions, records)]
+
+
+async def stream_question(question: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Answer ``question`` as a sequence of ``(event, data)`` pairs.
+
+    The grounded answer and citations are emitted as soon as retrieval is
+    done, snippet text follows token by token, and the record is saved to
+    history once the LLM stream completes. Templated snippets skip the
+    token events entirely.
+    """
+    cached = answer_cache.get_exact(question)
+    if cached is None:
+        q_emb = await run_blocking(_embed_question, question)
+        cached = answer_cache.get_similar(q_emb)
+    if cached is not None:
+        saved = await run_blocking(_save_record, _from_cache(question, cached))
+        yield "answer", {"question": question, "answer": saved["answer"], "citations": saved["citations"]}
+        yield "snippets", {"snippets": saved["snippets"]}
+        yield "done", {"id": saved["id"]}
+        return
+    matches = await run_blocking(_retrieve, question, q_emb)
+    chunks, catalog = await asyncio.gather(
+        run_blocking(_fetch_chunks, matches),
+        run_blocking(_load_catalog, matches),
+    )
+    if not chunks:
+        empty = _no_answer(question)
+        yield "answer", {k: empty[k] for k in ("question", "answer", "citations")}
+        yield "done", {"id": None}
+        return
+
+    citations = _build_citations(chunks, matches)
+    qa_doc = _qa_record(question, chunks, citations, [])
+    yield "answer", {"question": question, "answer": qa_doc["answer"], "citations": citations}
+
+    snippets = _template_snippets(question, chunks, catalog)
+    snippet_stats.record(snippets is not None)
+    if snippets is None:
+        prompt = _build_prompt(question, chunks, catalog)
+        parts: List[str] = []
+        started = time.perf_counter()
+        async for token in iterate_blocking(lambda: generate_text_stream(prompt, system=_SNIPPET_SYSTEM, max_tokens=500)):
+            parts.append(token)
+            yield "token", {"text": token}
+        elapsed = time.perf_counter() - started
+        observe_stage("llm", elapsed)
+        snippet_stats.record_llm(estimate_tokens(prompt), elapsed)
+        snippets = _parse_snippets("".join(parts))
+
+    qa_doc["snippets"] = snippets
+    _remember(question, q_emb, qa_doc, chunks, matches)
+    yield "snippets", {"snippets": qa_doc["snippets"]}
+    saved = await run_blocking(_save_record, qa_doc)
+    yield "done", {"id": saved["id"]}
+
+
+def vector_id_for(chunk: Dict[str, Any]) -> str:
+    """Vector ids are derived from the chunk id, so re-indexing a chunk overwrites its vector."""
+    return chunk.get("vector_id") or str(chunk["_id"])
+
+
+def index_doc(doc: Dict[str, Any], chunks: List[Dict[str, Any]], insert: bool = False):
+    """Embed ``chunks`` and add them to the vector store and the BM25 index.
+
+    With ``insert`` the chunks are new and are written to ``chunks_col``
+    together with their vector id and embedding in one ``insert_many``, so a
+    stored chunk is always indexed; otherwise stored chunks are updated.
+    """
+    with span("ingest_embed"):
+        embeddings = embed_texts([c["text"] for c in chunks])
     items = []
+    updates = []
     for emb, ch in zip(embeddings, chunks):
-        items.append((str(uuid4()), emb, {"doc_id": str(doc["_id"]), "chunk_id": ch["_id"]}))
-    _vectorstore.upsert(items)
+        vector_id = vector_id_for(ch)
+        items.append((vector_id, emb, {"doc_id": str(doc["_id"]), "chunk_id": ch["_id"]}))
+        # keep the embedding next to the chunk so the index can be rebuilt without re-embedding
+        blob = Binary(np.asarray(emb, dtype=np.float32).tobytes())
+        if insert:
+            ch.update(vector_id=vector_id, embedding=blob)
+        else:
+            updates.append(UpdateOne({"_id": ch["_id"]}, {"$set": {"vector_id": vector_id, "embedding": blob}}))
+    with span("ingest_store"):
+        if insert and chunks:
+            chunks_col.insert_many(chunks)
+        if updates:
+            chunks_col.bulk_write(updates, ordered=False)
+    with span("ingest_upsert"):
+        _vectorstore.upsert(items)
+        for (vector_id, _emb, meta), ch in zip(items, chunks):
+            _lexical.add(vector_id, ch.get("text") or "", meta)
+    # new content can change the best answer to any question
+    answer_cache.clear()
+
+
+def _delete_vectors(vector_ids: List[str]):
+    page = max(1, settings.vector_delete_batch)
+    for start in range(0, len(vector_ids), page):
+        _vectorstore.delete_ids(vector_ids[start : start + page])
+
+
+def remove_chunks_from_index(doc_id: str, vector_ids: List[str]):
+    """Drop individual chunk vectors of a document (used by incremental re-ingest)."""
+    if not vector_ids:
+        return
+    _delete_vectors(vector_ids)
+    _lexical.remove_ids(vector_ids)
+    answer_cache.invalidate_doc(doc_id)
+
+
+def persist_index():
+    """Snapshot the vector store; callers batch their changes and persist once."""
+    _vectorstore.persist()
+
+
+def delete_docs(doc_ids: List[ObjectId]) -> List[ObjectId]:
+    """Delete documents, their chunks and their vectors in one pass.
+
+    Vector ids are read from the chunk documents and removed with paged
+    id-based deletes (no metadata-filter deletes, which serverless Pinecone
+    rejects). Returns the ids that existed.
+    """
+    found = [d["_id"] for d in docs_col.find({"_id": {"$in": doc_ids}}, {"_id": 1})]
+    if not found:
+        return []
+    vector_ids: List[str] = []
+    legacy_docs = set()
+    for ch in chunks_col.find({"doc_id": {"$in": found}}, {"vector_id": 1, "doc_id": 1}):
+        if ch.get("vector_id"):
+            vector_ids.append(ch["vector_id"])
+        else:
+            legacy_docs.add(str(ch["doc_id"]))
+    _delete_vectors(vector_ids)
+    # chunks indexed before vector ids were recorded can only be removed by filter, which
+    # serverless Pinecone rejects; their vectors are then orphaned but the docs still go
+    for doc_id in legacy_docs:
+        try:
+            _vectorstore.delete({"doc_id": doc_id})
+        except Exception:
+            logger.warning("filter delete of vectors for doc %s failed; deleting the doc anyway", doc_id, exc_info=True)
+    chunks_col.delete_many({"doc_id": {"$in": found}})
+    docs_col.delete_many({"_id": {"$in": found}})
+    delete_content(found)
+    _vectorstore.persist()
+    for _id in found:
+        _lexical.remove_doc(str(_id))
+        catalog_cache.invalidate(str(_id))
+        answer_cache.invalidate_doc(str(_id))
+    return found
+
+
+def rehydrate_index(batch_size: int = 1000) -> int:
+    """Fill the in-memory index from embeddings stored on ``chunks_col``.
+
+    Used on startup when no snapshot was found, or when the snapshot's live
+    vector count disagrees with the embedded chunks in Mongo (a crash between
+    a Mongo write and the next snapshot, or a snapshot from another database);
+    the index is then cleared and rebuilt. Never calls the embedding provider.
+    Returns the number of vectors loaded.
+    """
+    if not isinstance(_vectorstore, MemoryVectorStore):
+        return 0
+    if len(_vectorstore):
+        stored = chunks_col.count_documents({"embedding": {"$exists": True}})
+        if len(_vectorstore) == stored:
+            return 0
+        logger.warning("vector snapshot has %d vectors but %d chunks are embedded; rebuilding it from Mongo", len(_vectorstore), stored)
+        _vectorstore.clear()
+    loaded = 0
+    batch: List[Any] = []
+    cursor = chunks_col.find({"embedding": {"$exists": True}}, {"embedding": 1, "vector_id": 1, "doc_id": 1})
+    for ch in cursor:
+        vec = np.frombuffer(bytes(ch["embedding"]), dtype=np.float32)
+        batch.append((ch.get("vector_id") or str(ch["_id"]), vec, {"doc_id": str(ch.get("doc_id")), "chunk_id": ch["_id"]}))
+        if len(batch) >= batch_size:
+            _vectorstore.upsert(batch)
+            loaded += len(batch)
+            batch = []
+    if batch:
+        _vectorstore.upsert(batch)
+        loaded += len(batch)
+    if loaded:
+        _vectorstore.persist()
+    return loaded
+
+
+def vectorstore_stats() -> Dict[str, Any]:
+    """Size and memory footprint of the in-process vector store (empty for Pinecone)."""
+    return _vectorstore.stats() if isinstance(_vectorstore, MemoryVectorStore) else {}
 
 
-def delete_doc_from_index(doc_id: str):
-    _vectorstore.delete({"doc_id": doc_id})
+def rebuild_lexical_index() -> int:
+    """Rebuild the in-process BM25 index from chunk text in ``chunks_col`` (startup)."""
+    loaded = 0
+    for ch in chunks_col.find({}, {"text": 1, "vector_id": 1, "doc_id": 1}):
+        meta = {"doc_id": str(ch.get("doc_id")), "chunk_id": ch["_id"]}
+        _lexical.add(ch.get("vector_id") or str(ch["_id"]), ch.get("text") or "", meta)
+        loaded += 1
+    return loaded
@@ -0,0 +1,224 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+import json
+import pprint
+import re
+import shlex
+import threading
+
+from ..config import settings
+
+DEFAULT_SERVER = "https://api.example.com"
+
+_FORMAT_EXAMPLES = {
+    "email": "user@example.com",
+    "date-time": "2024-01-01T00:00:00Z",
+    "date": "2024-01-01",
+    "uuid": "3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    "uri": "https://example.com",
+    "url": "https://example.com",
+    "password": "********",
+    "byte": "U3dhZ2dlcg==",
+}
+_HTTP_METHODS = frozenset({"get", "put", "post", "delete", "options", "head", "patch", "trace"})
+
+
+class SnippetStats:
+    """Counts how often snippets came from local templates vs. an LLM call, and LLM prompt size/latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fast_path = 0
+        self.llm = 0
+        self.prompt_tokens = 0
+        self.llm_seconds = 0.0
+        self.llm_calls = 0
+
+    def record(self, fast: bool):
+        with self._lock:
+            if fast:
+                self.fast_path += 1
+            else:
+                self.llm += 1
+
+    def record_llm(self, prompt_tokens: int, seconds: float):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.llm_seconds += seconds
+            self.llm_calls += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.fast_path + self.llm
+            calls = self.llm_calls
+            return {
+                "fast_path": self.fast_path,
+                "llm": self.llm,
+                "fast_path_rate": (self.fast_path / total) if total else 0.0,
+                "avg_prompt_tokens": (self.prompt_tokens / calls) if calls else 0.0,
+                "avg_llm_ms": (1000 * self.llm_seconds / calls) if calls else 0.0,
+            }
+
+
+snippet_stats = SnippetStats()
+
+
+def example_value(schema: Any, schemas: Optional[Dict[str, Any]] = None, depth: int = 0, name: str = "") -> Any:
+    """Synthesize a plausible example value from a (partially inlined) JSON schema."""
+    if not isinstance(schema, dict) or depth > 6:
+        return None
+    if "$ref" in schema:
+        target = (schemas or {}).get(schema["$ref"])
+        return example_value(target, schemas, depth + 1, name) if target is not None else {}
+    for key in ("example", "default"):
+        if key in schema:
+            return schema[key]
+    if isinstance(schema.get("enum"), list) and schema["enum"]:
+        return schema["enum"][0]
+    if isinstance(schema.get("allOf"), list):
+        merged: Dict[str, Any] = {}
+        for sub in schema["allOf"]:
+            val = example_value(sub, schemas, depth + 1, name)
+            if isinstance(val, dict):
+                merged.update(val)
+        return merged
+    for combo in ("oneOf", "anyOf"):
+        if isinstance(schema.get(combo), list) and schema[combo]:
+            return example_value(schema[combo][0], schemas, depth + 1, name)
+    typ = schema.get("type")
+    if typ == "array" or "items" in schema:
+        item = example_value(schema.get("items"), schemas, depth + 1, name)
+        return [item] if item is not None else []
+    if typ == "object" or isinstance(schema.get("properties"), dict):
+        props = schema.get("properties") or {}
+        return {k: example_value(v, schemas, depth + 1, k) for k, v in props.items()}
+    if typ == "integer":
+        return 1
+    if typ == "number":
+        return 9.99
+    if typ == "boolean":
+        return True
+    if typ == "string" or typ is None:
+        fmt = schema.get("format")
+        if fmt in _FORMAT_EXAMPLES:
+            return _FORMAT_EXAMPLES[fmt]
+        return f"example_{name}" if name else "string"
+    return None
+
+
+def _path_value(param: Dict[str, Any], schemas: Optional[Dict[str, Any]]) -> str:
+    val = example_value(param.get("schema"), schemas, name=param.get("name") or "")
+    if isinstance(val, str) and val.startswith("example_"):
+        return f"YOUR_{re.sub(r'[^A-Za-z0-9]', '_', param.get('name') or 'VALUE').upper()}"
+    return str(val if val is not None else "VALUE")
+
+
+def build_request(op: Dict[str, Any], server: str, schemas: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Resolve an operation record into a concrete example request."""
+    path = op["path"]
+    query: List[Tuple[str, Any]] = []
+    headers: Dict[str, str] = {}
+    for p in op.get("parameters") or []:
+        where, name = p.get("in"), p.get("name") or ""
+        if where == "path":
+            path = path.replace("{" + name + "}", quote(_path_value(p, schemas), safe=""))
+        elif where == "query" and p.get("required"):
+            query.append((name, example_value(p.get("schema"), schemas, name=name)))
+        elif where == "header" and p.get("required"):
+            headers[name] = str(example_value(p.get("schema"), schemas, name=name))
+    url = server.rstrip("/") + path
+    if query:
+        url += "?" + urlencode([(k, v if not isinstance(v, bool) else str(v).lower()) for k, v in query])
+    body = None
+    rb = op.get("request_body")
+    if rb and rb.get("schema") is not None and "json" in (rb.get("media") or ""):
+        body = example_value(rb["schema"], schemas)
+        headers.setdefault("Content-Type", rb.get("media") or "application/json")
+    return {"method": op["method"], "url": url, "headers": headers, "body": body}
+
+
+def _curl(req: Dict[str, Any]) -> str:
+    lines = [f"curl -X {req['method']} {shlex.quote(req['url'])}"]
+    for k, v in req["headers"].items():
+        lines.append(f"  -H {shlex.quote(f'{k}: {v}')}")
+    if req["body"] is not None:
+        lines.append(f"  -d {shlex.quote(json.dumps(req['body']))}")
+    return " \\\n".join(lines)
+
+
+def _python(req: Dict[str, Any]) -> str:
+    args = [repr(req["method"]), repr(req["url"])]
+    if req["headers"]:
+        args.append(f"headers={req['headers']!r}")
+    if req["body"] is not None:
+        # a Python literal: JSON's true/false/null are not valid Python
+        args.append(f"json={pprint.pformat(req['body'], sort_dicts=False)}")
+    return (
+        "import requests\n\n"
+        f"resp = requests.request({', '.join(args)})\n"
+        "print(resp.status_code, resp.text)\n"
+    )
+
+
+def _fetch_options(req: Dict[str, Any]) -> str:
+    opts = [f"  method: {json.dumps(req['method'])},"]
+    if req["headers"]:
+        opts.append(f"  headers: {json.dumps(req['headers'])},")
+    if req["body"] is not None:
+        opts.append(f"  body: JSON.stringify({json.dumps(req['body'])}),")
+    return "{\n" + "\n".join(opts) + "\n}"
+
+
+def _javascript(req: Dict[str, Any]) -> str:
+    return (
+        f"const resp = await fetch({json.dumps(req['url'])}, {_fetch_options(req)});\n"
+        "console.log(resp.status, await resp.text());\n"
+    )
+
+
+def _typescript(req: Dict[str, Any]) -> str:
+    return (
+        f"const resp: Response = await fetch({json.dumps(req['url'])}, {_fetch_options(req)});\n"
+        "const data: unknown = await resp.json();\n"
+        "console.log(resp.status, data);\n"
+    )
+
+
+def render_snippets(op: Dict[str, Any], server: Optional[str] = None, schemas: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+    """curl, Python, JavaScript and TypeScript snippets for one operation record."""
+    req = build_request(op, server or DEFAULT_SERVER, schemas)
+    return [
+        {"language": "curl", "code": _curl(req)},
+        {"language": "python", "code": _python(req)},
+        {"language": "javascript", "code": _javascript(req)},
+        {"language": "typescript", "code": _typescript(req)},
+    ]
+
+
+def fast_path_operation(question: str, catalog: Any, retrieved: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Pick the operation to template from, or ``None`` when confidence is below the threshold.
+
+    The catalog's best lexical match must also be among the retrieved chunks'
+    operations and must match more than the HTTP method. Confidence is its
+    token coverage, discounted when the runner-up scores close to it (an
+    ambiguous question).
+    """
+    if catalog is None or not len(catalog):
+        return None
+    keys = {(c.get("method"), c.get("path")) for c in retrieved if c.get("method") and c.get("path")}
+    if not keys:
+        return None
+    ranked = catalog.match(question, top_k=2)
+    if not ranked:
+        return None
+    best = ranked[0]
+    if (best["method"], best["path"]) not in keys:
+        return None
+    if not set(best["terms"]) - _HTTP_METHODS:
+        return None
+    runner_up = ranked[1]["score"] / best["score"] if len(ranked) > 1 and best["score"] else 0.0
+    confidence = best["coverage"] * (0.5 + 0.5 * (1 - runner_up))
+    if confidence < settings.snippet_fast_path_threshold:
+        return None
+    return {**best, "confidence": confidence}
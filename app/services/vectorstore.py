@@ -1,5 +1,10 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Set, Tuple
+import os
+import tempfile
+import threading
+import numpy as np
+from bson import json_util
 from ..config import settings
 
 try:
@@ -9,35 +14,502 @@ except Exception:  # pragma: no cover
 
 
 class MemoryVectorStore:
-    def __init__(self):
-        self.vectors: List[Tuple[str, list[float], Dict[str, Any]]] = []
+    """In-process cosine index backed by a contiguous, pre-normalized matrix.
+
+    Rows are appended into a buffer that grows by doubling; deletes only
+    tombstone rows and the matrix is compacted once tombstones dominate.
+
+    With ``quantization`` set to ``float16`` or ``int8`` (per-row scale), the
+    in-memory matrix holds the compact rows used for a first scoring pass. The
+    float32 rows live in a memory-mapped temporary file, and the best
+    ``rerank * top_k`` candidates are re-scored exactly from it.
+    """
+
+    _INITIAL_CAPACITY = 1024
+    _COMPACT_MIN_TOMBSTONES = 1024
+    _COMPACT_RATIO = 0.25
+
+    _VECTORS_FILE = "vectors.npy"
+    _SIDECAR_FILE = "ids.json"
+
+    # rows copied or encoded per step when moving the memory-mapped full-precision vectors
+    _COPY_ROWS = 65536
+    _DTYPES = {"none": np.float32, "float16": np.float16, "int8": np.int8}
+
+    def __init__(self, dim: int | None = None, snapshot_dir: str | None = None, quantization: str = "none", rerank: int = 4):
+        if quantization not in self._DTYPES:
+            raise ValueError(f"unknown vector quantization: {quantization}")
+        self.dim = dim
+        self.snapshot_dir = snapshot_dir
+        self.quantization = quantization
+        self.rerank = rerank
+        self._matrix = np.zeros((0, dim or 0), dtype=self._DTYPES[quantization])
+        # per-row int8 scale; empty unless quantization == "int8"
+        self._scales = np.zeros(0, dtype=np.float32)
+        # full-precision rows for re-ranking; None when unquantized
+        self._full: np.ndarray | None = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._tombstones = 0
+        self._ids: List[str | None] = []
+        self._meta: List[Dict[str, Any] | None] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._doc_rows: Dict[str, Set[int]] = {}
+        self._lock = threading.RLock()
+        # serializes whole saves so snapshots are replaced in the order they were taken
+        self._save_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size - self._tombstones
+
+    @property
+    def bytes_per_vector(self) -> int:
+        """In-memory bytes per stored vector (the re-ranking copy is on disk)."""
+        return (self.dim or 0) * self._matrix.itemsize + (self._scales.itemsize if self.quantization == "int8" else 0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"vectors": len(self), "bytes_per_vector": self.bytes_per_vector, "quantization": self.quantization}
+
+    def _full_buffer(self, capacity: int, rows: np.ndarray | None = None) -> np.ndarray:
+        """A float32 memmap over an anonymous temp file, seeded with ``self._full[rows]`` (default: all rows)."""
+        full = np.memmap(tempfile.TemporaryFile(), dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        if self._full is not None:
+            rows = np.arange(self._size) if rows is None else rows
+            for start in range(0, len(rows), self._COPY_ROWS):
+                part = rows[start : start + self._COPY_ROWS]
+                full[start : start + len(part)] = self._full[part]
+        return full
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(capacity, self._INITIAL_CAPACITY)
+        while new_capacity < needed:
+            new_capacity *= 2
+        matrix = np.zeros((new_capacity, self.dim), dtype=self._DTYPES[self.quantization])
+        matrix[: self._size] = self._matrix[: self._size]
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+        if self.quantization == "int8":
+            scales = np.ones(new_capacity, dtype=np.float32)
+            scales[: self._size] = self._scales[: self._size]
+            self._scales = scales
+        if self.quantization != "none":
+            self._full = self._full_buffer(new_capacity)
+        self._matrix, self._alive = matrix, alive
+
+    @staticmethod
+    def _normalize(arr: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return arr / norms
+
+    def _encode_rows(self, start: int, vecs: np.ndarray):
+        """Write normalized float32 ``vecs`` into the scoring matrix from row ``start``."""
+        stop = start + len(vecs)
+        if self.quantization == "int8":
+            scales = np.abs(vecs).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._matrix[start:stop] = np.round(vecs / scales[:, None]).astype(np.int8)
+            self._scales[start:stop] = scales
+        else:
+            self._matrix[start:stop] = vecs
+
+    def _vectors(self, index: Any) -> np.ndarray:
+        """Scoring-precision rows (a slice or row array) as float32."""
+        rows = np.asarray(self._matrix[index], dtype=np.float32)
+        if self.quantization == "int8":
+            rows *= self._scales[index][:, None]
+        return rows
+
+    def _approx_scores(self, queries: np.ndarray, index: Any) -> np.ndarray:
+        """Cosine scores of ``queries`` against scoring-precision rows; int8 scales apply to the scores.
+
+        float16 blocks are widened to float32 on every call (NumPy has no BLAS path for half precision),
+        which is why that mode trades speed for memory.
+        """
+        sims = queries @ np.asarray(self._matrix[index], dtype=np.float32).T
+        if self.quantization == "int8":
+            sims *= self._scales[index]
+        return sims
+
+    def _tombstone(self, row: int):
+        _id = self._ids[row]
+        meta = self._meta[row] or {}
+        if _id is not None:
+            self._id_to_row.pop(_id, None)
+        rows = self._doc_rows.get(meta.get("doc_id"))
+        if rows is not None:
+            rows.discard(row)
+            if not rows:
+                self._doc_rows.pop(meta.get("doc_id"), None)
+        self._alive[row] = False
+        self._ids[row] = None
+        self._meta[row] = None
+        self._tombstones += 1
 
     def upsert(self, items: List[Tuple[str, list[float], Dict[str, Any]]]):
-        self.vectors.extend(items)
+        if not items:
+            return
+        # an id repeated within the batch keeps its last vector, like consecutive upserts would
+        items = list({_id: (_id, vec, meta) for _id, vec, meta in items}.values())
+        vecs = np.asarray([vec for _id, vec, _meta in items], dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vecs.shape[1]
+                self._matrix = np.zeros((0, self.dim), dtype=self._DTYPES[self.quantization])
+            for _id, _vec, _meta in items:
+                row = self._id_to_row.get(_id)
+                if row is not None:
+                    self._tombstone(row)
+            self._reserve(len(items))
+            start = self._size
+            vecs = self._normalize(vecs)
+            self._encode_rows(start, vecs)
+            if self._full is not None:
+                self._full[start : start + len(items)] = vecs
+            self._alive[start : start + len(items)] = True
+            for offset, (_id, _vec, meta) in enumerate(items):
+                row = start + offset
+                self._ids.append(_id)
+                self._meta.append(meta)
+                self._id_to_row[_id] = row
+                self._doc_rows.setdefault(meta.get("doc_id"), set()).add(row)
+            self._size += len(items)
 
     def delete(self, filter_meta: Dict[str, Any]):
         doc_id = filter_meta.get("doc_id")
         if doc_id is None:
             return
-        self.vectors = [v for v in self.vectors if v[2].get("doc_id") != doc_id]
+        with self._lock:
+            for row in list(self._doc_rows.get(doc_id, ())):
+                self._tombstone(row)
+            self._maybe_compact()
+
+    def delete_ids(self, ids: List[str]):
+        with self._lock:
+            for _id in ids:
+                row = self._id_to_row.get(_id)
+                if row is not None:
+                    self._tombstone(row)
+            self._maybe_compact()
+
+    def clear(self):
+        """Drop every vector; the snapshot on disk is replaced on the next :meth:`persist`."""
+        with self._lock:
+            for row in np.flatnonzero(self._alive[: self._size]):
+                self._tombstone(row)
+            self.compact()
+
+    def _maybe_compact(self):
+        if self._tombstones < self._COMPACT_MIN_TOMBSTONES:
+            return
+        if self._tombstones < self._COMPACT_RATIO * self._size:
+            return
+        self.compact()
+
+    def compact(self):
+        """Drop tombstoned rows and rebuild the row bookkeeping."""
+        with self._lock:
+            keep = np.flatnonzero(self._alive[: self._size])
+            capacity = max(len(keep), self._INITIAL_CAPACITY)
+            matrix = np.zeros((capacity, self.dim or 0), dtype=self._DTYPES[self.quantization])
+            matrix[: len(keep)] = self._matrix[keep]
+            alive = np.zeros(matrix.shape[0], dtype=bool)
+            alive[: len(keep)] = True
+            if self.quantization == "int8":
+                scales = np.ones(capacity, dtype=np.float32)
+                scales[: len(keep)] = self._scales[keep]
+                self._scales = scales
+            if self._full is not None:
+                self._full = self._full_buffer(capacity, keep)
+            self._ids = [self._ids[r] for r in keep]
+            self._meta = [self._meta[r] for r in keep]
+            self._matrix, self._alive = matrix, alive
+            self._size = len(keep)
+            self._tombstones = 0
+            self._id_to_row = {}
+            self._doc_rows = {}
+            for row, (_id, meta) in enumerate(zip(self._ids, self._meta)):
+                self._id_to_row[_id] = row
+                self._doc_rows.setdefault(meta.get("doc_id"), set()).add(row)
+
+    # bound the (queries x rows) similarity block of query_many to about this many floats
+    _SCORE_BLOCK_FLOATS = 4 * 1024 * 1024
+
+    def _matches(self, rows: np.ndarray, sims: np.ndarray, k: int) -> List[Dict[str, Any]]:
+        """The ``k`` best of ``rows`` by ``sims``, best first, as match dicts."""
+        if len(rows) > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            rows, sims = rows[top], sims[top]
+        order = np.argsort(-sims)
+        return [{"id": self._ids[r], "score": float(sims[i]), "metadata": self._meta[r]} for i, r in zip(order, rows[order])]
+
+    def _rerank(self, query: np.ndarray, rows: np.ndarray, k: int) -> List[Dict[str, Any]]:
+        """Exact top ``k`` of candidate ``rows`` scored against the full-precision vectors."""
+        rows = np.sort(rows[self._alive[rows]])  # sorted reads walk the memmap sequentially
+        return self._matches(rows, np.asarray(self._full[rows]) @ query, k)
 
     def query(self, emb: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
-        import numpy as np
-        if not self.vectors:
-            return []
-        v = np.array(emb)
-        sims = []
-        for _id, vec, meta in self.vectors:
-            arr = np.array(vec)
-            denom = (np.linalg.norm(v) * np.linalg.norm(arr)) or 1.0
-            sim = float(v.dot(arr) / denom)
-            sims.append((sim, _id, meta))
-        sims.sort(reverse=True)
-        results: List[Dict[str, Any]] = []
-        for sim, _id, meta in sims[:top_k]:
-            item = {"id": _id, "score": sim, "metadata": meta}
-            results.append(item)
-        return results
+        return self.query_many([emb], top_k=top_k)[0]
+
+    def query_many(self, embs: List[List[float]], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Top-k matches for several queries, scored as one matrix product per block of queries."""
+        with self._lock:
+            live = self._size - self._tombstones
+            if live <= 0 or top_k <= 0 or not len(embs):
+                return [[] for _ in embs]
+            queries = self._normalize(np.asarray(embs, dtype=np.float32).reshape(len(embs), -1))
+            k = min(top_k, live)
+            if self._full is not None:
+                return self._query_quantized(queries, k, live)
+            block = max(1, self._SCORE_BLOCK_FLOATS // max(1, self._size))
+            dead = ~self._alive[: self._size] if self._tombstones else None
+            results: List[List[Dict[str, Any]]] = []
+            for start in range(0, len(queries), block):
+                sims = queries[start : start + block] @ self._matrix[: self._size].T
+                if dead is not None:
+                    sims[:, dead] = -np.inf
+                top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+                for row_sims, rows in zip(sims, top):
+                    rows = rows[np.argsort(-row_sims[rows])]
+                    results.append(
+                        [{"id": self._ids[r], "score": float(row_sims[r]), "metadata": self._meta[r]} for r in rows]
+                    )
+            return results
+
+    def _query_quantized(self, queries: np.ndarray, k: int, live: int) -> List[List[Dict[str, Any]]]:
+        """Approximate scan over blocks of decoded rows, then exact re-ranking of the best candidates."""
+        pool = min(live, k * max(1, self.rerank))
+        block = max(1024, self._SCORE_BLOCK_FLOATS // max(self.dim or 1, len(queries)))
+        cand_rows, cand_sims = [], []
+        for start in range(0, self._size, block):
+            stop = min(self._size, start + block)
+            sims = self._approx_scores(queries, slice(start, stop))
+            if self._tombstones:
+                sims[:, ~self._alive[start:stop]] = -np.inf
+            c = min(pool, stop - start)
+            top = np.argpartition(-sims, c - 1, axis=1)[:, :c]
+            cand_rows.append(top + start)
+            cand_sims.append(np.take_along_axis(sims, top, axis=1))
+        rows, sims = np.concatenate(cand_rows, axis=1), np.concatenate(cand_sims, axis=1)
+        if rows.shape[1] > pool:
+            best = np.argpartition(-sims, pool - 1, axis=1)[:, :pool]
+            rows = np.take_along_axis(rows, best, axis=1)
+        return [self._rerank(query, candidates, k) for query, candidates in zip(queries, rows)]
+
+    def save(self, directory: str):
+        """Write live rows to ``vectors.npy`` plus an ids/metadata sidecar.
+
+        Files are written to unique temporaries and swapped in with
+        ``os.replace`` so a crash mid-write never leaves a torn snapshot
+        behind; concurrent saves run one at a time. Quantized stores save
+        their full-precision rows.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with self._save_lock:
+            with self._lock:
+                keep = np.flatnonzero(self._alive[: self._size])
+                source = self._full if self._full is not None else self._matrix
+                matrix = np.ascontiguousarray(source[keep], dtype=np.float32)
+                sidecar = {"dim": self.dim, "ids": [self._ids[r] for r in keep], "meta": [self._meta[r] for r in keep]}
+            vec_fd, vec_tmp = tempfile.mkstemp(dir=directory, prefix=".vectors-", suffix=".tmp")
+            side_fd, side_tmp = tempfile.mkstemp(dir=directory, prefix=".ids-", suffix=".tmp")
+            try:
+                with os.fdopen(vec_fd, "wb") as fh:
+                    np.save(fh, matrix)
+                with os.fdopen(side_fd, "w", encoding="utf-8") as fh:
+                    fh.write(json_util.dumps(sidecar))
+                os.replace(vec_tmp, os.path.join(directory, self._VECTORS_FILE))
+                os.replace(side_tmp, os.path.join(directory, self._SIDECAR_FILE))
+            finally:
+                for path in (vec_tmp, side_tmp):
+                    if os.path.exists(path):
+                        os.unlink(path)
+
+    @classmethod
+    def load(cls, directory: str, **options: Any) -> "MemoryVectorStore | None":
+        """Open a snapshot written by :meth:`save`; the matrix is memory-mapped.
+
+        The mapping is read-only, so the first upsert copies it into a regular
+        growable buffer. A quantized store scores from a compact copy and
+        re-ranks straight from the mapping. ``options`` go to the constructor.
+        Returns ``None`` when no usable snapshot exists.
+        """
+        vec_path = os.path.join(directory, cls._VECTORS_FILE)
+        side_path = os.path.join(directory, cls._SIDECAR_FILE)
+        if not (os.path.exists(vec_path) and os.path.exists(side_path)):
+            return None
+        try:
+            with open(side_path, "r", encoding="utf-8") as fh:
+                sidecar = json_util.loads(fh.read())
+            matrix = np.load(vec_path, mmap_mode="r")
+        except (OSError, ValueError):
+            # unreadable snapshot: start empty and let rehydrate_index rebuild from Mongo
+            return None
+        if matrix.ndim != 2 or len(sidecar["ids"]) != matrix.shape[0]:
+            return None
+        store = cls(dim=sidecar.get("dim") or matrix.shape[1], snapshot_dir=directory, **options)
+        if store.quantization == "none":
+            store._matrix = matrix
+        else:
+            store._full = matrix
+            store._matrix = np.zeros(matrix.shape, dtype=cls._DTYPES[store.quantization])
+            store._scales = np.ones(matrix.shape[0], dtype=np.float32)
+            for start in range(0, matrix.shape[0], cls._COPY_ROWS):
+                store._encode_rows(start, np.asarray(matrix[start : start + cls._COPY_ROWS], dtype=np.float32))
+        store._alive = np.ones(matrix.shape[0], dtype=bool)
+        store._size = matrix.shape[0]
+        store._ids = list(sidecar["ids"])
+        store._meta = list(sidecar["meta"])
+        for row, (_id, meta) in enumerate(zip(store._ids, store._meta)):
+            store._id_to_row[_id] = row
+            store._doc_rows.setdefault(meta.get("doc_id"), set()).add(row)
+        return store
+
+    def persist(self):
+        if self.snapshot_dir:
+            self.save(self.snapshot_dir)
+
+
+class IVFVectorStore(MemoryVectorStore):
+    """Approximate :class:`MemoryVectorStore`: an inverted-file (IVF) index over the same rows.
+
+    Spherical k-means centroids partition the rows into ``nlist`` lists; a query
+    scores only the rows of its ``nprobe`` closest lists (more lists: better
+    recall, slower). Below ``_MIN_TRAIN_ROWS`` live rows queries stay exact.
+    New rows join their nearest list on upsert; deletes reuse the tombstones of
+    the flat store. Centroids are retrained from a sample once the store has
+    grown ``_RETRAIN_GROWTH`` times past the size they were trained on.
+    """
+
+    _MIN_TRAIN_ROWS = 4096
+    _RETRAIN_GROWTH = 4
+    _TRAIN_SAMPLE_PER_LIST = 32
+    _TRAIN_ITERATIONS = 8
+
+    def __init__(self, dim: int | None = None, snapshot_dir: str | None = None, nlist: int = 0, nprobe: int = 8, **options: Any):
+        super().__init__(dim=dim, snapshot_dir=snapshot_dir, **options)
+        # 0 picks about 4 * sqrt(rows) lists at training time
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._centroids: np.ndarray | None = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._lists: List[np.ndarray] = []
+        self._trained_on = 0
+
+    def _assign_rows(self, vectors: np.ndarray) -> np.ndarray:
+        out = np.empty(len(vectors), dtype=np.int32)
+        block = max(1, self._SCORE_BLOCK_FLOATS // max(1, len(self._centroids)))
+        for start in range(0, len(vectors), block):
+            out[start : start + block] = np.argmax(vectors[start : start + block] @ self._centroids.T, axis=1)
+        return out
+
+    def _build_lists(self):
+        assign = self._assign[: self._size]
+        order = np.argsort(assign, kind="stable").astype(np.int64)
+        counts = np.bincount(assign, minlength=len(self._centroids))
+        self._lists = np.split(order, np.cumsum(counts)[:-1])
+
+    def train(self):
+        """Fit the centroids on a sample of live rows and reassign every row."""
+        with self._lock:
+            live = np.flatnonzero(self._alive[: self._size])
+            if not len(live):
+                return
+            nlist = self.nlist or int(4 * np.sqrt(len(live)))
+            nlist = max(1, min(nlist, len(live)))
+            rng = np.random.default_rng(0)
+            sample_size = min(len(live), nlist * self._TRAIN_SAMPLE_PER_LIST)
+            sample = self._vectors(np.sort(rng.choice(live, sample_size, replace=False)))
+            self._centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+            for _ in range(self._TRAIN_ITERATIONS):
+                labels = self._assign_rows(sample)
+                order = np.argsort(labels, kind="stable")
+                counts = np.bincount(labels, minlength=nlist)
+                used = np.flatnonzero(counts)
+                sums = np.zeros_like(self._centroids)
+                sums[used] = np.add.reduceat(sample[order], np.concatenate(([0], np.cumsum(counts[used])[:-1])))
+                # reseed empty lists with random sample points
+                empty = np.flatnonzero(counts == 0)
+                if len(empty):
+                    sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+                self._centroids = self._normalize(sums)
+            self._assign = np.full(self._matrix.shape[0], -1, dtype=np.int32)
+            for start in range(0, self._size, self._COPY_ROWS):
+                stop = min(self._size, start + self._COPY_ROWS)
+                self._assign[start:stop] = self._assign_rows(self._vectors(slice(start, stop)))
+            self._build_lists()
+            self._trained_on = len(live)
+
+    def _maybe_train(self):
+        live = len(self)
+        if live < self._MIN_TRAIN_ROWS:
+            return
+        if self._centroids is None or live >= self._RETRAIN_GROWTH * self._trained_on:
+            self.train()
+
+    def upsert(self, items: List[Tuple[str, list[float], Dict[str, Any]]]):
+        if not items:
+            return
+        with self._lock:
+            start = self._size
+            super().upsert(items)
+            if self._centroids is not None and len(self) < self._RETRAIN_GROWTH * self._trained_on:
+                if len(self._assign) < self._matrix.shape[0]:
+                    grown = np.full(self._matrix.shape[0], -1, dtype=np.int32)
+                    grown[: len(self._assign)] = self._assign
+                    self._assign = grown
+                labels = self._assign_rows(self._vectors(slice(start, self._size)))
+                self._assign[start : self._size] = labels
+                rows = np.arange(start, self._size, dtype=np.int64)
+                for label in np.unique(labels):
+                    self._lists[label] = np.concatenate((self._lists[label], rows[labels == label]))
+            else:
+                self._maybe_train()
+
+    def compact(self):
+        with self._lock:
+            keep = np.flatnonzero(self._alive[: self._size])
+            super().compact()
+            if self._centroids is not None:
+                assign = np.full(self._matrix.shape[0], -1, dtype=np.int32)
+                assign[: len(keep)] = self._assign[keep]
+                self._assign = assign
+                self._build_lists()
+
+    def query_many(self, embs: List[List[float]], top_k: int = 5, nprobe: int | None = None) -> List[List[Dict[str, Any]]]:
+        with self._lock:
+            if self._centroids is None:
+                self._maybe_train()
+            if self._centroids is None or top_k <= 0 or not len(embs):
+                return super().query_many(embs, top_k=top_k)
+            nprobe = max(1, min(nprobe or self.nprobe, len(self._centroids)))
+            queries = self._normalize(np.asarray(embs, dtype=np.float32).reshape(len(embs), -1))
+            order = np.argsort(-(queries @ self._centroids.T), axis=1)
+            alive = self._alive
+            results: List[List[Dict[str, Any]]] = []
+            for query, ranked in zip(queries, order):
+                probed = nprobe
+                rows = np.concatenate([self._lists[c] for c in ranked[:probed]])
+                rows = rows[alive[rows]]
+                # widen the probe until there are enough live candidates for top_k
+                while len(rows) < top_k and probed < len(ranked):
+                    extra = np.concatenate([self._lists[c] for c in ranked[probed : probed * 2]])
+                    rows = np.concatenate((rows, extra[alive[extra]]))
+                    probed *= 2
+                if not len(rows):
+                    results.append([])
+                    continue
+                sims = self._approx_scores(query, rows)
+                if self._full is None:
+                    results.append(self._matches(rows, sims, top_k))
+                    continue
+                pool = min(len(rows), top_k * max(1, self.rerank))
+                results.append(self._rerank(query, rows[np.argpartition(-sims, pool - 1)[:pool]], top_k))
+            return results
 
 
 class PineconeVectorStore:
@@ -74,6 +546,22 @@ class PineconeVectorStore:
             return
         self.index.delete(filter={"doc_id": {"$eq": doc_id}})
 
+    # Pinecone accepts at most 1000 ids per delete call
+    _DELETE_PAGE = 1000
+
+    def delete_ids(self, ids: List[str]):
+        ids = list(ids)
+        for start in range(0, len(ids), self._DELETE_PAGE):
+            self.index.delete(ids=ids[start : start + self._DELETE_PAGE])
+
+    def persist(self):
+        # Pinecone is durable on its own.
+        pass
+
+    def query_many(self, embs: List[List[float]], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        # the Pinecone query API takes one vector per call
+        return [self.query(emb, top_k=top_k) for emb in embs]
+
     def query(self, emb: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
         res = self.index.query(vector=emb, top_k=top_k, include_metadata=True)
         return [
@@ -84,5 +572,16 @@ class PineconeVectorStore:
 
 def get_vectorstore():
     if settings.use_memory_vectorstore or not settings.pinecone_api_key or Pinecone is None:
-        return MemoryVectorStore()
+        snapshot_dir = settings.vectorstore_snapshot_dir
+        index = (settings.vectorstore_index or "flat").lower()
+        if index not in ("flat", "ivf"):
+            raise ValueError(f"unknown VECTORSTORE_INDEX: {settings.vectorstore_index}")
+        cls = IVFVectorStore if index == "ivf" else MemoryVectorStore
+        options = {"quantization": (settings.vectorstore_quantization or "none").lower(), "rerank": settings.vectorstore_rerank}
+        store = cls.load(snapshot_dir, **options) if snapshot_dir else None
+        if store is None:
+            store = cls(snapshot_dir=snapshot_dir, **options)
+        if isinstance(store, IVFVectorStore):
+            store.nlist, store.nprobe = settings.ivf_nlist, settings.ivf_nprobe
+        return store
     return PineconeVectorStore()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar
+import asyncio
+import contextvars
+import threading
+from ..config import settings
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Bounded pool for blocking Mongo/provider calls made from async handlers."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, settings.io_max_workers), thread_name_prefix="io")
+    return _executor
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call on the I/O executor without stalling the event loop.
+
+    Context variables (e.g. the current request's timing spans) carry over to the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_io_executor(), partial(ctx.run, fn, *args, **kwargs))
+
+
+async def iterate_blocking(make_iter: Callable[[], Iterator[T]]) -> AsyncIterator[T]:
+    """Drain a blocking iterator on the I/O executor, yielding items as they arrive."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def pump():
+        try:
+            for item in make_iter():
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except BaseException as e:  # surfaced to the consumer below
+            loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+        else:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+    loop.run_in_executor(get_io_executor(), contextvars.copy_context().run, pump)
+    while True:
+        item, err = await queue.get()
+        if item is done:
+            if err is not None:
+                raise err
+            return
+        yield item
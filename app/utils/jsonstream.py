@@ -0,0 +1,105 @@
+from __future__ import annotations
+from json.decoder import scanstring
+from typing import Any, Dict, Iterator, Tuple
+import json
+import re
+
+# Incremental reading of a large top-level JSON object: every member except one
+# chosen key is decoded normally, while that key's object is walked member by
+# member so callers never hold its whole subtree at once.
+
+_WS = re.compile(r"[ \t\n\r]*")
+_TOKEN = re.compile(r'["{}\[\]]')
+_decoder = json.JSONDecoder()
+
+
+def _ws(text: str, i: int) -> int:
+    return _WS.match(text, i).end()
+
+
+def _expect(text: str, i: int, ch: str) -> int:
+    if i >= len(text) or text[i] != ch:
+        raise ValueError(f"expected {ch!r} at offset {i}")
+    return i + 1
+
+
+def skip_value(text: str, i: int) -> int:
+    """Return the offset just past the JSON value starting at ``i`` without building it."""
+    i = _ws(text, i)
+    if i >= len(text):
+        raise ValueError("unexpected end of JSON")
+    if text[i] not in "{[":
+        _value, end = _decoder.raw_decode(text, i)
+        return end
+    depth = 0
+    while True:
+        m = _TOKEN.search(text, i)
+        if m is None:
+            raise ValueError("unterminated JSON container")
+        ch = m.group()
+        if ch == '"':
+            _s, i = scanstring(text, m.end())
+            continue
+        depth += 1 if ch in "{[" else -1
+        i = m.end()
+        if depth == 0:
+            return i
+
+
+def iter_members(text: str, i: int, skip: str | None = None, close: list | None = None) -> Iterator[Tuple[str, Any, int, int]]:
+    """Yield ``(key, value, start, end)`` for members of the object at offset ``i``.
+
+    The member named ``skip`` is bracket-matched instead of decoded and is
+    yielded with a ``None`` value. If ``close`` is given, the offset just past
+    the closing brace is appended to it once the object is exhausted.
+    """
+    i = _expect(text, _ws(text, i), "{")
+    i = _ws(text, i)
+    if i < len(text) and text[i] == "}":
+        if close is not None:
+            close.append(i + 1)
+        return
+    while True:
+        i = _expect(text, i, '"')
+        key, i = scanstring(text, i)
+        i = _expect(text, _ws(text, i), ":")
+        start = _ws(text, i)
+        if key == skip:
+            value, end = None, skip_value(text, start)
+        else:
+            value, end = _decoder.raw_decode(text, start)
+        yield key, value, start, end
+        i = _ws(text, end)
+        if i < len(text) and text[i] == ",":
+            i = _ws(text, i + 1)
+            continue
+        i = _expect(text, i, "}")
+        if close is not None:
+            close.append(i)
+        return
+
+
+def split_object(text: str, stream_key: str) -> Tuple[Dict[str, Any], Iterator[Tuple[str, Any]]]:
+    """Decode a top-level object except ``stream_key``, whose members are yielded lazily.
+
+    Every byte is decoded at most once: the streamed object is only skipped
+    (bracket-matched) on the first pass and decoded member by member on demand.
+    """
+    head: Dict[str, Any] = {}
+    stream_at = None
+    close: list = []
+    for key, value, start, _end in iter_members(text, 0, skip=stream_key, close=close):
+        if key == stream_key:
+            stream_at = start
+        else:
+            head[key] = value
+    if _ws(text, close[0]) != len(text):
+        raise ValueError("extra data after JSON object")
+
+    def members() -> Iterator[Tuple[str, Any]]:
+        if stream_at is None or text[stream_at] != "{":
+            return
+        for key, value, _start, _end in iter_members(text, stream_at):
+            yield key, value
+
+    return head, members()
@@ -0,0 +1,205 @@
+from __future__ import annotations
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, rendered in Prometheus text format."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(k, list(s[0]), s[1], s[2]) for k, s in sorted(self._series.items())]
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in snapshot)
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics plus ``stats()`` providers exported as gauges."""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._providers: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), **kwargs: Any) -> Histogram:
+        metric = Histogram(name, help, labelnames, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix: str, provider: Callable[[], Dict[str, Any]]):
+        """Export the numeric values of ``provider()`` as ``<prefix>_<key>`` gauges."""
+        self._providers.append((prefix, provider))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, provider in self._providers:
+            for key, value in provider().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+STAGE_SECONDS = registry.histogram("app_stage_duration_seconds", "Time spent per pipeline stage.", ("stage",))
+REQUEST_SECONDS = registry.histogram(
+    "app_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status")
+)
+SLOW_REQUESTS = registry.counter("app_slow_requests_total", "Requests slower than SLOW_REQUEST_MS.", ("method", "route"))
+
+# spans of the request being served; None outside a request (e.g. background jobs)
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a block as ``stage``: feeds the stage histogram and the current request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def detach_request():
+    """Stop attributing spans to the current request (call at the start of background tasks)."""
+    _request_spans.set(None)
+
+
+def _summarize(spans: List[Tuple[str, float]]) -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for stage, seconds in list(spans):
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return totals
+
+
+def server_timing(spans: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in _summarize(spans).items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """Collects stage spans per HTTP request.
+
+    Adds them as a ``Server-Timing`` header, records request latency by route
+    template, and logs requests slower than ``slow_ms`` (0 disables). Streaming
+    responses report the spans finished before the first byte; the slow log
+    sees the whole stream.
+    """
+
+    def __init__(self, app: Any, slow_ms: float = 0.0):
+        self.app = app
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        spans: List[Tuple[str, float]] = []
+        token = _request_spans.set(spans)
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message: Dict[str, Any]):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                header = server_timing(spans, time.perf_counter() - started)
+                message = {**message, "headers": list(message.get("headers") or []) + [(b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_spans.reset(token)
+            elapsed = time.perf_counter() - started
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route, status=str(status["code"]))
+            if self.slow_ms > 0 and elapsed * 1000 >= self.slow_ms:
+                SLOW_REQUESTS.inc(method=scope["method"], route=route)
+                stages = " ".join(f"{k}={v * 1000:.1f}ms" for k, v in _summarize(spans).items())
+                logger.warning("slow request %s %s %.1fms %s", scope["method"], scope.get("path"), elapsed * 1000, stages)
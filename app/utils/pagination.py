@@ -0,0 +1,39 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+MAX_PAGE_SIZE = 500
+
+
+def parse_cursor(after: Optional[str]) -> Optional[ObjectId]:
+    """Decode an ``after`` cursor; raises ``ValueError`` for malformed ones."""
+    if not after:
+        return None
+    if not ObjectId.is_valid(after):
+        raise ValueError("invalid cursor")
+    return ObjectId(after)
+
+
+def keyset_page(
+    col: Any,
+    projection: Dict[str, Any],
+    limit: int,
+    after: Optional[ObjectId] = None,
+    newest_first: bool = False,
+    query: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of ``col`` ordered by ``_id``, starting after the ``after`` id.
+
+    Seeks on the ``_id`` index instead of skipping, so every page costs the
+    same however deep it is. Returns the documents and the cursor for the
+    next page (``None`` on the last page).
+    """
+    filt = dict(query or {})
+    if after is not None:
+        filt["_id"] = {"$lt" if newest_first else "$gt": after}
+    cursor = col.find(filt, projection).sort("_id", DESCENDING if newest_first else ASCENDING).limit(limit + 1)
+    docs = list(cursor)
+    more = len(docs) > limit
+    docs = docs[:limit]
+    return docs, (str(docs[-1]["_id"]) if more and docs else None)
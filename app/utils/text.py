@@ -33,3 +33,16 @@ def chunk_text(text: str, max_len: int = 1200, overlap: int = 200) -> List[str]:
 
 def clean_markdown(md: str) -> str:
     return md.replace("\r\n", "\n").strip()
+
+
+_TOKEN = re.compile(r"[A-Za-z]+|[0-9]+|[^\sA-Za-z0-9]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap BPE-ish token estimate: words, digit runs and punctuation each count as one.
+
+    Long words count extra since BPE splits them (~4 chars per token).
+    """
+    if not text:
+        return 0
+    return sum(1 + (len(t) - 1) // 4 for t in _TOKEN.findall(text))
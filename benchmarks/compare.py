@@ -0,0 +1,104 @@
+"""Compare two ``benchmarks.run`` JSON reports metric by metric.
+
+    python -m benchmarks.compare base.json head.json [--threshold 10]
+
+Exits with status 1 when any metric regressed by more than ``--threshold``
+percent (latencies, durations and memory going up; throughput going down).
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+# leaf keys where bigger is better; other timed/sized metrics are better smaller
+HIGHER_IS_BETTER = ("_per_s", "snippet_fast_path_rate", "recall")
+LOWER_IS_BETTER = ("_ms", "_s", "_mb", "errors", "bytes_per_vector")
+# durations this small in both runs are timer noise and are never judged
+NOISE_FLOOR_MS = 5.0
+# identify rows of list sections by these keys instead of position
+ROW_KEYS = ("paths", "vectors", "corpus_paths", "nprobe", "mode")
+
+
+def _row_label(row: Dict[str, Any], index: int) -> str:
+    for key in ROW_KEYS:
+        if key in row:
+            return f"{key}={row[key]}"
+    return str(index)
+
+
+def flatten(node: Any, prefix: str = "") -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "meta":
+                continue
+            out.update(flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(node, list):
+        for i, value in enumerate(node):
+            label = _row_label(value, i) if isinstance(value, dict) else str(i)
+            out.update(flatten(value, f"{prefix}[{label}]"))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        out[prefix] = float(node)
+    return out
+
+
+def direction(metric: str) -> Optional[int]:
+    """+1 if higher is better, -1 if lower is better, None if not a performance metric."""
+    leaf = metric.rsplit(".", 1)[-1]
+    if leaf.endswith(HIGHER_IS_BETTER):
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def _below_noise(metric: str, old: float, new: float) -> bool:
+    leaf = metric.rsplit(".", 1)[-1]
+    scale = 1000.0 if leaf.endswith("_s") and not leaf.endswith("_per_s") else 1.0 if leaf.endswith("_ms") else None
+    return scale is not None and max(old, new) * scale < NOISE_FLOOR_MS
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> Tuple[List[Tuple[str, float, float, float, str]], int]:
+    """Rows of ``(metric, base, head, change %, verdict)`` and the number of regressions."""
+    a, b = flatten(base), flatten(head)
+    rows = []
+    regressions = 0
+    for metric in sorted(set(a) & set(b)):
+        sign = direction(metric)
+        if sign is None:
+            continue
+        old, new = a[metric], b[metric]
+        change = ((new - old) / old * 100) if old else 0.0
+        verdict = ""
+        if abs(change) > threshold and not _below_noise(metric, old, new):
+            better = change * sign > 0
+            verdict = "better" if better else "REGRESSED"
+            regressions += 0 if better else 1
+        rows.append((metric, old, new, change, verdict))
+    return rows, regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change that counts as a regression")
+    args = parser.parse_args(argv)
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+    if base.get("meta", {}).get("args") != head.get("meta", {}).get("args"):
+        print("warning: the runs used different arguments; only same-named rows are comparable\n")
+    rows, regressions = compare(base, head, args.threshold)
+    width = max((len(r[0]) for r in rows), default=10)
+    print(f"{'metric':<{width}}  {'base':>12}  {'head':>12}  {'change':>8}")
+    for metric, old, new, change, verdict in rows:
+        print(f"{metric:<{width}}  {old:>12.3f}  {new:>12.3f}  {change:>+7.1f}%  {verdict}")
+    print(f"\n{regressions} regression(s) over {args.threshold:g}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
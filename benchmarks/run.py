@@ -0,0 +1,383 @@
+"""Offline benchmark suite: ingest throughput, /qa latency, vector query scaling, ANN and quantization recall, peak memory.
+
+Runs against mongomock, the in-memory vector store and the fake embedding/LLM
+providers, so no network or services are needed::
+
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --sizes 10,100,1000,10000 --qa-requests 500 --concurrency 16
+    python -m benchmarks.compare old.json new.json
+
+Results are JSON (see ``main``) so runs can be diffed with ``benchmarks.compare``.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+# must be set before the app reads its settings
+for _key, _value in {
+    "USE_MOCK_DB": "1",
+    "USE_FAKE_EMBEDDINGS": "1",
+    "USE_MEMORY_VECTORSTORE": "1",
+    "OPENAI_API_KEY": "",
+    "GEMINI_API_KEY": "",
+    "PINECONE_API_KEY": "",
+    "VECTORSTORE_SNAPSHOT_DIR": "",
+    # measure the pipeline, not cache hits
+    "ANSWER_CACHE_ENABLED": "0",
+    "EMBEDDING_CACHE_PERSIST": "0",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import numpy as np  # noqa: E402
+
+from .synthetic import generate_spec_bytes, questions_for  # noqa: E402
+
+
+def _rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return round(float(np.percentile(np.asarray(values), q)), 3)
+
+
+def _latency_summary(ms: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "p50_ms": _pct(ms, 50),
+        "p95_ms": _pct(ms, 95),
+        "p99_ms": _pct(ms, 99),
+        "max_ms": round(max(ms), 3) if ms else 0.0,
+    }
+
+
+def bench_ingest(sizes: List[int], trace_memory: bool) -> List[Dict[str, Any]]:
+    """Parse + chunk, then store + embed + upsert, one synthetic spec per size; deleted afterwards."""
+    from bson import ObjectId
+    from app.config import settings
+    from app.services.ingest import store_and_index
+    from app.services.openapi_utils import parse_upload
+    from app.services.qa import delete_docs
+
+    results = []
+    for n in sizes:
+        raw, _ops = generate_spec_bytes(n, seed=n)
+        if trace_memory:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        parsed = parse_upload(f"bench-{n}.json", raw, settings.openapi_ref_depth, settings.ingest_stream_min_bytes)
+        t1 = time.perf_counter()
+        parse_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        result = store_and_index(parsed, raw)
+        t2 = time.perf_counter()
+        chunks = len(parsed["chunks"])
+        delete_docs([ObjectId(result["doc_id"])])
+        t3 = time.perf_counter()
+        row = {
+            "paths": n,
+            "spec_bytes": len(raw),
+            "chunks": chunks,
+            "parse_s": round(t1 - t0, 4),
+            "index_s": round(t2 - t1, 4),
+            "delete_s": round(t3 - t2, 4),
+            "chunks_per_s": round(chunks / (t2 - t0), 1) if t2 > t0 else 0.0,
+            "rss_peak_mb": _rss_mb(),
+        }
+        if parse_peak is not None:
+            row["parse_peak_mb"] = round(parse_peak / (1024 * 1024), 1)
+        results.append(row)
+        print(f"ingest {n:>6} paths: {chunks} chunks, {row['chunks_per_s']} chunks/s", file=sys.stderr)
+    return results
+
+
+async def _qa_load(questions: List[str], concurrency: int) -> Dict[str, Any]:
+    import httpx
+    from app.main import app
+
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for q in questions:
+        queue.put_nowait(q)
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal errors
+        while True:
+            try:
+                q = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            resp = await client.post("/qa", json={"question": q})
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if resp.status_code != 200:
+                errors += 1
+            for part in resp.headers.get("server-timing", "").split(","):
+                name, _, dur = part.strip().partition(";dur=")
+                if dur:
+                    stages.setdefault(name, []).append(float(dur))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+    return {
+        **_latency_summary(latencies),
+        "errors": errors,
+        "requests_per_s": round(len(latencies) / wall, 1) if wall > 0 else 0.0,
+        "stages_mean_ms": {k: round(statistics.fmean(v), 3) for k, v in sorted(stages.items())},
+    }
+
+
+def bench_qa(corpus_paths: int, n_requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    """Concurrent POST /qa against an in-process app over a corpus of ``corpus_paths`` paths."""
+    from app.config import settings
+    from app.services.ingest import store_and_index
+    from app.services.openapi_utils import parse_upload
+    from app.services.snippets import snippet_stats
+
+    raw, ops = generate_spec_bytes(corpus_paths, seed=7)
+    store_and_index(parse_upload("bench-qa.json", raw, settings.openapi_ref_depth, settings.ingest_stream_min_bytes), raw)
+    questions = questions_for(ops, warmup + n_requests, seed=11)
+    asyncio.run(_qa_load(questions[:warmup], concurrency))
+    before = snippet_stats.stats()
+    result = asyncio.run(_qa_load(questions[warmup:], concurrency))
+    after = snippet_stats.stats()
+    fast = after["fast_path"] - before["fast_path"]
+    total = fast + after["llm"] - before["llm"]
+    print(f"qa {corpus_paths} paths x{concurrency}: p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms", file=sys.stderr)
+    return {
+        "corpus_paths": corpus_paths,
+        "concurrency": concurrency,
+        "snippet_fast_path_rate": round(fast / total, 3) if total else 0.0,
+        **result,
+        "rss_peak_mb": _rss_mb(),
+    }
+
+
+async def _qa_batch_load(questions: List[str], batch_size: int) -> Dict[str, Any]:
+    import httpx
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    latencies: List[float] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        for start in range(0, len(questions), batch_size):
+            t0 = time.perf_counter()
+            resp = await client.post("/qa/batch", json={"questions": questions[start : start + batch_size]})
+            resp.raise_for_status()
+            latencies.append((time.perf_counter() - t0) * 1000)
+        wall = time.perf_counter() - started
+    return {"batch_size": batch_size, "batches": len(latencies), **_latency_summary(latencies), "questions_per_s": round(len(questions) / wall, 1)}
+
+
+def bench_qa_batch(corpus_paths: int, n_requests: int, batch_size: int) -> Dict[str, Any]:
+    """Sequential POST /qa/batch calls over the same corpus as :func:`bench_qa`, with fresh questions."""
+    from app.config import settings
+    from app.services.ingest import store_and_index
+    from app.services.openapi_utils import parse_upload
+
+    raw, ops = generate_spec_bytes(corpus_paths, seed=7)
+    # a no-op when bench_qa already loaded this corpus (same content hash)
+    store_and_index(parse_upload("bench-qa.json", raw, settings.openapi_ref_depth, settings.ingest_stream_min_bytes), raw)
+    questions = questions_for(ops, n_requests, seed=13)
+    result = asyncio.run(_qa_batch_load(questions, batch_size))
+    print(f"qa batch {corpus_paths} paths x{batch_size}: {result['questions_per_s']} questions/s", file=sys.stderr)
+    return {"corpus_paths": corpus_paths, **result, "rss_peak_mb": _rss_mb()}
+
+
+def bench_vector_query(sizes: List[int], dim: int, queries: int, top_k: int) -> List[Dict[str, Any]]:
+    """``MemoryVectorStore.query`` latency as the index grows (random unit vectors)."""
+    from app.services.vectorstore import MemoryVectorStore
+
+    rng = np.random.default_rng(0)
+    results = []
+    for n in sizes:
+        store = MemoryVectorStore()
+        vectors = rng.standard_normal((n, dim), dtype=np.float32)
+        t0 = time.perf_counter()
+        batch = 10_000
+        for start in range(0, n, batch):
+            store.upsert([(f"v{i}", vectors[i], {"doc_id": f"d{i % 100}"}) for i in range(start, min(n, start + batch))])
+        build_s = time.perf_counter() - t0
+        probes = rng.standard_normal((queries, dim), dtype=np.float32)
+        ms = []
+        for q in probes:
+            t = time.perf_counter()
+            store.query(q.tolist(), top_k=top_k)
+            ms.append((time.perf_counter() - t) * 1000)
+        results.append({"vectors": n, "dim": dim, "build_s": round(build_s, 3), **_latency_summary(ms), "rss_peak_mb": _rss_mb()})
+        print(f"vector query {n:>7}: p50 {results[-1]['p50_ms']} ms", file=sys.stderr)
+        del store, vectors
+    return results
+
+
+def _clustered_vectors(rng: np.random.Generator, n: int, dim: int, noise: float) -> np.ndarray:
+    """Gaussian-mixture vectors (one centre per 100 rows); ``noise`` around 3 is as hard as uniform random data."""
+    centres = rng.standard_normal((max(1, n // 100), dim), dtype=np.float32)
+    return centres[rng.integers(0, len(centres), n)] + noise * rng.standard_normal((n, dim), dtype=np.float32)
+
+
+def _recall(exact: List[List[str]], approx: List[List[str]]) -> float:
+    hits = sum(len(set(e) & set(a)) for e, a in zip(exact, approx))
+    return round(hits / max(1, sum(len(e) for e in exact)), 4)
+
+
+def _timed_queries(store: Any, probes: np.ndarray, top_k: int, **kwargs: Any):
+    ids, ms = [], []
+    for q in probes:
+        t = time.perf_counter()
+        matches = store.query_many([q.tolist()], top_k=top_k, **kwargs)[0]
+        ms.append((time.perf_counter() - t) * 1000)
+        ids.append([m["id"] for m in matches])
+    return ids, ms
+
+
+def bench_vector_ann(n: int, dim: int, queries: int, top_k: int, nprobes: List[int], noise: float) -> Dict[str, Any]:
+    """``IVFVectorStore`` recall@k and latency per ``nprobe`` against exact search on clustered vectors."""
+    from app.services.vectorstore import IVFVectorStore, MemoryVectorStore
+
+    rng = np.random.default_rng(1)
+    vectors = _clustered_vectors(rng, n, dim, noise)
+    # queries near stored rows, like questions near the chunks that answer them
+    probes = vectors[rng.integers(0, n, queries)] + 0.5 * noise * rng.standard_normal((queries, dim), dtype=np.float32)
+    exact_store, ivf = MemoryVectorStore(), IVFVectorStore()
+    build: Dict[str, float] = {}
+    for name, store in (("exact", exact_store), ("ivf", ivf)):
+        t0 = time.perf_counter()
+        for start in range(0, n, 10_000):
+            store.upsert([(f"v{i}", vectors[i], {"doc_id": f"d{i % 100}"}) for i in range(start, min(n, start + 10_000))])
+        if store is ivf:
+            ivf.train()
+        build[name] = round(time.perf_counter() - t0, 3)
+    exact, exact_ms = _timed_queries(exact_store, probes, top_k)
+    rows = []
+    for nprobe in nprobes:
+        got, ms = _timed_queries(ivf, probes, top_k, nprobe=nprobe)
+        rows.append({"nprobe": nprobe, "recall": _recall(exact, got), **_latency_summary(ms)})
+        print(f"ivf {n} nprobe {nprobe:>3}: recall@{top_k} {rows[-1]['recall']}, p50 {rows[-1]['p50_ms']} ms", file=sys.stderr)
+    return {
+        "vectors": n, "dim": dim, "top_k": top_k, "noise": noise, "nlist": len(ivf._lists),
+        "exact_build_s": build["exact"], "ivf_build_s": build["ivf"],
+        "exact": _latency_summary(exact_ms), "ivf": rows, "rss_peak_mb": _rss_mb(),
+    }
+
+
+def bench_vector_quantization(n: int, dim: int, queries: int, top_k: int, noise: float, rerank: List[int]) -> List[Dict[str, Any]]:
+    """Bytes per vector, recall@k and latency of quantized ``MemoryVectorStore`` modes against float32."""
+    from app.services.vectorstore import MemoryVectorStore
+
+    rng = np.random.default_rng(2)
+    vectors = _clustered_vectors(rng, n, dim, noise)
+    probes = vectors[rng.integers(0, n, queries)] + 0.5 * noise * rng.standard_normal((queries, dim), dtype=np.float32)
+    rows: List[Dict[str, Any]] = []
+    exact: List[List[str]] = []
+    for quantization, factor in [("none", 1)] + [(q, r) for q in ("float16", "int8") for r in rerank]:
+        store = MemoryVectorStore(quantization=quantization, rerank=factor)
+        for start in range(0, n, 10_000):
+            store.upsert([(f"v{i}", vectors[i], {"doc_id": f"d{i % 100}"}) for i in range(start, min(n, start + 10_000))])
+        ids, ms = _timed_queries(store, probes, top_k)
+        exact = exact or ids
+        rows.append({
+            "mode": f"{quantization}/rerank={factor}", "bytes_per_vector": store.bytes_per_vector,
+            "recall": _recall(exact, ids), **_latency_summary(ms),
+        })
+        print(f"quantization {rows[-1]['mode']}: {store.bytes_per_vector} B/vector, recall@{top_k} {rows[-1]['recall']}, p50 {rows[-1]['p50_ms']} ms", file=sys.stderr)
+        del store
+    return rows
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: List[str] | None = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=_ints, default=[10, 100, 1000, 10000], help="spec sizes in paths for the ingest benchmark")
+    parser.add_argument("--qa-paths", type=int, default=1000, help="corpus size (paths) for the /qa benchmark")
+    parser.add_argument("--qa-requests", type=int, default=300)
+    parser.add_argument("--qa-warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent /qa clients")
+    parser.add_argument("--batch-size", type=int, default=50, help="questions per /qa/batch call")
+    parser.add_argument("--vector-sizes", type=_ints, default=[1000, 10000, 100000])
+    parser.add_argument("--vector-dim", type=int, default=384)
+    parser.add_argument("--vector-queries", type=int, default=200)
+    parser.add_argument("--ann-vectors", type=int, default=100000, help="corpus size for the IVF recall/latency sweep")
+    parser.add_argument("--ann-nprobe", type=_ints, default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument("--ann-noise", type=float, default=2.0, help="cluster spread of the synthetic ANN vectors")
+    parser.add_argument("--quant-rerank", type=_ints, default=[1, 4], help="re-rank factors for the quantization benchmark")
+    parser.add_argument("--trace-memory", action="store_true", help="also report tracemalloc peak while parsing (slower)")
+    parser.add_argument("--skip", default="", help="comma-separated sections to skip: ingest,qa,qa_batch,vector,ann,quant")
+    parser.add_argument("--out", help="write JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+    skip = {s.strip() for s in args.skip.split(",") if s.strip()}
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k != "out"},
+        }
+    }
+    if "ingest" not in skip:
+        report["ingest"] = bench_ingest(args.sizes, args.trace_memory)
+    if "qa" not in skip:
+        report["qa"] = bench_qa(args.qa_paths, args.qa_requests, args.concurrency, args.qa_warmup)
+    if "qa_batch" not in skip:
+        report["qa_batch"] = bench_qa_batch(args.qa_paths, args.qa_requests, args.batch_size)
+    if "vector" not in skip:
+        report["vector_query"] = bench_vector_query(args.vector_sizes, args.vector_dim, args.vector_queries, top_k=20)
+    if "ann" not in skip:
+        report["vector_ann"] = bench_vector_ann(
+            args.ann_vectors, args.vector_dim, args.vector_queries, top_k=10, nprobes=args.ann_nprobe, noise=args.ann_noise
+        )
+    if "quant" not in skip:
+        report["vector_quantization"] = bench_vector_quantization(
+            args.ann_vectors, args.vector_dim, args.vector_queries, top_k=10, noise=args.ann_noise, rerank=args.quant_rerank
+        )
+    report["rss_peak_mb"] = _rss_mb()
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Deterministic synthetic OpenAPI 3 specs for benchmarks.
+
+Specs are built from a fixed vocabulary of resources with collection and item
+paths, CRUD operations, shared component schemas with nested ``$ref``s, and
+path/query/header parameters, so chunking, ref inlining and retrieval do
+realistic work at any size.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+import json
+import random
+
+RESOURCES = [
+    "invoice", "customer", "refund", "payment", "plan", "coupon", "order", "shipment", "webhook", "account",
+    "subscription", "product", "price", "tax_rate", "dispute", "payout", "transfer", "balance", "card", "session",
+]
+ACTIONS = ["archive", "restore", "approve", "cancel", "export", "verify", "retry", "close", "reopen", "sync"]
+FIELD_TYPES = [
+    {"type": "string"},
+    {"type": "string", "format": "date-time"},
+    {"type": "integer", "format": "int64"},
+    {"type": "number"},
+    {"type": "boolean"},
+    {"type": "string", "enum": ["active", "pending", "closed"]},
+]
+
+
+def _title(name: str) -> str:
+    return "".join(part.title() for part in name.split("_"))
+
+
+def _schemas(rng: random.Random, resources: List[str]) -> Dict[str, Any]:
+    schemas: Dict[str, Any] = {
+        "Error": {"type": "object", "required": ["code"], "properties": {"code": {"type": "string"}, "message": {"type": "string"}}},
+        "Metadata": {"type": "object", "additionalProperties": {"type": "string"}},
+        "Address": {
+            "type": "object",
+            "properties": {k: {"type": "string"} for k in ("line1", "city", "postal_code", "country")},
+        },
+    }
+    for res in resources:
+        props: Dict[str, Any] = {"id": {"type": "string", "example": f"{res[:3]}_123"}}
+        for i in range(rng.randint(4, 12)):
+            props[f"{res}_field_{i}"] = dict(rng.choice(FIELD_TYPES), description=f"Field {i} of the {res}.")
+        props["metadata"] = {"$ref": "#/components/schemas/Metadata"}
+        if rng.random() < 0.4:
+            props["address"] = {"$ref": "#/components/schemas/Address"}
+        if res != "customer":
+            props["customer"] = {"$ref": "#/components/schemas/Customer"}
+        schemas[_title(res)] = {"type": "object", "required": ["id"], "properties": props, "description": f"A {res} object."}
+        schemas[f"{_title(res)}List"] = {
+            "type": "object",
+            "properties": {"data": {"type": "array", "items": {"$ref": f"#/components/schemas/{_title(res)}"}}, "has_more": {"type": "boolean"}},
+        }
+    return schemas
+
+
+def _json(ref: str) -> Dict[str, Any]:
+    return {"application/json": {"schema": {"$ref": ref}}}
+
+
+def _operation(op_id: str, summary: str, res: str, response_ref: str, **extra: Any) -> Dict[str, Any]:
+    op = {
+        "operationId": op_id,
+        "summary": summary,
+        "description": f"{summary}. Requires an API key with access to {res.replace('_', ' ')}s.",
+        "tags": [res],
+        "responses": {
+            "200": {"description": "OK", "content": _json(response_ref)},
+            "4XX": {"description": "Client error", "content": _json("#/components/schemas/Error")},
+        },
+    }
+    op.update(extra)
+    return op
+
+
+def path_items(n_paths: int, seed: int = 0) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+    """``n_paths`` path items plus a list of ``{method, path, operation_id, summary}`` for query generation."""
+    rng = random.Random(seed)
+    paths: Dict[str, Any] = {}
+    ops: List[Dict[str, str]] = []
+    i = 0
+    while len(paths) < n_paths:
+        res = RESOURCES[i % len(RESOURCES)]
+        version = i // len(RESOURCES)
+        base = f"/v{version + 1}/{res}s" if version < 3 else f"/v1/{res}s/{version}/items"
+        noun = res.replace("_", " ")
+        ref = f"#/components/schemas/{_title(res)}"
+        kind = i % 3
+        tag = _title(res) + (str(version) if version else "")
+        if kind == 0:
+            path, item = base, {
+                "get": _operation(f"list{tag}s", f"List {noun}s", res, f"{ref}List", parameters=[
+                    {"name": "limit", "in": "query", "schema": {"type": "integer", "default": 20}},
+                    {"name": "starting_after", "in": "query", "schema": {"type": "string"}},
+                ]),
+                "post": _operation(f"create{tag}", f"Create a {noun}", res, ref, requestBody={"required": True, "content": _json(ref)}, parameters=[
+                    {"name": "Idempotency-Key", "in": "header", "required": rng.random() < 0.5, "schema": {"type": "string"}},
+                ]),
+            }
+        elif kind == 1:
+            param = {"name": f"{res}_id", "in": "path", "required": True, "schema": {"type": "string"}}
+            path, item = f"{base}/{{{res}_id}}", {
+                "parameters": [param],
+                "get": _operation(f"get{tag}", f"Retrieve a {noun}", res, ref),
+                "patch": _operation(f"update{tag}", f"Update a {noun}", res, ref, requestBody={"content": _json(ref)}),
+                "delete": _operation(f"delete{tag}", f"Delete a {noun}", res, "#/components/schemas/Error"),
+            }
+        else:
+            action = ACTIONS[(i // 3) % len(ACTIONS)]
+            param = {"name": f"{res}_id", "in": "path", "required": True, "schema": {"type": "string"}}
+            path, item = f"{base}/{{{res}_id}}/{action}", {
+                "parameters": [param],
+                "post": _operation(f"{action}{tag}", f"{action.title()} a {noun}", res, ref),
+            }
+        if path not in paths:
+            paths[path] = item
+            for method, op in item.items():
+                if method != "parameters":
+                    ops.append({"method": method.upper(), "path": path, "operation_id": op["operationId"], "summary": op["summary"]})
+        i += 1
+    return paths, ops
+
+
+def generate_spec(n_paths: int, seed: int = 0) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+    """A complete OpenAPI 3.0 document with ``n_paths`` paths, and its operation list."""
+    rng = random.Random(seed)
+    paths, ops = path_items(n_paths, seed)
+    spec = {
+        "openapi": "3.0.3",
+        "info": {"title": f"Synthetic API ({n_paths} paths)", "version": "1.0.0", "description": "Generated for benchmarks."},
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": paths,
+        "components": {"schemas": _schemas(rng, RESOURCES)},
+    }
+    return spec, ops
+
+
+def generate_spec_bytes(n_paths: int, seed: int = 0) -> Tuple[bytes, List[Dict[str, str]]]:
+    spec, ops = generate_spec(n_paths, seed)
+    return json.dumps(spec).encode("utf-8"), ops
+
+
+def questions_for(ops: List[Dict[str, str]], n: int, seed: int = 0) -> List[str]:
+    """Natural-ish questions about random operations (unique, so answer caches do not hide work)."""
+    rng = random.Random(seed)
+    templates = ["How do I {s}?", "What is the endpoint to {s}?", "Show me how to {s} with curl", "{s} example #{i}"]
+    out = []
+    for i in range(n):
+        op = rng.choice(ops)
+        out.append(rng.choice(templates).format(s=op["summary"].lower(), i=i) + f" ({i})")
+    return out
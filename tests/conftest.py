@@ -1,6 +1,12 @@
+import os
 import sys
 from pathlib import Path
 
+# run offline whatever file is collected first: these must be set before app.config is imported
+os.environ.setdefault("USE_MOCK_DB", "1")
+os.environ.setdefault("USE_MEMORY_VECTORSTORE", "1")
+os.environ.setdefault("USE_FAKE_EMBEDDINGS", "1")
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
@@ -0,0 +1,29 @@
+from app.services.answer_cache import AnswerCache
+
+
+def _result(text):
+    return {"answer": text, "citations": [], "snippets": []}
+
+
+def test_exact_and_near_duplicate_hits():
+    cache = AnswerCache(max_entries=10, ttl=60, threshold=0.9)
+    cache.put("How do I create an invoice?", [1.0, 0.0, 0.0], _result("a"), {"d1"})
+    assert cache.get_exact("  how do i create an INVOICE ") == _result("a")
+    assert cache.get_similar([0.99, 0.05, 0.0]) == _result("a")
+    assert cache.get_similar([0.0, 1.0, 0.0]) is None
+
+
+def test_invalidation_ttl_and_lru():
+    cache = AnswerCache(max_entries=2, ttl=60, threshold=0.9)
+    cache.put("a", [1.0, 0.0], _result("a"), {"d1"})
+    cache.put("b", [0.0, 1.0], _result("b"), {"d2"})
+    cache.invalidate_doc("d1")
+    assert cache.get_exact("a") is None and cache.get_exact("b") is not None
+
+    cache.put("c", [1.0, 1.0], _result("c"), {"d3"})
+    cache.put("d", [1.0, -1.0], _result("d"), {"d3"})
+    assert cache.get_exact("b") is None  # evicted
+
+    expired = AnswerCache(max_entries=2, ttl=-1, threshold=0.9)
+    expired.put("a", [1.0], _result("a"), set())
+    assert expired.get_exact("a") is None
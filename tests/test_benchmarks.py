@@ -0,0 +1,26 @@
+from app.services.openapi_utils import parse_upload
+from benchmarks.compare import compare
+from benchmarks.synthetic import generate_spec_bytes, questions_for
+
+
+def test_synthetic_spec_sizes_and_parses():
+    raw, ops = generate_spec_bytes(50, seed=3)
+    assert generate_spec_bytes(50, seed=3)[0] == raw
+    parsed = parse_upload("synthetic.json", raw)
+    assert len(parsed["chunks"]) == len(ops) + 1  # one per operation plus the overview
+    assert len({(o["method"], o["path"]) for o in ops}) == len(ops)
+    assert len({o["path"] for o in ops}) == 50
+    assert len(set(questions_for(ops, 20))) == 20
+
+
+def test_compare_flags_regressions_by_direction():
+    base = {"meta": {}, "ingest": [{"paths": 10, "chunks_per_s": 100.0, "index_s": 1.0}], "qa": {"p95_ms": 50.0}}
+    head = {"meta": {}, "ingest": [{"paths": 10, "chunks_per_s": 80.0, "index_s": 0.5}], "qa": {"p95_ms": 52.0}}
+    rows, regressions = compare(base, head, threshold=10)
+    verdicts = {metric: verdict for metric, *_rest, verdict in rows}
+    assert verdicts == {
+        "ingest[paths=10].chunks_per_s": "REGRESSED",
+        "ingest[paths=10].index_s": "better",
+        "qa.p95_ms": "",
+    }
+    assert regressions == 1
@@ -0,0 +1,71 @@
+from bson import ObjectId
+
+from app.db import blobs_col, chunks_col, docs_col
+from app.services import blobs
+from app.services.blobs import get_catalog_blob, get_content, migrate_inline_content, put_catalog, put_content
+from app.services.catalog import decode_catalog, encode_catalog, get_catalog
+
+
+def test_content_round_trip_across_parts(monkeypatch):
+    monkeypatch.setattr(blobs, "PART_BYTES", 64)
+    _id = docs_col.insert_one({"name": "blob.json", "type": "openapi"}).inserted_id
+    text = '{"openapi": "3.0.0", "paths": {}}' + "".join(f"{i:x}" for i in range(5000))
+    for codec in ("zlib", "lzma"):
+        meta = put_content(_id, text, codec=codec)
+        docs_col.update_one({"_id": _id}, {"$set": meta})
+        assert meta["content_size"] == len(text) and meta["content_stored"] < len(text)
+        assert blobs_col.count_documents({"doc_id": _id}) > 1
+        assert get_content(_id) == text
+
+
+def test_catalog_parts_are_separate_from_content(monkeypatch):
+    monkeypatch.setattr(blobs, "PART_BYTES", 64)
+    _id = docs_col.insert_one({"name": "cat.json", "type": "openapi"}).inserted_id
+    data = {"operations": [{"method": "GET", "path": f"/items/{i}"} for i in range(50)]}
+    docs_col.update_one({"_id": _id}, {"$set": put_catalog(_id, encode_catalog(data))})
+    docs_col.update_one({"_id": _id}, {"$set": put_content(_id, "x" * 500, codec="none")})
+    assert blobs_col.count_documents({"doc_id": _id, "kind": "catalog"}) > 1
+    assert decode_catalog(get_catalog_blob(_id)) == data
+    assert get_content(_id) == "x" * 500
+    assert "catalog" not in docs_col.find_one({"_id": _id})
+
+
+def test_replacing_content_never_exposes_a_partial_body(monkeypatch):
+    monkeypatch.setattr(blobs, "PART_BYTES", 64)
+    _id = docs_col.insert_one({"name": "swap.json", "type": "openapi"}).inserted_id
+    first = put_content(_id, "a" * 500, codec="none")["content_version"]
+
+    # a writer that dies after writing its parts but before switching the doc over
+    switch = blobs.docs_col.find_one_and_update
+
+    def crash(*_args, **_kwargs):
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(blobs.docs_col, "find_one_and_update", crash)
+    try:
+        put_content(_id, "b" * 300, codec="none")
+    except RuntimeError:
+        pass
+    assert get_content(_id) == "a" * 500
+
+    monkeypatch.setattr(blobs.docs_col, "find_one_and_update", switch)
+    put_content(_id, "c" * 300, codec="none")
+    assert get_content(_id) == "c" * 300
+    assert blobs_col.count_documents({"doc_id": _id, "version": first}) == 0
+
+
+def test_migrate_inline_content():
+    catalog = encode_catalog({"operations": [], "schemas": {}, "servers": []})
+    _id = docs_col.insert_one(
+        {"name": "legacy.json", "type": "openapi", "content": '{"openapi": "3.0.0"}', "catalog": catalog}
+    ).inserted_id
+    chunks_col.insert_one({"_id": ObjectId(), "doc_id": _id, "fragment": "spec", "text": '{"openapi": "3.0.0"}'})
+
+    result = migrate_inline_content()
+    assert result["docs_moved"] >= 1 and result["catalogs_moved"] >= 1 and result["spec_chunks_dropped"] >= 1
+    doc = docs_col.find_one({"_id": _id})
+    assert "content" not in doc and "catalog" not in doc and doc["content_codec"] and doc["catalog_stored"]
+    assert get_catalog(_id) is not None
+    assert get_content(_id) == '{"openapi": "3.0.0"}'
+    assert chunks_col.count_documents({"doc_id": _id}) == 0
+    assert migrate_inline_content() == {"docs_moved": 0, "catalogs_moved": 0, "spec_chunks_dropped": 0}
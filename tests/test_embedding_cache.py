@@ -0,0 +1,52 @@
+import mongomock
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache, cache_key
+from app.services import embedding_cache as ec
+
+
+def test_cache_only_embeds_misses(monkeypatch):
+    cache = EmbeddingCache(max_entries=2, collection=mongomock.MongoClient().db.cache)
+    monkeypatch.setattr(ec, "embedding_cache", cache)
+    calls = []
+
+    def fake_embed(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    out = ec.cached_embed("p", "m", ["a", "bb", "a"], fake_embed)
+    assert out == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert calls == [["a", "bb"]]
+
+    out = ec.cached_embed("p", "m", ["bb", "ccc"], fake_embed)
+    assert out[0] == [2.0, 1.0]
+    assert calls[-1] == ["ccc"]
+
+    # "a" was evicted from the LRU but is still served by the Mongo tier
+    cache.clear()
+    ec.cached_embed("p", "m", ["a"], fake_embed)
+    assert calls[-1] == ["ccc"]
+    stats = cache.stats()
+    assert stats["persistent_hits"] == 1 and stats["misses"] == 3
+
+
+def test_cache_key_separates_models():
+    assert cache_key("openai", "a", "x") != cache_key("openai", "b", "x")
+
+
+def test_cache_holds_float32_and_persists_with_expiry(monkeypatch):
+    from app import db
+    from app.config import settings
+
+    col = mongomock.MongoClient().db.cache
+    cache = EmbeddingCache(max_entries=4, collection=col)
+    cache.put_many({"k": [0.5, 0.25]})
+    assert cache._lru["k"].dtype == np.float32
+    assert col.find_one({"_id": "k"})["created_at"] is not None
+
+    monkeypatch.setattr(db, "embeddings_cache_col", col)
+    monkeypatch.setattr(settings, "embedding_cache_ttl", 60.0)
+    db.ensure_indexes()
+    monkeypatch.setattr(settings, "embedding_cache_ttl", 120.0)
+    db.ensure_indexes()
+    assert col.index_information()["created_at_ttl"]["expireAfterSeconds"] == 120
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services import embeddings
+
+
+def test_split_batches_respects_items_and_tokens():
+    texts = ["x" * 40] * 10  # ~11 tokens each
+    assert embeddings._split_batches(texts, max_items=4, max_tokens=1000) == [(0, 4), (4, 8), (8, 10)]
+    assert embeddings._split_batches(texts, max_items=100, max_tokens=25) == [(0, 2), (2, 4), (4, 6), (6, 8), (8, 10)]
+    # a single oversized item still gets its own batch
+    assert embeddings._split_batches(["y" * 1000], max_items=4, max_tokens=10) == [(0, 1)]
+
+
+def test_run_batched_keeps_order_and_retries(monkeypatch):
+    monkeypatch.setitem(embeddings._BATCH_LIMITS, "openai", {"max_items": 3, "max_tokens": 10_000})
+    monkeypatch.setattr(settings, "embedding_retry_backoff", 0.0)
+    failed = set()
+
+    def flaky(batch):
+        if batch[0] not in failed:
+            failed.add(batch[0])
+            raise RuntimeError("transient")
+        return [[float(t)] for t in batch]
+
+    texts = [str(i) for i in range(10)]
+    assert embeddings._run_batched("openai", texts, flaky) == [[float(i)] for i in range(10)]
+
+
+def test_run_batched_raises_after_retries(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_retry_backoff", 0.0)
+
+    def broken(batch):
+        raise RuntimeError("down")
+
+    with pytest.raises(embeddings.EmbeddingError):
+        embeddings._run_batched("openai", ["a"], broken)
+
+
+def test_local_embeddings_are_deterministic_and_rank_related_text_first():
+    from app.services.local_embeddings import DIM, local_embed
+
+    docs = [
+        "POST /v1/invoices createInvoice: Create an invoice for a customer",
+        "DELETE /v1/refunds/{refund_id} deleteRefund: Delete a refund",
+        "GET /v1/customers listCustomers: List customers with pagination",
+    ]
+    vecs = np.array(local_embed(docs))
+    assert vecs.shape == (3, DIM)
+    assert np.allclose(np.linalg.norm(vecs, axis=1), 1.0, atol=1e-5)
+    assert local_embed(docs) == vecs.tolist()
+    query = np.array(local_embed(["How do I create an invoice?"])[0])
+    assert int(np.argmax(vecs @ query)) == 0
+    assert local_embed([""]) == [[0.0] * DIM]
+    assert local_embed([]) == []
+
+
+def test_embed_texts_uses_local_provider(monkeypatch):
+    monkeypatch.setattr(settings, "use_fake_embeddings", False)
+    monkeypatch.setattr(settings, "embeddings_provider", "local")
+    from app.services.local_embeddings import local_embed
+
+    assert embeddings.embed_texts(["list refunds"]) == local_embed(["list refunds"])
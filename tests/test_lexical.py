@@ -0,0 +1,27 @@
+from app.services.lexical import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("createInvoice /v1/user_accounts") == [
+        "createinvoice", "create", "invoice", "v1", "user", "accounts",
+    ]
+
+
+def test_bm25_ranks_exact_identifier_and_prunes():
+    idx = BM25Index()
+    idx.add("a", "POST /invoices operationId: createInvoice summary: Create an invoice", {"doc_id": "d1"})
+    idx.add("b", "GET /invoices/{id} operationId: getInvoice summary: Get an invoice", {"doc_id": "d1"})
+    idx.add("c", "POST /refunds operationId: createRefund", {"doc_id": "d2"})
+    assert idx.search("getInvoice", top_k=1)[0]["id"] == "b"
+    assert idx.search("create refund", top_k=1)[0]["id"] == "c"
+
+    idx.remove_doc("d1")
+    assert [m["id"] for m in idx.search("invoice")] == []
+    idx.remove_ids(["c"])
+    assert len(idx) == 0
+
+
+def test_rrf_rewards_agreement():
+    dense = [{"id": "x", "score": 0.9, "metadata": {}}, {"id": "y", "score": 0.8, "metadata": {}}]
+    sparse = [{"id": "y", "score": 7.0, "metadata": {}}, {"id": "z", "score": 3.0, "metadata": {}}]
+    assert [m["id"] for m in reciprocal_rank_fusion([dense, sparse], k=60, top_k=3)] == ["y", "x", "z"]
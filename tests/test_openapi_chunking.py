@@ -0,0 +1,76 @@
+from app.services.openapi_utils import chunk_openapi, inline_refs
+
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Pets", "description": "Pet store"},
+    "paths": {
+        "/pets/{petId}": {
+            "parameters": [{"$ref": "#/components/parameters/PetId"}],
+            "get": {
+                "operationId": "getPet",
+                "summary": "Fetch a pet",
+                "responses": {
+                    "200": {
+                        "description": "OK",
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Pet"}}},
+                    }
+                },
+            },
+            "delete": {"responses": {"204": {"description": "Gone"}}},
+        }
+    },
+    "components": {
+        "parameters": {"PetId": {"name": "petId", "in": "path", "required": True, "schema": {"type": "string"}}},
+        "schemas": {
+            "Pet": {
+                "type": "object",
+                "required": ["name"],
+                "properties": {"name": {"type": "string"}, "parent": {"$ref": "#/components/schemas/Pet"}},
+            }
+        },
+    },
+}
+
+
+def test_chunk_per_operation_with_inlined_refs():
+    chunks = chunk_openapi(SPEC)
+    assert [c["fragment"] for c in chunks] == ["info", "getPet", "DELETE /pets/{petId}"]
+    get = chunks[1]
+    assert get["operation_id"] == "getPet" and get["method"] == "GET" and get["path"] == "/pets/{petId}"
+    assert "petId (path, required): string" in get["text"]
+    assert "200: OK -> {name*: string, parent: " in get["text"]
+
+
+def test_inline_refs_stops_on_cycles_and_depth():
+    pet = inline_refs({"$ref": "#/components/schemas/Pet"}, SPEC, max_depth=5)
+    assert pet["properties"]["parent"] == {"$ref": "#/components/schemas/Pet"}
+    shallow = inline_refs({"$ref": "#/components/schemas/Pet"}, SPEC, max_depth=0)
+    assert shallow == {"$ref": "#/components/schemas/Pet"}
+
+
+def test_streaming_parse_matches_full_parse():
+    import json
+
+    from app.services.openapi_utils import parse_upload
+
+    # components after paths: $refs must still resolve when paths are streamed
+    raw = json.dumps({"openapi": SPEC["openapi"], "info": SPEC["info"], "paths": SPEC["paths"], "components": SPEC["components"]}).encode()
+    full = parse_upload("pets.json", raw, stream_min_bytes=len(raw) + 1)
+    streamed = parse_upload("pets.json", raw, stream_min_bytes=0)
+    assert streamed["chunks"] == full["chunks"]
+    assert streamed["content_hash"] == full["content_hash"]
+
+
+def test_catalog_records_and_match():
+    from app.services.catalog import OperationCatalog, decode_catalog, encode_catalog
+
+    data = {}
+    chunk_openapi(SPEC, catalog=data)
+    cat = OperationCatalog("d1", decode_catalog(encode_catalog(data)))
+    assert len(cat) == 2
+    op = cat.by_operation_id("getPet")
+    assert op["refs"] == ["#/components/parameters/PetId", "#/components/schemas/Pet"]
+    assert cat.schema("#/components/schemas/Pet")["required"] == ["name"]
+    assert cat.get("delete", "/pets/{petId}")["responses"][0]["code"] == "204"
+    assert cat.match("how do I fetch a pet by id?", top_k=1)[0]["operation_id"] == "getPet"
@@ -0,0 +1,73 @@
+from app.services.catalog import OperationCatalog
+from app.services.openapi_utils import chunk_openapi
+from app.services.prompt_context import assemble_context
+from app.utils.text import estimate_tokens
+
+
+def _spec(n_ops: int):
+    paths = {}
+    for i in range(n_ops):
+        paths[f"/things{i}"] = {
+            "post": {
+                "operationId": f"createThing{i}",
+                "summary": f"Create thing {i}",
+                "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Thing"}}}},
+                "responses": {"201": {"description": "Created"}},
+            }
+        }
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Things"},
+        "paths": paths,
+        "components": {
+            "schemas": {
+                "Thing": {"type": "object", "properties": {"owner": {"$ref": "#/components/schemas/Owner"}}},
+                "Owner": {"type": "object", "properties": {"email": {"type": "string", "format": "email"}}},
+            }
+        },
+    }
+
+
+def _catalog_and_chunks(n_ops: int):
+    data = {}
+    chunks = chunk_openapi(_spec(n_ops), catalog=data)
+    cat = OperationCatalog("d1", data)
+    return cat, [{**c, "doc_id": "d1"} for c in chunks]
+
+
+def test_context_includes_transitive_schemas_once():
+    cat, chunks = _catalog_and_chunks(3)
+    ops = [c for c in chunks if c["method"]]
+    # the same operation retrieved twice, plus a second one sharing the schemas
+    ctx = assemble_context("create thing 1", [ops[1], ops[1], ops[2]], cat, budget=10_000)
+    assert ctx["text"].count("POST /things1\n") == 1
+    assert ctx["text"].count("schema Thing ") == 1 and ctx["text"].count("schema Owner ") == 1
+    assert ctx["kept"]["schema"] == 2
+
+
+def test_context_respects_budget_and_keeps_best_operation():
+    cat, chunks = _catalog_and_chunks(200)
+    ops = [c for c in chunks if c["method"]]
+    ctx = assemble_context("create thing 7", ops[7:13], cat, budget=120)
+    assert ctx["tokens"] <= 120 and estimate_tokens(ctx["text"]) <= 120
+    assert ctx["text"].startswith("POST /things7\n")
+    assert ctx["dropped"]
+
+    tiny = assemble_context("create thing 7", ops[7:8], cat, budget=8)
+    assert tiny["text"] == "POST /things7"
+
+
+def test_assembled_prompt_stays_under_the_budget(monkeypatch):
+    from app.config import settings
+    from app.services.qa import _build_prompt
+
+    # long words are where a too-generous chars-per-token ratio undercounts
+    words = " ".join(["authorization", "idempotency", "subscription", "reconciliation"] * 2)
+    chunks = [{"method": "POST", "path": f"/things{i}", "text": f"POST /things{i}\n{words}", "doc_id": "d1"} for i in range(20)]
+    monkeypatch.setattr(settings, "prompt_context_tokens", 300)
+    question = "How do I create thing 7?"
+    prompt = _build_prompt(question, chunks, None)
+    frame = _build_prompt(question, [], None)
+    assert estimate_tokens(prompt) - estimate_tokens(frame) <= 300
+    # also under the ~4 characters per token rule of thumb the estimate follows
+    assert (len(prompt) - len(frame)) / 4 <= 300
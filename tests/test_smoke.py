@@ -1,8 +1,4 @@
-import os
-os.environ.setdefault("USE_MEMORY_VECTORSTORE", "1")
-os.environ.setdefault("USE_FAKE_EMBEDDINGS", "1")
-os.environ.setdefault("USE_MOCK_DB", "1")
-
+from bson import ObjectId
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -37,3 +33,267 @@ def test_smoke_ingest_qa_history(tmp_path):
     if qa_id:
         resp = client.get(f"/history/{qa_id}")
         assert resp.status_code == 200
+
+
+def test_smoke_qa_stream(monkeypatch):
+    from app.config import settings
+
+    openapi_file = ("openapi.json", open("sample_docs/openapi.json", "rb"), "application/json")
+    assert client.post("/ingest", files=[("files", openapi_file)]).status_code == 200
+
+    # templated snippets arrive in one event; LLM snippets stream as tokens
+    resp = client.post("/qa/stream", json={"question": "How do I get an invoice by id?"})
+    events = [block.split("\n")[0][len("event: "):] for block in resp.text.strip().split("\n\n")]
+    assert events == ["answer", "snippets", "done"]
+
+    monkeypatch.setattr(settings, "snippet_fast_path_threshold", 2.0)
+    resp = client.post("/qa/stream", json={"question": "How do I list my invoices?"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n")[0][len("event: "):] for block in resp.text.strip().split("\n\n")]
+    assert events[0] == "answer"
+    assert "token" in events
+    assert events[-2:] == ["snippets", "done"]
+
+
+def test_reingest_only_indexes_changed_chunks():
+    import json
+
+    spec = json.load(open("sample_docs/openapi.json"))
+    name = "incremental.json"
+    resp = client.post("/ingest", files=[("files", (name, json.dumps(spec), "application/json"))])
+    first = resp.json()
+    assert first["chunks_added"] == 2
+
+    resp = client.post("/ingest", files=[("files", (name, json.dumps(spec), "application/json"))])
+    same = resp.json()
+    assert same["doc_ids"] == first["doc_ids"]
+    assert (same["chunks_added"], same["chunks_unchanged"], same["chunks_removed"]) == (0, 2, 0)
+
+    spec["paths"]["/invoices/{id}"]["get"]["summary"] = "Fetch one invoice"
+    spec["paths"]["/refunds"] = {"post": {"operationId": "createRefund", "responses": {"201": {"description": "Created"}}}}
+    resp = client.post("/ingest", files=[("files", (name, json.dumps(spec), "application/json"))])
+    changed = resp.json()
+    assert changed["doc_ids"] == first["doc_ids"]
+    assert (changed["chunks_added"], changed["chunks_unchanged"], changed["chunks_removed"]) == (2, 1, 1)
+
+
+def test_reingest_after_embedding_failure_indexes_the_rest(monkeypatch):
+    from app.config import settings
+    from app.db import chunks_col
+    from app.services import qa as qa_service
+    from app.services.embeddings import EmbeddingError
+    from app.services.openapi_utils import parse_upload
+    from benchmarks.synthetic import generate_spec_bytes
+
+    raw, _ops = generate_spec_bytes(20, seed=5)
+    total = len(parse_upload("flaky.json", raw)["chunks"])
+    upload = [("files", ("flaky.json", raw, "application/json"))]
+    real_embed = qa_service.embed_texts
+    calls = []
+
+    def flaky(texts):
+        calls.append(len(texts))
+        if len(calls) == 2:
+            raise EmbeddingError("provider down")
+        return real_embed(texts)
+
+    monkeypatch.setattr(settings, "ingest_index_batch", 10)
+    monkeypatch.setattr(qa_service, "embed_texts", flaky)
+    assert client.post("/ingest", files=upload).status_code == 502
+
+    resp = client.post("/ingest", files=upload)
+    assert resp.status_code == 200, resp.text
+    retry = resp.json()
+    assert (retry["chunks_added"], retry["chunks_unchanged"]) == (total - 10, 10)
+    assert chunks_col.count_documents({"doc_id": ObjectId(retry["doc_ids"][0])}) == total
+
+    again = client.post("/ingest", files=upload).json()
+    assert (again["chunks_added"], again["chunks_unchanged"]) == (0, total)
+
+
+def test_ingest_stores_files_in_order_and_caps_the_request(monkeypatch):
+    from app.config import settings
+    from app.db import docs_col
+
+    spec = open("sample_docs/openapi.json", "rb").read()
+    files = [("files", ("ordered-a.json", spec, "application/json")), ("files", ("ordered-b.json", b"{nope", "application/json"))]
+    assert client.post("/ingest", files=files).status_code == 400
+    # the file before the bad one was already stored
+    assert docs_col.find_one({"name": "ordered-a.json"}) is not None
+
+    monkeypatch.setattr(settings, "ingest_max_request_bytes", len(spec) + 10)
+    files = [("files", (f"capped-{i}.json", spec, "application/json")) for i in range(2)]
+    resp = client.post("/ingest", files=files)
+    assert resp.status_code == 413 and "request" in resp.json()["detail"]
+
+
+def test_rehydrate_rebuilds_a_stale_snapshot(monkeypatch):
+    from app.db import chunks_col
+    from app.services import qa
+    from app.services.vectorstore import MemoryVectorStore
+
+    openapi_file = ("rehydrate.json", open("sample_docs/openapi.json", "rb"), "application/json")
+    assert client.post("/ingest", files=[("files", openapi_file)]).status_code == 200
+    # a snapshot that missed writes made after it was saved
+    store = MemoryVectorStore()
+    store.upsert([("stale", [1.0] * qa._vectorstore.dim, {"doc_id": "gone"})])
+    monkeypatch.setattr(qa, "_vectorstore", store)
+
+    stored = chunks_col.count_documents({"embedding": {"$exists": True}})
+    assert qa.rehydrate_index() == stored
+    assert len(store) == stored and "stale" not in store._id_to_row
+    # a snapshot that agrees with Mongo is trusted as is
+    assert qa.rehydrate_index() == 0
+
+
+def test_background_ingest_job():
+    import time
+
+    # the job runs on the app's event loop, which only outlives a request inside the context manager
+    with TestClient(app) as live:
+        openapi_file = ("background.json", open("sample_docs/sampleOpenAi.json", "rb"), "application/json")
+        resp = live.post("/ingest?background=true", files=[("files", openapi_file)])
+        assert resp.status_code == 202, resp.text
+        job_id = resp.json()["job_id"]
+
+        for _ in range(100):
+            job = live.get(f"/ingest/jobs/{job_id}").json()
+            if job["status"] not in ("queued", "running"):
+                break
+            time.sleep(0.05)
+        assert job["status"] == "done", job
+        assert job["files"][0]["chunks_indexed"] == job["files"][0]["chunks_total"] > 0
+        assert live.get("/ingest/jobs/missing").status_code == 404
+
+
+def test_ingest_job_eviction_keeps_running_jobs():
+    import asyncio
+    from app.services.ingest import IngestJobManager
+
+    async def scenario():
+        jobs = IngestJobManager(max_jobs=1)
+        first = jobs.submit([("first.txt", b"not json")])
+        second = jobs.submit([("second.txt", b"not json")])
+        # both still running: neither is evicted although the limit is 1
+        assert jobs.get(first.id) is first and jobs.get(second.id) is second
+        await asyncio.gather(*list(jobs._tasks.values()))
+        third = jobs.submit([("third.txt", b"not json")])
+        assert jobs.get(first.id) is None and jobs.get(second.id) is None and jobs.get(third.id) is third
+        await asyncio.gather(*list(jobs._tasks.values()))
+
+    asyncio.run(scenario())
+
+
+def test_bulk_delete_docs():
+    import json
+
+    spec = json.load(open("sample_docs/openapi.json"))
+    ids = []
+    for name in ("bulk-a.json", "bulk-b.json"):
+        resp = client.post("/ingest", files=[("files", (name, json.dumps(spec), "application/json"))])
+        ids += resp.json()["doc_ids"]
+
+    missing = "0" * 24
+    resp = client.request("DELETE", "/docs", json={"ids": ids + [missing]})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert body["deleted"] == ids and body["not_found"] == [missing]
+
+    from bson import ObjectId
+    from app.db import blobs_col, chunks_col, docs_col
+
+    oids = [ObjectId(i) for i in ids]
+    assert docs_col.count_documents({"_id": {"$in": oids}}) == 0
+    assert blobs_col.count_documents({"doc_id": {"$in": oids}}) == 0
+    assert chunks_col.count_documents({"doc_id": {"$in": oids}}) == 0
+    assert client.delete(f"/docs/{ids[0]}").status_code == 404
+
+
+def test_bulk_delete_survives_rejected_filter_delete(monkeypatch):
+    from app.db import chunks_col, docs_col
+    from app.services import qa as qa_service
+
+    # a doc whose chunks predate recorded vector ids can only be de-indexed by filter
+    legacy = docs_col.insert_one({"name": "legacy.md", "type": "markdown"}).inserted_id
+    chunks_col.insert_one({"doc_id": legacy, "text": "old chunk"})
+    other = docs_col.insert_one({"name": "other.md", "type": "markdown"}).inserted_id
+
+    def reject(filter_meta):
+        raise RuntimeError("metadata filter deletes are not supported")
+
+    monkeypatch.setattr(qa_service._vectorstore, "delete", reject)
+    resp = client.request("DELETE", "/docs", json={"ids": [str(legacy), str(other)]})
+    assert resp.status_code == 200, resp.text
+    assert sorted(resp.json()["deleted"]) == sorted([str(legacy), str(other)])
+    assert docs_col.count_documents({"_id": {"$in": [legacy, other]}}) == 0
+    assert chunks_col.count_documents({"doc_id": legacy}) == 0
+
+
+def test_keyset_pagination_of_docs_and_history():
+    import json
+
+    spec = json.load(open("sample_docs/openapi.json"))
+    for name in ("page-a.json", "page-b.json", "page-c.json"):
+        client.post("/ingest", files=[("files", (name, json.dumps(spec), "application/json"))])
+
+    names, after = [], None
+    while True:
+        resp = client.get("/docs", params={"limit": 2, **({"after": after} if after else {})})
+        assert resp.status_code == 200, resp.text
+        page = resp.json()
+        assert len(page) <= 2 and all("content" not in d for d in page)
+        names += [d["name"] for d in page]
+        after = resp.headers.get("x-next-cursor")
+        if not after:
+            break
+    assert len(names) == len(set(names)) and {"page-a.json", "page-b.json", "page-c.json"} <= set(names)
+
+    first = client.get("/history", params={"limit": 1})
+    second = client.get("/history", params={"limit": 1, "after": first.headers["x-next-cursor"]})
+    assert first.json()[0]["id"] > second.json()[0]["id"]
+    assert client.get("/history", params={"after": "nope"}).status_code == 400
+
+
+def test_metrics_and_server_timing():
+    openapi_file = ("openapi.json", open("sample_docs/openapi.json", "rb"), "application/json")
+    client.post("/ingest", files=[("files", openapi_file)])
+    resp = client.post("/qa", json={"question": "Which endpoint creates invoices for a customer?"})
+    assert resp.status_code == 200
+    timing = resp.headers["server-timing"]
+    for stage in ("embed", "vector_query", "fetch_chunks", "save", "total"):
+        assert f"{stage};dur=" in timing
+
+    body = client.get("/metrics").text
+    assert 'app_stage_duration_seconds_count{stage="embed"}' in body
+    assert 'app_stage_duration_seconds_bucket{stage="ingest_parse",le="+Inf"}' in body
+    assert 'app_http_request_duration_seconds_count{method="POST",route="/qa",status="200"}' in body
+    assert "app_answer_cache_" in body
+    assert "app_vectorstore_bytes_per_vector 1536" in body
+
+
+def test_qa_batch_matches_single_answers(monkeypatch):
+    import numpy as np
+    from app.services import qa as qa_service
+    from app.services.answer_cache import answer_cache
+
+    # deterministic query embeddings so /qa and /qa/batch retrieve the same chunks
+    def embed(texts):
+        return [np.random.default_rng(abs(hash(t)) % 2**32).random(384).tolist() for t in texts]
+
+    monkeypatch.setattr(qa_service, "embed_texts", embed)
+    openapi_file = ("openapi.json", open("sample_docs/openapi.json", "rb"), "application/json")
+    client.post("/ingest", files=[("files", openapi_file)])
+
+    questions = ["How do I create an invoice?", "What does the invoice lookup return?", "How do I create an invoice?"]
+    answer_cache.clear()
+    single = [client.post("/qa", json={"question": q}).json() for q in questions[:2]]
+    answer_cache.clear()
+    resp = client.post("/qa/batch", json={"questions": questions})
+    assert resp.status_code == 200, resp.text
+    results = resp.json()["results"]
+    for expected, got in zip(single + single[:1], results):
+        for key in ("question", "answer", "citations", "snippets"):
+            assert got[key] == expected[key]
+    assert len({r["id"] for r in results}) == 3
+    assert client.post("/qa/batch", json={"questions": []}).status_code == 400
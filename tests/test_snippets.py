@@ -0,0 +1,100 @@
+from app.services.catalog import OperationCatalog
+from app.services.openapi_utils import chunk_openapi
+import json
+import shlex
+
+from app.services.snippets import _curl, _javascript, _python, build_request, fast_path_operation, render_snippets
+
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Billing"},
+    "servers": [{"url": "https://billing.example.com/v1"}],
+    "paths": {
+        "/invoices": {
+            "post": {
+                "operationId": "createInvoice",
+                "summary": "Create an invoice",
+                "parameters": [{"name": "Idempotency-Key", "in": "header", "required": True, "schema": {"type": "string"}}],
+                "requestBody": {
+                    "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Invoice"}}},
+                },
+                "responses": {"201": {"description": "Created"}},
+            },
+            "get": {"operationId": "listInvoices", "summary": "List invoices", "responses": {"200": {"description": "OK"}}},
+        },
+        "/invoices/{invoiceId}": {
+            "get": {
+                "operationId": "getInvoice",
+                "summary": "Fetch an invoice",
+                "parameters": [{"name": "invoiceId", "in": "path", "required": True, "schema": {"type": "string"}}],
+                "responses": {"200": {"description": "OK"}},
+            }
+        },
+    },
+    "components": {
+        "schemas": {
+            "Invoice": {
+                "type": "object",
+                "properties": {"amount": {"type": "integer", "example": 1200}, "currency": {"enum": ["usd", "eur"]}},
+            }
+        }
+    },
+}
+
+
+def _catalog():
+    data = {}
+    chunk_openapi(SPEC, catalog=data)
+    return OperationCatalog("d1", data)
+
+
+def test_render_snippets_from_operation():
+    cat = _catalog()
+    snippets = render_snippets(cat.by_operation_id("createInvoice"), cat.servers[0], cat.schemas)
+    assert [s["language"] for s in snippets] == ["curl", "python", "javascript", "typescript"]
+    curl = snippets[0]["code"]
+    assert "curl -X POST https://billing.example.com/v1/invoices" in curl
+    assert "Idempotency-Key: example_Idempotency-Key" in curl
+    assert '"amount": 1200' in curl and '"currency": "usd"' in curl
+
+    get = render_snippets(cat.by_operation_id("getInvoice"), cat.servers[0], cat.schemas)
+    assert "/v1/invoices/YOUR_INVOICEID" in get[1]["code"]
+
+
+def test_fast_path_requires_confident_retrieved_match():
+    cat = _catalog()
+    retrieved = [{"method": "POST", "path": "/invoices"}, {"method": "GET", "path": "/invoices/{invoiceId}"}]
+    op = fast_path_operation("How do I create an invoice?", cat, retrieved)
+    assert op is not None and op["operation_id"] == "createInvoice"
+    # best catalog match not among the retrieved operations
+    assert fast_path_operation("How do I create an invoice?", cat, retrieved[1:]) is None
+    # no operation-specific tokens: fall back to the LLM
+    assert fast_path_operation("What is this API for?", cat, retrieved) is None
+
+
+def test_fast_path_ignores_questions_about_other_resources():
+    cat = _catalog()
+    retrieved = [{"method": op["method"], "path": op["path"]} for op in cat.operations]
+    # one shared word ("create", an HTTP method) must not vouch for the unknown rest of the question
+    assert fast_path_operation("How do I create a refund for a payment?", cat, retrieved) is None
+    assert fast_path_operation("Can I delete my account?", cat, retrieved) is None
+    assert fast_path_operation("Show me how to post a comment", cat, retrieved) is None
+    assert fast_path_operation("How do I list invoices?", cat, retrieved)["operation_id"] == "listInvoices"
+
+
+def test_snippets_are_valid_python_and_shell_for_any_body():
+    body = {"active": True, "archived": False, "coupon": None, "note": "it's paid", "items": [{"qty": 1}]}
+    req = {"method": "POST", "url": "https://api.example.com/v1/orders?expand=it's", "headers": {"X-Note": "o'clock"}, "body": body}
+    compile(_python(req), "<snippet>", "exec")
+    assert "'active': True" in _python(req) and "'coupon': None" in _python(req)
+    argv = shlex.split(_curl(req).replace(" \\\n", " "))
+    assert argv[3] == req["url"] and argv[5] == "X-Note: o'clock"
+    assert json.loads(argv[argv.index("-d") + 1]) == body
+    js = _javascript(req)
+    assert json.loads(js[js.index("fetch(") + len("fetch(") : js.index(", {")]) == req["url"]
+
+
+def test_path_parameters_are_url_encoded():
+    op = {"method": "GET", "path": "/files/{name}", "parameters": [{"name": "name", "in": "path", "schema": {"type": "string", "example": "a b/c?d"}}]}
+    assert build_request(op, "https://api.example.com")["url"] == "https://api.example.com/files/a%20b%2Fc%3Fd"
@@ -0,0 +1,182 @@
+import numpy as np
+
+from app.config import settings
+from app.services.vectorstore import IVFVectorStore, MemoryVectorStore, get_vectorstore
+
+
+def _items(doc_id, vecs, start=0):
+    return [(f"{doc_id}-{i + start}", v, {"doc_id": doc_id, "chunk_id": i + start}) for i, v in enumerate(vecs)]
+
+
+def test_memory_query_matches_bruteforce():
+    rng = np.random.default_rng(0)
+    vecs = rng.normal(size=(300, 16))
+    store = MemoryVectorStore()
+    store.upsert(_items("a", vecs[:150].tolist()))
+    store.upsert(_items("b", vecs[150:].tolist(), start=150))
+    q = rng.normal(size=16)
+    expected = np.argsort(-(vecs @ q) / np.linalg.norm(vecs, axis=1))[:5]
+    got = store.query(q.tolist(), top_k=5)
+    assert [m["metadata"]["chunk_id"] for m in got] == expected.tolist()
+    assert got[0]["score"] >= got[-1]["score"]
+
+
+def test_memory_delete_and_compact():
+    rng = np.random.default_rng(1)
+    store = MemoryVectorStore()
+    store._COMPACT_MIN_TOMBSTONES = 1
+    store.upsert(_items("a", rng.normal(size=(10, 8)).tolist()))
+    store.upsert(_items("b", rng.normal(size=(10, 8)).tolist()))
+    store.delete({"doc_id": "a"})
+    assert len(store) == 10
+    assert store._tombstones == 0  # compacted
+    res = store.query(rng.normal(size=8).tolist(), top_k=20)
+    assert len(res) == 10
+    assert all(m["metadata"]["doc_id"] == "b" for m in res)
+
+
+def test_memory_upsert_same_id_replaces():
+    store = MemoryVectorStore()
+    store.upsert([("x", [1.0, 0.0], {"doc_id": "a"})])
+    store.upsert([("x", [0.0, 1.0], {"doc_id": "a"})])
+    assert len(store) == 1
+    res = store.query([0.0, 1.0], top_k=3)
+    assert res[0]["id"] == "x" and res[0]["score"] > 0.99
+
+
+def test_memory_upsert_duplicate_ids_in_one_batch_keeps_the_last():
+    store = MemoryVectorStore()
+    store.upsert([("x", [1.0, 0.0], {"doc_id": "a"}), ("y", [1.0, 1.0], {"doc_id": "a"}), ("x", [0.0, 1.0], {"doc_id": "a"})])
+    assert len(store) == 2 and store._size == 2
+    res = store.query([1.0, 0.0], top_k=3)
+    assert [m["id"] for m in res] == ["y", "x"]
+    store.delete_ids(["x"])
+    assert [m["id"] for m in store.query([0.0, 1.0], top_k=3)] == ["y"]
+
+
+def test_memory_snapshot_roundtrip(tmp_path):
+    rng = np.random.default_rng(2)
+    store = MemoryVectorStore(snapshot_dir=str(tmp_path))
+    store.upsert(_items("a", rng.normal(size=(5, 8)).tolist()))
+    store.upsert(_items("b", rng.normal(size=(5, 8)).tolist(), start=5))
+    store.delete({"doc_id": "a"})
+    store.persist()
+
+    loaded = MemoryVectorStore.load(str(tmp_path))
+    assert loaded is not None and len(loaded) == 5
+    assert isinstance(loaded._matrix, np.memmap)
+    q = rng.normal(size=8).tolist()
+    assert [m["id"] for m in loaded.query(q, 3)] == [m["id"] for m in store.query(q, 3)]
+    # first write after load moves off the read-only mapping
+    loaded.upsert(_items("c", rng.normal(size=(2, 8)).tolist(), start=10))
+    assert len(loaded) == 7
+
+
+def _clustered(rng, n, dim, centres=20):
+    c = rng.normal(size=(centres, dim))
+    return c[rng.integers(0, centres, n)] + 0.3 * rng.normal(size=(n, dim))
+
+
+def test_ivf_matches_exact_search_and_tracks_upserts_and_deletes():
+    rng = np.random.default_rng(3)
+    vecs = _clustered(rng, 2000, 16)
+    exact, ivf = MemoryVectorStore(), IVFVectorStore(nlist=20, nprobe=3)
+    ivf._MIN_TRAIN_ROWS = 500
+    ivf._COMPACT_MIN_TOMBSTONES = 1
+    for store in (exact, ivf):
+        store.upsert(_items("a", vecs[:1000].tolist()))
+        store.upsert(_items("b", vecs[1000:].tolist(), start=1000))
+    assert ivf._centroids is not None and len(ivf._lists) == 20
+    queries = vecs[rng.integers(0, 2000, 20)] + 0.1 * rng.normal(size=(20, 16))
+    hits = sum(
+        len({m["id"] for m in e} & {m["id"] for m in a})
+        for e, a in zip(exact.query_many(queries.tolist(), 10), ivf.query_many(queries.tolist(), 10))
+    )
+    assert hits / 200 >= 0.9
+    # all lists probed is exact
+    q = queries[0].tolist()
+    assert [m["id"] for m in ivf.query_many([q], 10, nprobe=20)[0]] == [m["id"] for m in exact.query(q, 10)]
+
+    ivf.upsert([("new", vecs[0].tolist(), {"doc_id": "c"})])
+    assert ivf.query(vecs[0].tolist(), 2)[0]["score"] > 0.999
+    ivf.delete({"doc_id": "a"})  # compacts and rebuilds the lists
+    assert sum(len(rows) for rows in ivf._lists) == len(ivf) == 1001
+    assert all(m["metadata"]["doc_id"] != "a" for m in ivf.query_many([q], 50, nprobe=20)[0])
+
+
+def test_ivf_is_exact_until_trained_and_selected_by_settings(monkeypatch):
+    rng = np.random.default_rng(4)
+    ivf = IVFVectorStore()
+    ivf.upsert(_items("a", rng.normal(size=(50, 8)).tolist()))
+    assert ivf._centroids is None
+    assert len(ivf.query(rng.normal(size=8).tolist(), top_k=60)) == 50
+
+    monkeypatch.setattr(settings, "use_memory_vectorstore", True)
+    monkeypatch.setattr(settings, "vectorstore_snapshot_dir", None)
+    monkeypatch.setattr(settings, "vectorstore_index", "ivf")
+    monkeypatch.setattr(settings, "ivf_nprobe", 12)
+    store = get_vectorstore()
+    assert isinstance(store, IVFVectorStore) and store.nprobe == 12
+
+
+def test_quantized_stores_rerank_to_exact_results(tmp_path):
+    rng = np.random.default_rng(5)
+    vecs = _clustered(rng, 3000, 32)
+    exact = MemoryVectorStore()
+    exact.upsert(_items("a", vecs[:2000].tolist()))
+    exact.upsert(_items("b", vecs[2000:].tolist(), start=2000))
+    queries = (vecs[rng.integers(0, 3000, 10)] + 0.2 * rng.normal(size=(10, 32))).tolist()
+    expected = exact.query_many(queries, 10)
+    for quantization, size in (("float16", 64), ("int8", 36)):
+        store = MemoryVectorStore(snapshot_dir=str(tmp_path / quantization), quantization=quantization, rerank=4)
+        store._COMPACT_MIN_TOMBSTONES = 1
+        store.upsert(_items("a", vecs[:2000].tolist()))
+        store.upsert(_items("b", vecs[2000:].tolist(), start=2000))
+        assert store.bytes_per_vector == size and store._matrix.dtype == np.dtype(quantization)
+        got = store.query_many(queries, 10)
+        overlap = sum(len({m["id"] for m in e} & {m["id"] for m in g}) for e, g in zip(expected, got))
+        assert overlap >= 98
+        # re-ranked scores come from the full-precision copy
+        assert abs(got[0][0]["score"] - next(m["score"] for m in expected[0] if m["id"] == got[0][0]["id"])) < 1e-5
+
+        store.persist()
+        loaded = MemoryVectorStore.load(str(tmp_path / quantization), quantization=quantization)
+        assert isinstance(loaded._full, np.memmap) and loaded._matrix.dtype == np.dtype(quantization)
+        assert [m["id"] for m in loaded.query(queries[0], 5)] == [m["id"] for m in store.query(queries[0], 5)]
+
+        store.delete({"doc_id": "a"})
+        assert len(store) == 1000 and store._tombstones == 0
+        assert all(m["metadata"]["doc_id"] == "b" for m in store.query(queries[0], 20))
+
+
+def test_ivf_with_int8_quantization():
+    rng = np.random.default_rng(6)
+    vecs = _clustered(rng, 1000, 16)
+    ivf = IVFVectorStore(nlist=10, nprobe=10, quantization="int8")
+    ivf._MIN_TRAIN_ROWS = 200
+    ivf.upsert(_items("a", vecs.tolist()))
+    exact = MemoryVectorStore()
+    exact.upsert(_items("a", vecs.tolist()))
+    q = vecs[7].tolist()
+    assert [m["id"] for m in ivf.query(q, 5)] == [m["id"] for m in exact.query(q, 5)]
+
+
+def test_concurrent_saves_leave_a_loadable_snapshot(tmp_path):
+    import os
+    import threading
+
+    rng = np.random.default_rng(7)
+    store = MemoryVectorStore(snapshot_dir=str(tmp_path))
+    store.upsert(_items("a", rng.normal(size=(200, 8)).tolist()))
+    threads = [threading.Thread(target=store.persist) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(os.listdir(tmp_path)) == ["ids.json", "vectors.npy"]
+    assert len(MemoryVectorStore.load(str(tmp_path))) == 200
+
+    # a truncated snapshot is ignored rather than failing startup
+    with open(tmp_path / "vectors.npy", "r+b") as fh:
+        fh.truncate(40)
+    assert MemoryVectorStore.load(str(tmp_path)) is None